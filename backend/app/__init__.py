@@ -2,10 +2,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 def create_app():
+    from app.utils.responses import CompressionMiddleware, FastJSONResponse
+
     app = FastAPI(
         title="Crypto Tools API",
         description="API for Caesar, Vigenère, Monoalphabetic, DES, AES",
-        version="1.0.0"
+        version="1.0.0",
+        default_response_class=FastJSONResponse,
     )
 
     app.add_middleware(
@@ -14,15 +17,26 @@ def create_app():
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-IV", "Content-Disposition", "X-Profile-Id"],
     )
 
-    from app.routers import caesar, vigenere, mono, des, aes
+    from app.utils.metrics import MetricsMiddleware
+    from app.utils.profiling import ProfileMiddleware
+    app.add_middleware(CompressionMiddleware)
+    app.add_middleware(ProfileMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
+    from app.routers import caesar, vigenere, mono, des, aes, cache, compute, metrics, profiles
     
     app.include_router(caesar.router)
     app.include_router(vigenere.router)
     app.include_router(mono.router)
     app.include_router(des.router)
     app.include_router(aes.router)
+    app.include_router(cache.router)
+    app.include_router(compute.router)
+    app.include_router(metrics.router)
+    app.include_router(profiles.router)
 
     return app
 
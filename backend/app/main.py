@@ -1,7 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+from app.utils.metrics import MetricsMiddleware
+from app.utils.profiling import ProfileMiddleware
+from app.utils.responses import CompressionMiddleware, FastJSONResponse
+
+app = FastAPI(default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,16 +18,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-IV", "Content-Disposition", "X-Profile-Id"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfileMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # ===== Include routers =====
-from app.routers import caesar, vigenere, mono, des, aes
+from app.routers import caesar, vigenere, mono, des, aes, cache, compute, metrics, profiles
 
 app.include_router(caesar.router)
 app.include_router(vigenere.router)
 app.include_router(mono.router)
 app.include_router(des.router)
 app.include_router(aes.router)
+app.include_router(cache.router)
+app.include_router(compute.router)
+app.include_router(metrics.router)
+app.include_router(profiles.router)
 
 @app.get("/")
 def root():
@@ -1,9 +1,15 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from pydantic import BaseModel
+from typing import Literal
 import binascii, base64
-from app.services.aes_solver import encrypt, decrypt
+from app.services.aes_solver import encrypt, decrypt, StreamCipher
+from app.routers.streaming import stream_response, binary_response, encrypted_name, decrypted_name
+from app.routers.batch import BatchReq, run_batch_request
+from app.routers.compute import offload
+from app.utils.log import get_logger
 
 router = APIRouter(prefix="/api/aes", tags=["AES"])
+log = get_logger(__name__)
 
 # ===== Helpers =====
 hx = lambda b: binascii.hexlify(b).decode()
@@ -19,12 +25,46 @@ def safe_hex(x:  str, name="value"):
     except Exception: 
         raise HTTPException(400, f"{name} must be valid hex")
 
+# ===== Output encodings =====
+# "all" giữ nguyên dạng cũ (hex + base64); chọn một dạng để không phải trả tiền
+# mã hóa và truyền phần còn lại. "binary" trả thẳng bytes, IV nằm trong header X-IV.
+EncOutput = Literal["all", "hex", "base64", "binary"]
+DecOutput = Literal["all", "hex", "base64", "utf8", "binary"]
+
+def encrypted_output(ct, iv, output="all", filename=None):
+    if output == "binary":
+        return binary_response(ct, iv, filename)
+    out = {}
+    if output in ("all", "hex"):
+        out["ciphertextHex"] = hx(ct)
+    if output in ("all", "base64"):
+        out["ciphertextBase64"] = b64e(ct)
+    if output in ("all", "hex"):
+        out["ivHex"] = hx(iv) if iv else None
+    if output in ("all", "base64"):
+        out["ivBase64"] = b64e(iv) if iv else None
+    return out
+
+def decrypted_output(pt, output="all", text_field="plaintextUtf8", filename=None):
+    if output == "binary":
+        return binary_response(pt, filename=filename)
+    out = {}
+    if output in ("all", "hex"):
+        out["plaintextHex"] = hx(pt)
+    if output in ("all", "base64"):
+        out["plaintextBase64"] = b64e(pt)
+    if output in ("all", "utf8"):
+        out[text_field] = pt.decode("utf-8", errors="replace")
+    return out
+
 # ===== Request Models =====
 class EncReq(BaseModel):
     plaintext: str
     keyHex: str
     mode: str
     ivHex: str | None = None
+    aadHex: str | None = None  # dữ liệu xác thực kèm theo (chỉ GCM)
+    outputEnc: EncOutput = "all"
 
 class DecReq(BaseModel):
     ciphertextHex: str | None = None
@@ -32,29 +72,39 @@ class DecReq(BaseModel):
     keyHex: str
     mode: str
     ivHex: str | None = None
+    aadHex: str | None = None
+    outputEnc: DecOutput = "all"
 
 @router.post("/encrypt")
-def aes_encrypt(req: EncReq):
+async def aes_encrypt(req: EncReq):
+    return await offload("aes.encrypt", encrypt_request, req)
+
+
+def encrypt_request(req: EncReq):
     key = safe_hex(req.keyHex, "keyHex")
     iv = safe_hex(req.ivHex, "ivHex") if req.ivHex else None
+    aad = safe_hex(req.aadHex, "aadHex") if req.aadHex else b""
 
-    ct, iv = encrypt(
-        req.plaintext. encode(),
-        key,
-        req. mode. upper(),
-        iv
-    )
+    try:
+        ct, iv = encrypt(
+            req.plaintext. encode(),
+            key,
+            req. mode. upper(),
+            iv,
+            aad=aad
+        )
+    except ValueError as e:
+        raise HTTPException(400, f"Encryption failed: {str(e)}")
 
-    return {
-        "ciphertextHex": hx(ct),
-        "ciphertextBase64": b64e(ct),
-        "ivHex": hx(iv) if iv else None,
-        "ivBase64": b64e(iv) if iv else None
-    }
+    return encrypted_output(ct, iv, req.outputEnc)
 
 
 @router.post("/decrypt")
-def aes_decrypt(req: DecReq):
+async def aes_decrypt(req: DecReq):
+    return await offload("aes.decrypt", decrypt_request, req)
+
+
+def decrypt_request(req: DecReq):
     try:
         if req.ciphertextHex:
             ct = safe_hex(req.ciphertextHex, "ciphertextHex")
@@ -68,57 +118,64 @@ def aes_decrypt(req: DecReq):
 
         key = safe_hex(req.keyHex, "keyHex")
         iv = safe_hex(req.ivHex, "ivHex") if req.ivHex else None
+        aad = safe_hex(req.aadHex, "aadHex") if req.aadHex else b""
 
-        print(f"[DEBUG] Ciphertext length: {len(ct)}")
-        print(f"[DEBUG] Key length: {len(key)}")
-        print(f"[DEBUG] IV length: {len(iv) if iv else 'None'}")
-        print(f"[DEBUG] Mode: {req.mode}")
+        log.debug("AES decrypt", ciphertext_len=len(ct), key_len=len(key),
+                  iv_len=len(iv) if iv else None, mode=req.mode)
 
         pt = decrypt(
             ct,
             key,
             req.mode. upper(),
-            iv
+            iv,
+            aad=aad
         )
 
-        return {
-            "plaintextHex": hx(pt),
-            "plaintextBase64": b64e(pt),
-            "plaintextUtf8": pt.decode("utf-8", errors="replace")
-        }
+        return decrypted_output(pt, req.outputEnc)
     
+    except HTTPException:
+        raise
     except ValueError as e:
-        print(f"[ERROR] ValueError: {str(e)}")
+        log.info("AES decrypt rejected", mode=req.mode, error=str(e))
         raise HTTPException(400, f"Decryption failed: {str(e)}")
     except Exception as e:
-        print(f"[ERROR] Exception: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("AES decrypt failed", mode=req.mode)
         raise HTTPException(500, f"Internal error: {str(e)}")
 
 
+# ===== Batch: nhiều bản ghi nhỏ trong một request, gom theo khóa =====
+@router.post("/batch")
+async def aes_batch(req: BatchReq):
+    return await offload("aes.batch", run_batch_request, "aes", req)
+
+
 # ===== Encrypt file =====
 @router.post("/upload")
 async def aes_upload_encrypt(
     file: UploadFile = File(...),
     keyHex: str = Form(...),
     mode: str = Form(... ),
-    ivHex: str | None = Form(None)
+    ivHex: str | None = Form(None),
+    aadHex: str | None = Form(None),
+    outputEnc: EncOutput = Form("all")
 ):
     raw = await file.read()
-    ct, iv = encrypt(
-        raw,
-        bh(keyHex),
-        mode. upper(),
-        bh(ivHex) if ivHex else None
-    )
-    return {
-        "filename": file.filename,
-        "ciphertextHex": hx(ct),
-        "ciphertextBase64": b64e(ct),
-        "ivHex": hx(iv) if iv else None,
-        "ivBase64": b64e(iv) if iv else None
-    }
+    try:
+        # CTR/GCM với file lớn chạy trên process pool, không chặn event loop
+        ct, iv = await offload(
+            "aes.upload",
+            encrypt,
+            raw,
+            bh(keyHex),
+            mode. upper(),
+            bh(ivHex) if ivHex else None,
+            aad=bh(aadHex) if aadHex else b""
+        )
+    except ValueError as e:
+        raise HTTPException(400, f"Encryption failed: {str(e)}")
+    if outputEnc == "binary":
+        return encrypted_output(ct, iv, outputEnc, encrypted_name(file.filename))
+    return {"filename": file.filename, **encrypted_output(ct, iv, outputEnc)}
 
 # ===== Decrypt file ===== 
 # FIX: Xử lý đúng định dạng input
@@ -128,7 +185,9 @@ async def aes_upload_decrypt(
     keyHex: str = Form(...),
     mode: str = Form(...),
     ivHex: str | None = Form(None),
-    inputEnc: str = Form("hex")  # "hex" hoặc "base64"
+    inputEnc: str = Form("hex"),  # "hex" hoặc "base64"
+    aadHex: str | None = Form(None),
+    outputEnc: DecOutput = Form("all")
 ):
     raw = await file.read()
     
@@ -148,18 +207,57 @@ async def aes_upload_decrypt(
 
     # Decrypt
     try:
-        pt = decrypt(
+        pt = await offload(
+            "aes.upload",
+            decrypt,
             ct,
             bh(keyHex),
             mode.upper(),
-            bh(ivHex) if ivHex else None
+            bh(ivHex) if ivHex else None,
+            aad=bh(aadHex) if aadHex else b""
         )
+    except HTTPException:
+        raise
     except Exception as e: 
         raise HTTPException(400, f"Decryption failed: {str(e)}")
 
-    return {
-        "filename": file. filename,
-        "plaintextHex": hx(pt),
-        "plaintextBase64": b64e(pt),
-        "plaintext": pt.decode("utf-8", errors="replace")
-    }
\ No newline at end of file
+    if outputEnc == "binary":
+        return decrypted_output(pt, outputEnc, filename=decrypted_name(file.filename))
+    return {"filename": file. filename, **decrypted_output(pt, outputEnc, text_field="plaintext")}
+
+
+# ===== Streaming file encrypt/decrypt =====
+# Đọc file theo từng khối, trả về nhị phân ngay khi có, bộ nhớ không phụ thuộc
+# kích thước file. IV trả về trong header X-IV.
+
+def make_stream_cipher(keyHex, mode, ivHex, decrypting):
+    try:
+        return StreamCipher(
+            safe_hex(keyHex, "keyHex"),
+            mode.upper(),
+            safe_hex(ivHex, "ivHex") if ivHex else None,
+            decrypting=decrypting
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+@router.post("/upload-stream")
+async def aes_upload_encrypt_stream(
+    file: UploadFile = File(...),
+    keyHex: str = Form(...),
+    mode: str = Form(...),
+    ivHex: str | None = Form(None)
+):
+    cipher = make_stream_cipher(keyHex, mode, ivHex, decrypting=False)
+    return stream_response(file, cipher, encrypted_name(file.filename))
+
+# File đầu vào là ciphertext nhị phân (đầu ra của /upload-stream)
+@router.post("/upload-decrypt-stream")
+async def aes_upload_decrypt_stream(
+    file: UploadFile = File(...),
+    keyHex: str = Form(...),
+    mode: str = Form(...),
+    ivHex: str | None = Form(None)
+):
+    cipher = make_stream_cipher(keyHex, mode, ivHex, decrypting=True)
+    return stream_response(file, cipher, decrypted_name(file.filename))
@@ -0,0 +1,78 @@
+import binascii
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.services.batch import MAX_BATCH_ITEMS, run_batch
+
+
+class BatchItem(BaseModel):
+    # plaintext -> encrypt, ciphertextHex -> decrypt
+    plaintext: str | None = None
+    ciphertextHex: str | None = None
+    keyHex: str
+    mode: str
+    ivHex: str | None = None
+    aadHex: str | None = None
+
+
+class BatchReq(BaseModel):
+    items: list[BatchItem]
+
+
+def _parse_item(index, item):
+    if (item.plaintext is None) == (item.ciphertextHex is None):
+        raise ValueError("Exactly one of plaintext or ciphertextHex is required")
+    if item.plaintext is not None:
+        op, data = "encrypt", item.plaintext.encode()
+    else:
+        op, data = "decrypt", binascii.unhexlify(item.ciphertextHex)
+    return (
+        index,
+        binascii.unhexlify(item.keyHex),
+        op,
+        data,
+        item.mode.upper(),
+        binascii.unhexlify(item.ivHex) if item.ivHex else None,
+        binascii.unhexlify(item.aadHex) if item.aadHex else b"",
+    )
+
+
+def run_batch_request(cipher, req, decode_errors="replace"):
+    """
+    Validate every item, run the valid ones grouped by key, and answer with
+    one result per item in request order: ciphertextHex/ivHex, plaintext/
+    plaintextHex, or error.
+    """
+    if len(req.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(413, f"Batch is limited to {MAX_BATCH_ITEMS} items")
+
+    parsed, results = [], [None] * len(req.items)
+    for index, item in enumerate(req.items):
+        try:
+            parsed.append(_parse_item(index, item))
+        except ValueError as e:
+            results[index] = {"index": index, "error": str(e)}
+
+    ops = {item[0]: item[2] for item in parsed}
+    for index, output, iv, error in run_batch(cipher, parsed):
+        if error is not None:
+            results[index] = {"index": index, "error": error}
+        elif ops[index] == "encrypt":
+            results[index] = {
+                "index": index,
+                "ciphertextHex": binascii.hexlify(output).decode(),
+                "ivHex": binascii.hexlify(iv).decode() if iv else None,
+            }
+        else:
+            results[index] = {
+                "index": index,
+                "plaintext": output.decode("utf-8", errors=decode_errors),
+                "plaintextHex": binascii.hexlify(output).decode(),
+            }
+
+    return {
+        "count": len(results),
+        "errors": sum(1 for r in results if "error" in r),
+        "results": results,
+    }
@@ -0,0 +1,55 @@
+from fastapi import APIRouter
+
+from app.services import caesar_solver, mono_solver, vigenere_solver
+from app.services.caesar_solver import ciphertexts
+from app.services.dispatch import dispatcher
+from app.services.mono_solver import MonoalphabeticAnalyzer
+from app.utils.key_cache import key_schedules
+from app.utils.result_cache import result_cache, result_key
+
+router = APIRouter(prefix="/api/cache", tags=["Cache"])
+
+SOLVER_VERSIONS = {
+    "caesar": caesar_solver.RESULT_VERSION,
+    "vigenere": vigenere_solver.RESULT_VERSION,
+    "mono": mono_solver.RESULT_VERSION,
+}
+
+
+def solve_key(solver, params, text):
+    """
+    Result-cache key of a classical solve: the solver's RESULT_VERSION and,
+    since all of them score with it, the n-gram model fingerprint.
+    """
+    version = f"{SOLVER_VERSIONS[solver]}:{MonoalphabeticAnalyzer.model_version()}"
+    return result_key(solver, version, params, text)
+
+
+async def cached_solve_async(solver, params, text, compute, use_cache=True):
+    """
+    Await compute() through the shared result cache; use_cache=False forces a
+    fresh solve. Hashing the text, model_version() (which loads the n-gram
+    model on a cold start) and the SQLite tier all block, so key, lookup and
+    store run on the compute threads, outside any lane's admission limit.
+    """
+    key = await dispatcher.call(solve_key, solver, params, text)
+    result = await dispatcher.call(result_cache.get, key) if use_cache else None
+    if result is None:
+        result = await compute()
+        await dispatcher.call(result_cache.put, key, result)
+    return result
+
+
+@router.get("/stats")
+def cache_stats():
+    return {
+        "results": result_cache.stats(),
+        "keySchedules": key_schedules.stats(),
+        "caesarTexts": ciphertexts.stats(),
+    }
+
+
+@router.delete("")
+def clear_results():
+    result_cache.clear()
+    return {"cleared": True}
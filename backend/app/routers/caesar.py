@@ -1,17 +1,69 @@
-from fastapi import APIRouter, UploadFile, File
-from pydantic import BaseModel
-from app.services.caesar_solver import solve_caesar
+from typing import Literal, Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from pydantic import BaseModel, Field
+from app.services.caesar_solver import solve_caesar, candidate_text, remember, PREVIEW_CHARS
+from app.routers.cache import cached_solve_async
+from app.routers.compute import offload
+from app.routers.jobs import add_job_routes
 
 router = APIRouter(prefix="/api/caesar", tags=["Caesar"])
 
 class CaesarReq(BaseModel):
     ciphertext: str
+    top: Optional[int] = Field(None, ge=1, le=26)  # số ứng viên tốt nhất trả về đầy đủ plaintext (mặc định: cả 26)
+    # "full": allCandidates chứa plaintext đầy đủ; "slim": chỉ bản preview + digest để lấy từng shift sau
+    view: Literal["full", "slim"] = "full"
+    previewChars: int = Field(PREVIEW_CHARS, ge=0, le=10000)
+    cache: bool = True  # False: giải lại và ghi đè kết quả đã cache
+
+class CandidateReq(BaseModel):
+    ciphertext: str
+    k: int = Field(..., ge=0, le=25)
+    offset: int = Field(0, ge=0)
+    limit: Optional[int] = Field(None, ge=1)
+
+async def solve_text(text, top, view, preview_chars, use_cache=True):
+    params = {"top": top, "view": view, "previewChars": preview_chars}
+    if view == "slim":
+        # Kết quả cache chỉ chứa digest; ciphertext phải còn trong bộ nhớ để lấy các shift khác
+        remember(text)
+    return await cached_solve_async("caesar", params, text, lambda: offload(
+        "caesar.solve", solve_caesar, text, top, view, preview_chars), use_cache)
 
 @router.post("/bruteforce")
-def bruteforce(req: CaesarReq):
-    return solve_caesar(req.ciphertext)
+async def bruteforce(req: CaesarReq):
+    return await solve_text(req.ciphertext, req.top, req.view, req.previewChars, req.cache)
 
 @router.post("/upload")
-async def upload(file: UploadFile = File(...)):
+async def upload(
+    file: UploadFile = File(...),
+    top: Optional[int] = Form(None, ge=1, le=26),
+    view: Literal["full", "slim"] = Form("full"),
+    previewChars: int = Form(PREVIEW_CHARS, ge=0, le=10000),
+    cache: bool = Form(True)
+):
     content = (await file.read()).decode("utf-8", errors="ignore")
-    return solve_caesar(content)
+    return await solve_text(content, top, view, previewChars, cache)
+
+# Plaintext đầy đủ (hoặc từng trang) của một shift, lấy theo digest của lần giải "slim" trước đó
+@router.get("/candidates/{digest}/{k}")
+async def get_candidate(digest: str, k: int, offset: int = 0, limit: Optional[int] = None):
+    if not 0 <= k <= 25 or offset < 0 or (limit is not None and limit < 1):
+        raise HTTPException(status_code=400, detail="Invalid k, offset or limit")
+    try:
+        return await offload("caesar.candidate", candidate_text, digest, k, offset, limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Ciphertext expired or unknown; resend it to /candidate")
+
+# Giống trên nhưng gửi kèm ciphertext: tính lại khi digest đã hết hạn hoặc nằm ở worker khác
+@router.post("/candidate")
+async def post_candidate(req: CandidateReq):
+    return await offload("caesar.candidate", lambda: candidate_text(remember(req.ciphertext), req.k, req.offset, req.limit))
+
+# Solve jobs: POST /jobs, GET /jobs/{id}, GET /jobs/{id}/events, DELETE /jobs/{id}
+def run_solve_job(params, job):
+    job.check_cancelled()
+    return solve_caesar(params["ciphertext"], params["top"], params["view"], params["previewChars"],
+                        progress=job.progress)
+
+add_job_routes(router, "caesar", CaesarReq, run_solve_job)
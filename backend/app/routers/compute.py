@@ -0,0 +1,38 @@
+from contextlib import asynccontextmanager
+
+from fastapi import APIRouter, HTTPException
+
+from app.services.dispatch import Overloaded, dispatcher
+
+router = APIRouter(prefix="/api/compute", tags=["Compute"])
+
+
+def busy(error):
+    return HTTPException(status_code=503, detail=f"Server busy ({error.lane}), retry later",
+                         headers={"Retry-After": str(error.retry_after)})
+
+
+async def offload(lane, fn, *args, **kwargs):
+    """Run a blocking service call on the compute threads; 503 at once when the lane is full."""
+    try:
+        return await dispatcher.run(lane, fn, *args, **kwargs)
+    except Overloaded as e:
+        raise busy(e)
+
+
+@asynccontextmanager
+async def compute_slot(lane):
+    """Hold a lane slot around async work (e.g. a process-pool search); 503 when the lane is full."""
+    try:
+        admitted = dispatcher.admit(lane)
+    except Overloaded as e:
+        raise busy(e)
+    try:
+        yield
+    finally:
+        dispatcher.leave(admitted)
+
+
+@router.get("/stats")
+def compute_stats():
+    return dispatcher.stats()
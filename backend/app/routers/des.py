@@ -1,13 +1,22 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from pydantic import BaseModel
 import binascii
-from app.services.des_solver import encrypt, decrypt
+from app.services.des_solver import encrypt, decrypt, tdes_encrypt, tdes_decrypt, StreamCipher
+from app.routers.streaming import stream_response, encrypted_name, decrypted_name
+from app.routers.batch import BatchReq, run_batch_request
+from app.routers.compute import offload
 
 router = APIRouter(prefix="/api/des", tags=["DES"])
 
 def hx(b): return binascii.hexlify(b).decode()
 def bh(x): return binascii.unhexlify(x)
 
+def parse_hex(x, name):
+    try:
+        return bh(x)
+    except (binascii.Error, ValueError):
+        raise HTTPException(400, f"{name} must be valid hex")
+
 
 class EncryptReq(BaseModel):
     plaintext: str
@@ -24,16 +33,23 @@ class DecryptReq(BaseModel):
 
 
 @router.post("/encrypt")
-def des_encrypt(req: EncryptReq):
-    key = bh(req.keyHex)
-    iv = bh(req.ivHex) if req.ivHex else None
+async def des_encrypt(req: EncryptReq):
+    return await offload("des.encrypt", encrypt_request, req)
+
+
+def encrypt_request(req: EncryptReq):
+    key = parse_hex(req.keyHex, "keyHex")
+    iv = parse_hex(req.ivHex, "ivHex") if req.ivHex else None
 
-    ct, iv_out = encrypt(
-        req.plaintext.encode(),
-        key,
-        req.mode.upper(),
-        iv
-    )
+    try:
+        ct, iv_out = encrypt(
+            req.plaintext.encode(),
+            key,
+            req.mode.upper(),
+            iv
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
     return {
         "ciphertextHex": hx(ct),
@@ -42,17 +58,107 @@ def des_encrypt(req: EncryptReq):
 
 
 @router.post("/decrypt")
-def des_decrypt(req: DecryptReq):
-    key = bh(req.keyHex)
-    iv = bh(req.ivHex) if req.ivHex else None
+async def des_decrypt(req: DecryptReq):
+    return await offload("des.decrypt", decrypt_request, req)
+
+
+def decrypt_request(req: DecryptReq):
+    key = parse_hex(req.keyHex, "keyHex")
+    iv = parse_hex(req.ivHex, "ivHex") if req.ivHex else None
 
-    pt = decrypt(
-        bh(req.ciphertextHex),
-        key,
-        req.mode.upper(),
-        iv
-    )
+    try:
+        pt = decrypt(
+            parse_hex(req.ciphertextHex, "ciphertextHex"),
+            key,
+            req.mode.upper(),
+            iv
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
     return {
         "plaintext": pt.decode(errors="ignore")
     }
+
+
+# ===== Batch: nhiều bản ghi nhỏ trong một request, gom theo khóa =====
+@router.post("/batch")
+async def des_batch(req: BatchReq):
+    return await offload("des.batch", run_batch_request, "des", req, decode_errors="ignore")
+
+
+# ===== Triple DES (EDE2 với khóa 16 byte, EDE3 với khóa 24 byte) =====
+
+@router.post("/tdes/encrypt")
+async def tdes_encrypt_route(req: EncryptReq):
+    return await offload("tdes.encrypt", tdes_encrypt_request, req)
+
+
+def tdes_encrypt_request(req: EncryptReq):
+    key = parse_hex(req.keyHex, "keyHex")
+    iv = parse_hex(req.ivHex, "ivHex") if req.ivHex else None
+
+    try:
+        ct, iv_out = tdes_encrypt(req.plaintext.encode(), key, req.mode.upper(), iv)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    return {
+        "ciphertextHex": hx(ct),
+        "ivHex": hx(iv_out) if iv_out else None
+    }
+
+
+@router.post("/tdes/decrypt")
+async def tdes_decrypt_route(req: DecryptReq):
+    return await offload("tdes.decrypt", tdes_decrypt_request, req)
+
+
+def tdes_decrypt_request(req: DecryptReq):
+    key = parse_hex(req.keyHex, "keyHex")
+    iv = parse_hex(req.ivHex, "ivHex") if req.ivHex else None
+
+    try:
+        pt = tdes_decrypt(parse_hex(req.ciphertextHex, "ciphertextHex"), key, req.mode.upper(), iv)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    return {
+        "plaintext": pt.decode(errors="ignore")
+    }
+
+
+# Stream file nhị phân, IV trả về trong header X-IV
+def make_tdes_stream(keyHex, mode, ivHex, decrypting):
+    try:
+        return StreamCipher(
+            parse_hex(keyHex, "keyHex"),
+            mode.upper(),
+            parse_hex(ivHex, "ivHex") if ivHex else None,
+            decrypting=decrypting,
+            cipher="tdes"
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
+@router.post("/tdes/upload-stream")
+async def tdes_upload_encrypt_stream(
+    file: UploadFile = File(...),
+    keyHex: str = Form(...),
+    mode: str = Form(...),
+    ivHex: str | None = Form(None)
+):
+    cipher = make_tdes_stream(keyHex, mode, ivHex, decrypting=False)
+    return stream_response(file, cipher, encrypted_name(file.filename))
+
+
+@router.post("/tdes/upload-decrypt-stream")
+async def tdes_upload_decrypt_stream(
+    file: UploadFile = File(...),
+    keyHex: str = Form(...),
+    mode: str = Form(...),
+    ivHex: str | None = Form(None)
+):
+    cipher = make_tdes_stream(keyHex, mode, ivHex, decrypting=True)
+    return stream_response(file, cipher, decrypted_name(file.filename))
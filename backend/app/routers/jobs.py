@@ -0,0 +1,59 @@
+import json
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.services.jobs import QueueFull, job_manager
+
+
+def sse_message(event, data):
+    if event is None:
+        return ": keepalive\n\n"
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def add_job_routes(router, kind, request_model, runner):
+    """
+    Add /jobs endpoints for one solver to a router:
+      POST   /jobs               -> queue a job, returns its id
+      GET    /jobs/{id}          -> status, latest progress and result
+      GET    /jobs/{id}/events   -> Server-Sent Events (progress, done/error/cancelled)
+      DELETE /jobs/{id}          -> cancel
+    runner(params, job) runs on the job worker pool with params = request body as dict.
+    """
+    job_manager.register(kind, runner)
+
+    def find_job(job_id):
+        job = job_manager.get(job_id)
+        if job is None or job.kind != kind:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+
+    @router.post("/jobs", status_code=202)
+    def create_job(req: request_model):
+        try:
+            job = job_manager.submit(kind, req.model_dump())
+        except QueueFull:
+            raise HTTPException(status_code=503, detail="Solver queue is full, retry later",
+                                headers={"Retry-After": "5"})
+        return {"jobId": job.id, "status": job.status}
+
+    @router.get("/jobs/{job_id}")
+    def get_job(job_id: str):
+        return find_job(job_id).snapshot()
+
+    @router.get("/jobs/{job_id}/events")
+    async def job_events(job_id: str):
+        job = find_job(job_id)
+
+        async def events():
+            async for event, data in job.stream():
+                yield sse_message(event, data)
+
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    @router.delete("/jobs/{job_id}")
+    def cancel_job(job_id: str):
+        find_job(job_id)
+        return job_manager.cancel(job_id).snapshot()
@@ -0,0 +1,44 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.caesar_solver import ciphertexts
+from app.services.dispatch import dispatcher
+from app.utils.key_cache import key_schedules
+from app.utils.metrics import Counter, Gauge, registry, stats_metrics
+from app.utils.result_cache import result_cache
+
+router = APIRouter(tags=["Metrics"])
+
+
+def collect_caches():
+    results = result_cache.stats()
+    metrics = stats_metrics("key_cache", "AES/DES key schedule cache", key_schedules.stats())
+    metrics += stats_metrics("result_cache_memory", "Solver result cache, in-process tier", results["memory"])
+    if results["disk"] is not None:
+        metrics += stats_metrics("result_cache_disk", "Solver result cache, SQLite tier", results["disk"])
+    metrics += stats_metrics("caesar_text_cache", "Ciphertexts kept for Caesar shift fetches", ciphertexts.stats())
+    return metrics
+
+
+def collect_dispatcher():
+    stats = dispatcher.stats()
+    active = Gauge("compute_lane_active", "Calls running or waiting in a compute lane.", ("lane",))
+    limit = Gauge("compute_lane_limit", "Concurrent calls a compute lane admits.", ("lane",))
+    admitted = Counter("compute_lane_admitted_total", "Calls admitted to a compute lane.", ("lane",))
+    rejected = Counter("compute_lane_rejected_total", "Calls rejected with 503 by a compute lane.", ("lane",))
+    for name, lane in stats["lanes"].items():
+        active.set(lane["active"], lane=name)
+        limit.set(lane["limit"], lane=name)
+        admitted.inc(lane["admitted"], lane=name)
+        rejected.inc(lane["rejected"], lane=name)
+    return stats_metrics("compute", "Compute dispatcher", {"workers": stats["workers"], "active": stats["active"]}) + [
+        active, limit, admitted, rejected]
+
+
+registry.add_collector(collect_caches)
+registry.add_collector(collect_dispatcher)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,14 +1,23 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File
-from pydantic import BaseModel
-from typing import List, Dict, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, Literal, Optional
+import random
+import time
 
 # Import Class logic
 from app.services.mono_solver import MonoalphabeticAnalyzer
+from app.routers.cache import cached_solve_async
+from app.routers.compute import offload, compute_slot
+from app.services.dispatch import dispatcher
+from app.utils import profiling
+from app.utils.log import get_logger
+from app.routers.jobs import add_job_routes
 
 router = APIRouter(
     prefix="/mono",
     tags=["Monoalphabetic Substitution"]
 )
+log = get_logger(__name__)
 
 # --- Models ---
 class CiphertextRequest(BaseModel):
@@ -18,6 +27,31 @@ class MappingRequest(BaseModel):
     ciphertext: str
     mapping: Dict[str, str]
 
+class SolveRequest(CiphertextRequest):
+    restarts: int = Field(10, ge=1, le=500)
+    iterations: int = Field(2000, ge=1, le=100000)
+    seed: Optional[int] = None
+    parallel: bool = True  # chia restarts ra process pool
+    strategy: Literal["hillclimb", "anneal", "tempering"] = "hillclimb"
+    patience: Optional[int] = Field(None, ge=1)  # dừng sớm sau chừng ấy lượt không cải thiện score (mặc định: chạy hết iterations)
+    cache: bool = True  # False: giải lại và ghi đè kết quả đã cache; không truyền seed thì luôn giải mới, không cache
+
+# --- Helpers ---
+def key_to_mapping(key_list):
+    # List key -> Dict {'a':'x'} để trả về Frontend
+    return {chr(ord('a') + i): plain_char for i, plain_char in enumerate(key_list)}
+
+def solve_response(ciphertext, result, seed, strategy):
+    plaintext = MonoalphabeticAnalyzer.apply_mapping(ciphertext, result["key"])
+    return {
+        "mapping": key_to_mapping(result["key"]),
+        "plaintext": plaintext,
+        "score": MonoalphabeticAnalyzer.compute_score(plaintext),
+        "seed": seed,
+        "strategy": strategy,
+        "iterations": result["iterations"]
+    }
+
 # --- Endpoints ---
 
 @router.post("/uploadCiphertext")
@@ -39,18 +73,20 @@ async def get_statistics(req: CiphertextRequest):
     if not req.ciphertext:
         return []
     # Hàm này trả về List[Dict], Frontend sẽ nhận trực tiếp mảng này
-    stats = MonoalphabeticAnalyzer.get_letter_frequencies(req.ciphertext)
+    stats = await offload("mono.stats", MonoalphabeticAnalyzer.get_letter_frequencies, req.ciphertext)
     return stats
 
 @router.post("/initMapping")
 async def init_mapping(req: CiphertextRequest):
     if not req.ciphertext:
         raise HTTPException(status_code=400, detail="Ciphertext is empty")
-    
+    return await offload("mono.initMapping", initial_mapping, req)
+
+def initial_mapping(req: CiphertextRequest):
     try:
         MonoalphabeticAnalyzer.initialize_language_models()
     except Exception as e:
-        print(f"Model init warning: {e}")
+        log.warning("Model init failed", error=str(e))
 
     key_list = MonoalphabeticAnalyzer.build_initial_mapping_by_frequency(req.ciphertext)
     
@@ -71,57 +107,59 @@ async def init_mapping(req: CiphertextRequest):
     }
 
 @router.post("/autoSolve")
-async def auto_solve(req: CiphertextRequest):
+async def auto_solve(req: SolveRequest):
     if not req.ciphertext:
         raise HTTPException(status_code=400, detail="Ciphertext is empty")
 
     try:
-        # Add logging
-        print(f"Attempting to solve ciphertext of length: {len(req.ciphertext)}")
+        log.debug("autoSolve request", length=len(req.ciphertext), strategy=req.strategy,
+                  restarts=req.restarts, iterations=req.iterations)
         
-        # Initialize models
+        # Initialize models - lần đầu phải đọc model từ đĩa nên chạy trong compute thread
         try:
-            MonoalphabeticAnalyzer.initialize_language_models()
-            print("Language models initialized successfully")
+            await dispatcher.call(MonoalphabeticAnalyzer.initialize_language_models)
         except Exception as e:
-            print(f"Model initialization error: {e}")
+            log.exception("Model initialization failed")
             raise HTTPException(status_code=500, detail=f"Model init failed: {str(e)}")
         
-        # Solve
-        print("Starting solve process...")
-        best_key_list = MonoalphabeticAnalyzer.solve(
-            req.ciphertext, 
-            restarts=10, 
-            iterations=2000
-        )
-        print(f"Solve completed. Key: {best_key_list}")
-        
-        # Build mapping
-        mapping_dict = {}
-        base_a = ord('a')
-        for i, plain_char in enumerate(best_key_list):
-            cipher_char = chr(base_a + i)
-            mapping_dict[cipher_char] = plain_char
-
-        plaintext = MonoalphabeticAnalyzer.apply_mapping(req.ciphertext, best_key_list)
-        score = MonoalphabeticAnalyzer.compute_score(plaintext)
-
-        return {
-            "mapping": mapping_dict,
-            "plaintext": plaintext,
-            "score": score
-        }
+        # Solve - seed được trả về để có thể chạy lại cho cùng kết quả
+        async def compute():
+            seed = req.seed if req.seed is not None else random.getrandbits(32)
+            options = dict(
+                restarts=req.restarts,
+                iterations=req.iterations,
+                seed=seed,
+                strategy=req.strategy,
+                patience=req.patience
+            )
+            # Giữ một slot của lane trong suốt quá trình giải; phần tính toán chạy ngoài event loop
+            async with compute_slot("mono.autoSolve"):
+                # Request đang được profile: chạy trong compute thread để cProfile thấy phần tìm kiếm (cùng seed -> cùng kết quả)
+                if req.parallel and not profiling.active():
+                    result = await MonoalphabeticAnalyzer.search_parallel(req.ciphertext, **options)
+                else:
+                    result = await dispatcher.call(MonoalphabeticAnalyzer.search, req.ciphertext, **options)
+                log.info("autoSolve done", length=len(req.ciphertext), strategy=req.strategy,
+                         seed=seed, iterations=result["iterations"], score=round(result["score"], 4))
+                return await dispatcher.call(solve_response, req.ciphertext, result, seed, req.strategy)
+
+        # Không có seed: người dùng muốn một lần tìm ngẫu nhiên mới nên không đọc/ghi cache
+        if req.seed is None:
+            return await compute()
+        # Cùng ciphertext + tham số + seed trả lại kết quả đã cache; parallel không đổi kết quả
+        params = req.model_dump(exclude={"ciphertext", "cache", "parallel"})
+        return await cached_solve_async("mono", params, req.ciphertext, compute, req.cache)
     except HTTPException:
         raise
     except Exception as e:
-        # Log the full error
-        import traceback
-        print(f"Error in autoSolve: {str(e)}")
-        print(traceback.format_exc())
+        log.exception("autoSolve failed", length=len(req.ciphertext))
         raise HTTPException(status_code=500, detail=f"Solve failed: {str(e)}")
 
 @router.post("/applyMapping")
 async def apply_custom_mapping(req: MappingRequest):
+    return await offload("mono.applyMapping", mapping_response, req)
+
+def mapping_response(req: MappingRequest):
     # Convert Dict mapping từ Frontend thành List cho Backend xử lý
     key_list = ['?'] * 26
     base_a = ord('a')
@@ -144,4 +182,37 @@ async def apply_custom_mapping(req: MappingRequest):
     return {
         "plaintext": plaintext,
         "score": score
-    }
\ No newline at end of file
+    }
+
+# --- Solve jobs (POST /mono/jobs, GET /mono/jobs/{id}/events, ...) ---
+# Job chạy tuần tự các restart trên worker của job (bỏ qua "parallel") để gửi được progress
+def run_solve_job(params, job, min_interval=0.2):
+    if not params["ciphertext"]:
+        raise ValueError("Ciphertext is empty")
+
+    seed = params["seed"] if params["seed"] is not None else random.getrandbits(32)
+    best = {"score": float('-inf'), "sent": 0.0}
+
+    def progress(restart, evaluations, score, key):
+        job.check_cancelled()
+        now = time.monotonic()
+        # Chỉ gửi khi tốt hơn best hiện tại, tối đa 1 lần / min_interval giây
+        if score > best["score"]:
+            best["score"] = score
+            if now - best["sent"] >= min_interval:
+                best["sent"] = now
+                job.progress(restart=restart, iteration=evaluations, score=score,
+                             key="".join(key), mapping=key_to_mapping(key))
+
+    result = MonoalphabeticAnalyzer.search(
+        params["ciphertext"],
+        restarts=params["restarts"],
+        iterations=params["iterations"],
+        seed=seed,
+        strategy=params["strategy"],
+        patience=params["patience"],
+        progress=progress
+    )
+    return solve_response(params["ciphertext"], result, seed, params["strategy"])
+
+add_job_routes(router, "mono", SolveRequest, run_solve_job)
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+
+from app.utils import profiling
+from app.utils.profiling import profiles
+
+
+def require_token(x_profile_token: str | None = Header(None), authorization: str | None = Header(None)):
+    """Profiles expose code paths and timings, so every route needs PROFILE_TOKEN."""
+    if not profiling.enabled():
+        raise HTTPException(404, "Profiling is disabled (PROFILE_TOKEN is not set)")
+    if not profiling.token_matches(profiling.request_token(x_profile_token, authorization)):
+        raise HTTPException(401, "Invalid profile token")
+
+
+router = APIRouter(prefix="/api/profiles", tags=["Profiles"], dependencies=[Depends(require_token)])
+
+SORT_KEYS = ("cumulative", "tottime", "calls", "ncalls", "time")
+
+
+def find(profile_id):
+    profile = profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(404, "Profile not found (it may have been dropped from the ring)")
+    return profile
+
+
+@router.get("")
+def list_profiles():
+    return {
+        "keep": profiling.PROFILE_KEEP,
+        "rate": profiling.PROFILE_RATE,
+        "profiles": profiles.list(),
+    }
+
+
+@router.get("/{profile_id}")
+def download_profile(profile_id: str):
+    """The raw pstats dump, for pstats.Stats(path), snakeviz or similar tools."""
+    profile = find(profile_id)
+    return Response(profile.data, media_type="application/octet-stream",
+                    headers={"Content-Disposition": f'attachment; filename="profile-{profile.id}.prof"'})
+
+
+@router.get("/{profile_id}/text", response_class=PlainTextResponse)
+def profile_text(profile_id: str, sort: str = Query("cumulative"), limit: int = Query(60, ge=1, le=1000)):
+    if sort not in SORT_KEYS:
+        raise HTTPException(400, f"sort must be one of {', '.join(SORT_KEYS)}")
+    return find(profile_id).text(sort, limit)
+
+
+@router.delete("")
+def clear_profiles():
+    profiles.clear()
+    return {"cleared": True}
@@ -0,0 +1,51 @@
+import binascii
+import os
+
+from fastapi.responses import Response, StreamingResponse
+
+from app.services.dispatch import dispatcher
+
+# Bytes read from an upload per cipher update
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", 64 * 1024))
+
+
+async def stream_file(file, cipher):
+    """
+    Feed an UploadFile through a stream cipher (update/finalize/close) chunk by
+    chunk on the compute threads. A padding error in the last block can only abort
+    the response: the 200 status has already been sent by then.
+    """
+    try:
+        while chunk := await file.read(STREAM_CHUNK_SIZE):
+            out = await dispatcher.call(cipher.update, chunk)
+            if out:
+                yield out
+        yield await dispatcher.call(cipher.finalize)
+    finally:
+        cipher.close()
+        await file.close()
+
+
+def stream_response(file, cipher, filename):
+    """Binary download of the processed upload; the IV travels in the X-IV header."""
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if cipher.iv:
+        headers["X-IV"] = binascii.hexlify(cipher.iv).decode()
+    return StreamingResponse(stream_file(file, cipher), media_type="application/octet-stream", headers=headers)
+
+
+def binary_response(data, iv=None, filename=None):
+    """Raw bytes instead of hex/base64 JSON, with the same X-IV / Content-Disposition headers as stream_response."""
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'} if filename else {}
+    if iv:
+        headers["X-IV"] = binascii.hexlify(iv).decode()
+    return Response(data, media_type="application/octet-stream", headers=headers)
+
+
+def encrypted_name(filename):
+    return f"{filename or 'file'}.enc"
+
+
+def decrypted_name(filename):
+    name = filename or "file"
+    return name[:-4] if name.endswith(".enc") else f"{name}.dec"
@@ -1,17 +1,44 @@
-from fastapi import APIRouter, UploadFile, File
-from pydantic import BaseModel
-from app.services.vigenere_solver import solve_vigenere as solve
+from fastapi import APIRouter, UploadFile, File, Form
+from pydantic import BaseModel, Field
+from app.services.vigenere_solver import solve_vigenere as solve, REFINE_BUDGET
+from app.routers.cache import cached_solve_async
+from app.routers.compute import offload
+from app.routers.jobs import add_job_routes
 
 router = APIRouter(prefix="/api/vigenere", tags=["Vigenere"])
 
 class VigenereReq(BaseModel):
     ciphertext: str
+    maxKeyLen: int = Field(20, ge=1, le=300)  # độ dài khóa lớn nhất được thử
+    top: int = Field(5, ge=1, le=20)  # số độ dài khóa tốt nhất được giải và trả về
+    refine: bool = False  # tinh chỉnh khóa bằng quadgram (hữu ích với bản mã ngắn)
+    refineBudget: float = Field(REFINE_BUDGET, gt=0, le=30)  # giây, chia đều cho các ứng viên
+    cache: bool = True  # False: giải lại và ghi đè kết quả đã cache
+
+async def solve_text(text, params, use_cache=True):
+    return await cached_solve_async("vigenere", params, text, lambda: offload(
+        "vigenere.solve", solve, text, params["maxKeyLen"], params["top"], params["refine"], params["refineBudget"]),
+        use_cache)
 
 @router.post("/solve")
-def solve_cipher(req: VigenereReq):
-    return solve(req.ciphertext)
+async def solve_cipher(req: VigenereReq):
+    return await solve_text(req.ciphertext, req.model_dump(exclude={"ciphertext", "cache"}), req.cache)
 
 @router.post("/upload")
-async def upload_cipher(file: UploadFile = File(...)):
+async def upload_cipher(
+    file: UploadFile = File(...),
+    maxKeyLen: int = Form(20, ge=1, le=300),
+    top: int = Form(5, ge=1, le=20),
+    cache: bool = Form(True)
+):
     text = (await file.read()).decode("utf-8", errors="ignore")
-    return solve(text)
\ No newline at end of file
+    params = {"maxKeyLen": maxKeyLen, "top": top, "refine": False, "refineBudget": REFINE_BUDGET}
+    return await solve_text(text, params, cache)
+
+# Solve jobs: POST /jobs, GET /jobs/{id}, GET /jobs/{id}/events, DELETE /jobs/{id}
+def run_solve_job(params, job):
+    job.check_cancelled()
+    return solve(params["ciphertext"], params["maxKeyLen"], params["top"],
+                 params["refine"], params["refineBudget"], progress=job.progress)
+
+add_job_routes(router, "vigenere", VigenereReq, run_solve_job)
@@ -1,4 +1,11 @@
+import hmac
 import os
+import time
+from contextlib import contextmanager
+from concurrent.futures.process import BrokenProcessPool
+
+from app.utils import metrics, pools
+from app.utils.key_cache import key_schedules
 
 S_BOX = [
     0x63, 0x7c, 0x77, 0x7b, 0xf2, 0x6b, 0x6f, 0xc5, 0x30, 0x01, 0x67, 0x2b, 0xfe, 0xd7, 0xab, 0x76,
@@ -135,6 +142,129 @@ def aes_decrypt_block(block, round_keys):
     
     return bytes(state)
 
+# ===== T-table engine =====
+# Te0[x] is the MixColumns column of S(x) as one big-endian word (2s, s, s, 3s);
+# Te1..Te3 are its byte rotations. Td* are the same for the inverse cipher
+# (14s, 9s, 13s, 11s with the inverse S-box).
+
+def _ror8(w):
+    return ((w >> 8) | (w << 24)) & 0xFFFFFFFF
+
+def _build_tables(box, coeffs):
+    t0 = [(gmul(box[x], coeffs[0]) << 24) | (gmul(box[x], coeffs[1]) << 16) |
+          (gmul(box[x], coeffs[2]) << 8) | gmul(box[x], coeffs[3]) for x in range(256)]
+    t1 = [_ror8(w) for w in t0]
+    t2 = [_ror8(w) for w in t1]
+    t3 = [_ror8(w) for w in t2]
+    return t0, t1, t2, t3
+
+TE0, TE1, TE2, TE3 = _build_tables(S_BOX, (2, 1, 1, 3))
+TD0, TD1, TD2, TD3 = _build_tables(INV_S_BOX, (14, 9, 13, 11))
+
+def key_expansion_words(key):
+    """Encryption round keys as 4 * (Nr + 1) 32-bit words."""
+    return [int.from_bytes(bytes(rk[j:j + 4]), "big") for rk in key_expansion(key) for j in range(0, 16, 4)]
+
+def inv_key_expansion_words(key):
+    """Round keys for the equivalent inverse cipher: reversed, with InvMixColumns on rounds 1..Nr-1."""
+    w = key_expansion_words(key)
+    Nr = len(w) // 4 - 1
+    out = []
+    for r in range(Nr, -1, -1):
+        for word in w[4 * r:4 * r + 4]:
+            if 0 < r < Nr:
+                word = (TD0[S_BOX[word >> 24]] ^ TD1[S_BOX[(word >> 16) & 0xFF]] ^
+                        TD2[S_BOX[(word >> 8) & 0xFF]] ^ TD3[S_BOX[word & 0xFF]])
+            out.append(word)
+    return out
+
+def aes_encrypt_block_fast(block, rk):
+    Nr = len(rk) // 4 - 1
+    s0 = int.from_bytes(block[0:4], "big") ^ rk[0]
+    s1 = int.from_bytes(block[4:8], "big") ^ rk[1]
+    s2 = int.from_bytes(block[8:12], "big") ^ rk[2]
+    s3 = int.from_bytes(block[12:16], "big") ^ rk[3]
+
+    for i in range(4, 4 * Nr, 4):
+        s0, s1, s2, s3 = (
+            TE0[s0 >> 24] ^ TE1[(s1 >> 16) & 0xFF] ^ TE2[(s2 >> 8) & 0xFF] ^ TE3[s3 & 0xFF] ^ rk[i],
+            TE0[s1 >> 24] ^ TE1[(s2 >> 16) & 0xFF] ^ TE2[(s3 >> 8) & 0xFF] ^ TE3[s0 & 0xFF] ^ rk[i + 1],
+            TE0[s2 >> 24] ^ TE1[(s3 >> 16) & 0xFF] ^ TE2[(s0 >> 8) & 0xFF] ^ TE3[s1 & 0xFF] ^ rk[i + 2],
+            TE0[s3 >> 24] ^ TE1[(s0 >> 16) & 0xFF] ^ TE2[(s1 >> 8) & 0xFF] ^ TE3[s2 & 0xFF] ^ rk[i + 3],
+        )
+
+    S = S_BOX
+    i = 4 * Nr
+    return b"".join((
+        ((S[s0 >> 24] << 24 | S[(s1 >> 16) & 0xFF] << 16 | S[(s2 >> 8) & 0xFF] << 8 | S[s3 & 0xFF]) ^ rk[i]).to_bytes(4, "big"),
+        ((S[s1 >> 24] << 24 | S[(s2 >> 16) & 0xFF] << 16 | S[(s3 >> 8) & 0xFF] << 8 | S[s0 & 0xFF]) ^ rk[i + 1]).to_bytes(4, "big"),
+        ((S[s2 >> 24] << 24 | S[(s3 >> 16) & 0xFF] << 16 | S[(s0 >> 8) & 0xFF] << 8 | S[s1 & 0xFF]) ^ rk[i + 2]).to_bytes(4, "big"),
+        ((S[s3 >> 24] << 24 | S[(s0 >> 16) & 0xFF] << 16 | S[(s1 >> 8) & 0xFF] << 8 | S[s2 & 0xFF]) ^ rk[i + 3]).to_bytes(4, "big"),
+    ))
+
+def aes_decrypt_block_fast(block, drk):
+    Nr = len(drk) // 4 - 1
+    s0 = int.from_bytes(block[0:4], "big") ^ drk[0]
+    s1 = int.from_bytes(block[4:8], "big") ^ drk[1]
+    s2 = int.from_bytes(block[8:12], "big") ^ drk[2]
+    s3 = int.from_bytes(block[12:16], "big") ^ drk[3]
+
+    for i in range(4, 4 * Nr, 4):
+        s0, s1, s2, s3 = (
+            TD0[s0 >> 24] ^ TD1[(s3 >> 16) & 0xFF] ^ TD2[(s2 >> 8) & 0xFF] ^ TD3[s1 & 0xFF] ^ drk[i],
+            TD0[s1 >> 24] ^ TD1[(s0 >> 16) & 0xFF] ^ TD2[(s3 >> 8) & 0xFF] ^ TD3[s2 & 0xFF] ^ drk[i + 1],
+            TD0[s2 >> 24] ^ TD1[(s1 >> 16) & 0xFF] ^ TD2[(s0 >> 8) & 0xFF] ^ TD3[s3 & 0xFF] ^ drk[i + 2],
+            TD0[s3 >> 24] ^ TD1[(s2 >> 16) & 0xFF] ^ TD2[(s1 >> 8) & 0xFF] ^ TD3[s0 & 0xFF] ^ drk[i + 3],
+        )
+
+    Si = INV_S_BOX
+    i = 4 * Nr
+    return b"".join((
+        ((Si[s0 >> 24] << 24 | Si[(s3 >> 16) & 0xFF] << 16 | Si[(s2 >> 8) & 0xFF] << 8 | Si[s1 & 0xFF]) ^ drk[i]).to_bytes(4, "big"),
+        ((Si[s1 >> 24] << 24 | Si[(s0 >> 16) & 0xFF] << 16 | Si[(s3 >> 8) & 0xFF] << 8 | Si[s2 & 0xFF]) ^ drk[i + 1]).to_bytes(4, "big"),
+        ((Si[s2 >> 24] << 24 | Si[(s1 >> 16) & 0xFF] << 16 | Si[(s0 >> 8) & 0xFF] << 8 | Si[s3 & 0xFF]) ^ drk[i + 2]).to_bytes(4, "big"),
+        ((Si[s3 >> 24] << 24 | Si[(s2 >> 16) & 0xFF] << 16 | Si[(s1 >> 8) & 0xFF] << 8 | Si[s0 & 0xFF]) ^ drk[i + 3]).to_bytes(4, "big"),
+    ))
+
+# ===== Engine selection =====
+# An engine is (build_schedule(key), make_blocks(schedule)); make_blocks returns
+# (encrypt_block, decrypt_block) on 16-byte blocks, bound to the schedule.
+
+def reference_engine(round_keys):
+    return (lambda block: aes_encrypt_block(block, round_keys),
+            lambda block: aes_decrypt_block(block, round_keys))
+
+def ttable_schedule(key):
+    return key_expansion_words(key), inv_key_expansion_words(key)
+
+def ttable_engine(schedule):
+    rk, drk = schedule
+    return (lambda block: aes_encrypt_block_fast(block, rk),
+            lambda block: aes_decrypt_block_fast(block, drk))
+
+ENGINES = {
+    "reference": (key_expansion, reference_engine),
+    "ttable": (ttable_schedule, ttable_engine),
+}
+DEFAULT_ENGINE = "ttable"
+
+def _engine(engine):
+    if engine not in ENGINES:
+        raise ValueError(f"Unsupported engine: {engine}")
+    return ENGINES[engine]
+
+def get_engine(key, engine=DEFAULT_ENGINE):
+    """(encrypt_block, decrypt_block) with a freshly expanded key schedule."""
+    build, make = _engine(engine)
+    return make(build(key))
+
+@contextmanager
+def cached_engine(key, engine=DEFAULT_ENGINE):
+    """Like get_engine, with the schedule leased from the shared key schedule cache."""
+    build, make = _engine(engine)
+    with key_schedules.lease(f"aes-{engine}", key, build) as schedule:
+        yield make(schedule)
+
 def pad(data):
     padding_len = 16 - (len(data) % 16)
     return data + bytes([padding_len] * padding_len)
@@ -156,19 +286,171 @@ def unpad(data):
     
     return data[:-padding_len]
 
-def encrypt(plaintext, key, mode, iv=None):
+# ===== Block modes =====
+# Mode loops write into one preallocated bytearray and read blocks through a
+# memoryview, so their cost stays linear in the payload size.
+
+def _ecb(block_fn, data):
+    data = memoryview(data)
+    out = bytearray(len(data))
+    for i in range(0, len(data), 16):
+        out[i:i + 16] = block_fn(data[i:i + 16])
+    return bytes(out)
+
+def _cbc_encrypt(encrypt_block, iv, data):
+    data = memoryview(data)
+    out = bytearray(len(data))
+    prev = int.from_bytes(iv, "big")
+    for i in range(0, len(data), 16):
+        # XOR with previous ciphertext (or IV) as one 128-bit integer
+        encrypted = encrypt_block((int.from_bytes(data[i:i + 16], "big") ^ prev).to_bytes(16, "big"))
+        out[i:i + 16] = encrypted
+        prev = int.from_bytes(encrypted, "big")
+    return bytes(out)
+
+def _cbc_decrypt_blocks(decrypt_block, iv, data):
+    data = memoryview(data)
+    out = bytearray(len(data))
+    prev = int.from_bytes(iv, "big")
+    for i in range(0, len(data), 16):
+        block = data[i:i + 16]
+        out[i:i + 16] = (int.from_bytes(decrypt_block(block), "big") ^ prev).to_bytes(16, "big")
+        prev = int.from_bytes(block, "big")
+    return bytes(out)
+
+# ===== Counter modes and GHASH =====
+
+def _counter_block(counter, index, inc32=False):
+    # CTR increments the whole 128-bit block, GCM only its low 32 bits
+    if inc32:
+        return (counter & ~0xFFFFFFFF) | ((counter + index) & 0xFFFFFFFF)
+    return (counter + index) & ((1 << 128) - 1)
+
+def ctr_xor(encrypt_block, counter, data, first_block=0, inc32=False):
+    """XOR data with the keystream E(counter + first_block), E(counter + first_block + 1), ..."""
+    data = memoryview(data)
+    out = bytearray(len(data))
+    for i in range(0, len(data), 16):
+        chunk = data[i:i + 16]
+        n = len(chunk)
+        keystream = encrypt_block(_counter_block(counter, first_block + i // 16, inc32).to_bytes(16, "big"))
+        out[i:i + n] = (int.from_bytes(chunk, "big") ^ int.from_bytes(keystream[:n], "big")).to_bytes(n, "big")
+    return bytes(out)
+
+_GCM_R = 0xE1 << 120
+
+def ghash_tables(h):
+    """
+    Byte tables for multiplying by H in GF(2^128): table[j][b] is the product
+    of H with byte b at position j of a block, so X*H is 16 lookups and XORs.
+    """
+    powers = []
+    v = int.from_bytes(h, "big")
+    for _ in range(128):
+        powers.append(v)
+        v = (v >> 1) ^ _GCM_R if v & 1 else v >> 1
+
+    tables = []
+    for j in range(16):
+        row = [0] * 256
+        for bit in range(8):
+            row[0x80 >> bit] = powers[8 * j + bit]
+        for b in range(1, 256):
+            low = b & -b
+            if b != low:
+                row[b] = row[b ^ low] ^ row[low]
+        tables.append(row)
+    return tables
+
+def ghash(tables, aad, ciphertext):
+    y = 0
+    for data in (aad, ciphertext):
+        for i in range(0, len(data), 16):
+            x = y ^ int.from_bytes(data[i:i + 16].ljust(16, b"\0"), "big")
+            y = 0
+            for j in range(16):
+                y ^= tables[j][(x >> (120 - 8 * j)) & 0xFF]
+    x = y ^ ((len(aad) * 8) << 64 | len(ciphertext) * 8)
+    y = 0
+    for j in range(16):
+        y ^= tables[j][(x >> (120 - 8 * j)) & 0xFF]
+    return y
+
+def _gcm_setup(encrypt_block, iv):
+    tables = ghash_tables(encrypt_block(bytes(16)))
+    if len(iv) == 12:
+        j0 = int.from_bytes(iv + b"\0\0\0\1", "big")
+    else:
+        j0 = ghash(tables, b"", iv)
+    return tables, j0
+
+def _gcm_tag(encrypt_block, tables, j0, aad, ciphertext):
+    s = ghash(tables, aad, ciphertext)
+    return (s ^ int.from_bytes(encrypt_block(j0.to_bytes(16, "big")), "big")).to_bytes(16, "big")
+
+# ===== Parallel chunk processing =====
+# Payloads of at least PARALLEL_THRESHOLD bytes in CTR/GCM and CBC decryption are
+# split into CHUNK_SIZE pieces and processed on a process pool of WORKERS processes.
+
+PARALLEL_THRESHOLD = int(os.environ.get("AES_PARALLEL_THRESHOLD", 1 << 20))
+CHUNK_SIZE = int(os.environ.get("AES_CHUNK_SIZE", 256 << 10))
+WORKERS = int(os.environ.get("AES_WORKERS", os.cpu_count() or 1))
+
+def _ctr_chunk(key, engine, counter, first_block, data, inc32):
+    with cached_engine(key, engine) as (encrypt_block, _):
+        return ctr_xor(encrypt_block, counter, data, first_block, inc32)
+
+def _cbc_decrypt_chunk(key, engine, prev, data):
+    with cached_engine(key, engine) as (_, decrypt_block):
+        return _cbc_decrypt_blocks(decrypt_block, prev, data)
+
+def _parallel_pool(data):
+    if len(data) < PARALLEL_THRESHOLD or len(data) <= CHUNK_SIZE:
+        return None
+    return pools.get_process_pool("aes", WORKERS)
+
+def _run_chunks(pool, fn, jobs):
+    try:
+        return b"".join(pool.map(fn, *zip(*jobs)))
+    except BrokenProcessPool:
+        pools.reset_process_pool("aes")
+        raise
+
+def _ctr(key, engine, encrypt_block, counter, data, inc32=False):
+    pool = _parallel_pool(data)
+    if pool is None:
+        return ctr_xor(encrypt_block, counter, data, 0, inc32)
+    chunk = CHUNK_SIZE - CHUNK_SIZE % 16
+    return _run_chunks(pool, _ctr_chunk, [
+        (key, engine, counter, i // 16, data[i:i + chunk], inc32) for i in range(0, len(data), chunk)
+    ])
+
+def _cbc_decrypt(key, engine, decrypt_block, iv, data):
+    pool = _parallel_pool(data)
+    if pool is None:
+        return _cbc_decrypt_blocks(decrypt_block, iv, data)
+    chunk = CHUNK_SIZE - CHUNK_SIZE % 16
+    return _run_chunks(pool, _cbc_decrypt_chunk, [
+        (key, engine, data[i - 16:i] if i else iv, data[i:i + chunk]) for i in range(0, len(data), chunk)
+    ])
+
+def encrypt(plaintext, key, mode, iv=None, engine=DEFAULT_ENGINE, aad=b""):
+    """
+    Returns (ciphertext, iv). GCM appends its 16-byte tag to the ciphertext;
+    CTR and GCM are not padded.
+    """
     if len(key) not in (16, 24, 32):
         raise ValueError("Key must be 16, 24, or 32 bytes")
     
-    round_keys = key_expansion(key)
-    padded = pad(plaintext)
-    ciphertext = b""
-    
+    started = time.perf_counter()
+    with cached_engine(key, engine) as (encrypt_block, _):
+        result = _encrypt(encrypt_block, plaintext, key, mode, iv, engine, aad)
+    metrics.record_cipher("aes", "encrypt", len(plaintext), started)
+    return result
+
+def _encrypt(encrypt_block, plaintext, key, mode, iv, engine, aad):
     if mode == "ECB":
-        for i in range(0, len(padded), 16):
-            block = padded[i:i + 16]
-            ciphertext += aes_encrypt_block(block, round_keys)
-        return ciphertext, None
+        return _ecb(encrypt_block, pad(plaintext)), None
     
     elif mode == "CBC":
         if iv is None:
@@ -176,23 +458,56 @@ def encrypt(plaintext, key, mode, iv=None):
         if len(iv) != 16:
             raise ValueError("IV must be 16 bytes")
         
-        prev = iv
-        for i in range(0, len(padded), 16):
-            block = padded[i:i + 16]
-            # XOR with previous ciphertext (or IV)
-            xored = bytes(a ^ b for a, b in zip(block, prev))
-            encrypted = aes_encrypt_block(xored, round_keys)
-            ciphertext += encrypted
-            prev = encrypted
-        
-        return ciphertext, iv
+        return _cbc_encrypt(encrypt_block, iv, pad(plaintext)), iv
+
+    elif mode == "CTR":
+        if iv is None:
+            iv = os.urandom(16)
+        if len(iv) != 16:
+            raise ValueError("IV (initial counter block) must be 16 bytes")
+
+        return _ctr(key, engine, encrypt_block, int.from_bytes(iv, "big"), plaintext), iv
+
+    elif mode == "GCM":
+        if iv is None:
+            iv = os.urandom(12)
+        if len(iv) == 0:
+            raise ValueError("IV cannot be empty")
+
+        tables, j0 = _gcm_setup(encrypt_block, iv)
+        ciphertext = _ctr(key, engine, encrypt_block, _counter_block(j0, 1, True), plaintext, inc32=True) if plaintext else b""
+        return ciphertext + _gcm_tag(encrypt_block, tables, j0, aad, ciphertext), iv
     
     else:
         raise ValueError(f"Unsupported mode: {mode}")
 
-def decrypt(ciphertext, key, mode, iv=None):
+def decrypt(ciphertext, key, mode, iv=None, engine=DEFAULT_ENGINE, aad=b""):
     if len(key) not in (16, 24, 32):
         raise ValueError("Key must be 16, 24, or 32 bytes")
+
+    started = time.perf_counter()
+    with cached_engine(key, engine) as (encrypt_block, decrypt_block):
+        result = _decrypt(encrypt_block, decrypt_block, ciphertext, key, mode, iv, engine, aad)
+    metrics.record_cipher("aes", "decrypt", len(ciphertext), started)
+    return result
+
+def _decrypt(encrypt_block, decrypt_block, ciphertext, key, mode, iv, engine, aad):
+    if mode == "CTR":
+        if iv is None or len(iv) != 16:
+            raise ValueError("IV (initial counter block) of 16 bytes required for CTR mode")
+        return _ctr(key, engine, encrypt_block, int.from_bytes(iv, "big"), ciphertext)
+
+    if mode == "GCM":
+        if not iv:
+            raise ValueError("IV required for GCM mode")
+        if len(ciphertext) < 16:
+            raise ValueError("Ciphertext too short for GCM tag")
+
+        body, tag = ciphertext[:-16], ciphertext[-16:]
+        tables, j0 = _gcm_setup(encrypt_block, iv)
+        if not hmac.compare_digest(tag, _gcm_tag(encrypt_block, tables, j0, aad, body)):
+            raise ValueError("Authentication failed: GCM tag mismatch")
+        return _ctr(key, engine, encrypt_block, _counter_block(j0, 1, True), body, inc32=True) if body else b""
     
     if len(ciphertext) % 16 != 0:
         raise ValueError("Ciphertext length must be a multiple of 16")
@@ -200,14 +515,8 @@ def decrypt(ciphertext, key, mode, iv=None):
     if len(ciphertext) == 0:
         raise ValueError("Ciphertext cannot be empty")
     
-    round_keys = key_expansion(key)
-    plaintext = b""
-    
     if mode == "ECB": 
-        for i in range(0, len(ciphertext), 16):
-            block = ciphertext[i:i + 16]
-            plaintext += aes_decrypt_block(block, round_keys)
-        return unpad(plaintext)
+        return unpad(_ecb(decrypt_block, ciphertext))
     
     elif mode == "CBC": 
         if iv is None:
@@ -215,14 +524,115 @@ def decrypt(ciphertext, key, mode, iv=None):
         if len(iv) != 16:
             raise ValueError("IV must be 16 bytes")
         
-        prev = iv
-        for i in range(0, len(ciphertext), 16):
-            block = ciphertext[i: i + 16]
-            decrypted = aes_decrypt_block(block, round_keys)
-            plaintext += bytes(a ^ b for a, b in zip(decrypted, prev))
-            prev = block
-        
-        return unpad(plaintext)
+        return unpad(_cbc_decrypt(key, engine, decrypt_block, iv, ciphertext))
     
     else:
-        raise ValueError(f"Unsupported mode: {mode}") 
\ No newline at end of file
+        raise ValueError(f"Unsupported mode: {mode}")
+
+
+def batch_group(key, items, engine=DEFAULT_ENGINE):
+    """
+    Run many small (index, op, data, mode, iv, aad) items that share one key,
+    leasing its schedule once. Returns (index, output, iv, error) tuples;
+    a failing item reports its error without stopping the others.
+    """
+    if len(key) not in (16, 24, 32):
+        return [(item[0], None, None, "Key must be 16, 24, or 32 bytes") for item in items]
+
+    results = []
+    with cached_engine(key, engine) as (encrypt_block, decrypt_block):
+        for index, op, data, mode, iv, aad in items:
+            try:
+                if op == "encrypt":
+                    output, iv = _encrypt(encrypt_block, data, key, mode, iv, engine, aad)
+                else:
+                    output = _decrypt(encrypt_block, decrypt_block, data, key, mode, iv, engine, aad)
+                results.append((index, output, iv, None))
+            except ValueError as e:
+                results.append((index, None, None, str(e)))
+    return results
+
+class StreamCipher:
+    """
+    Incremental ECB/CBC/CTR for payloads that arrive in pieces. update()
+    returns whatever output is ready and keeps the chaining state (previous
+    ciphertext block or counter) for the next piece; finalize() handles
+    padding. Memory use is bounded by the piece size, not the payload.
+
+    GCM is not offered: streaming decryption would release plaintext before
+    the tag has been checked.
+    """
+
+    MODES = ("ECB", "CBC", "CTR")
+
+    def __init__(self, key, mode, iv=None, decrypting=False, engine=DEFAULT_ENGINE):
+        if len(key) not in (16, 24, 32):
+            raise ValueError("Key must be 16, 24, or 32 bytes")
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported streaming mode: {mode}")
+        if mode == "ECB":
+            iv = None
+        elif iv is None:
+            if decrypting:
+                raise ValueError(f"IV required for {mode} mode")
+            iv = os.urandom(16)
+        if iv is not None and len(iv) != 16:
+            raise ValueError("IV must be 16 bytes")
+
+        self.mode = mode
+        self.iv = iv
+        self.decrypting = decrypting
+        build, make = _engine(engine)
+        self._lease, schedule = key_schedules.acquire(f"aes-{engine}", key, build)
+        self._encrypt_block, self._decrypt_block = make(schedule)
+        self._pending = bytearray()
+        self._prev = iv
+        self._counter = int.from_bytes(iv, "big") if mode == "CTR" else 0
+        self._blocks = 0
+
+    def _process(self, data):
+        if self.mode == "CTR":
+            out = ctr_xor(self._encrypt_block, self._counter, data, self._blocks)
+            self._blocks += len(data) // 16
+            return out
+        if self.mode == "ECB":
+            return _ecb(self._decrypt_block if self.decrypting else self._encrypt_block, data)
+        if self.decrypting:
+            out = _cbc_decrypt_blocks(self._decrypt_block, self._prev, data)
+            self._prev = bytes(data[-16:])
+        else:
+            out = _cbc_encrypt(self._encrypt_block, self._prev, data)
+            self._prev = out[-16:]
+        return out
+
+    def update(self, data):
+        self._pending += data
+        ready = len(self._pending) - len(self._pending) % 16
+        if self.decrypting and self.mode != "CTR" and ready == len(self._pending):
+            # Hold back the last full block; it carries the padding
+            ready -= 16
+        if ready <= 0:
+            return b""
+        started = time.perf_counter()
+        out = self._process(memoryview(self._pending)[:ready])
+        del self._pending[:ready]
+        metrics.record_cipher("aes", "decrypt" if self.decrypting else "encrypt", ready, started)
+        return out
+
+    def finalize(self):
+        try:
+            data, self._pending = bytes(self._pending), bytearray()
+            if self.mode == "CTR":
+                return ctr_xor(self._encrypt_block, self._counter, data, self._blocks) if data else b""
+            if not self.decrypting:
+                return self._process(pad(data))
+            if len(data) != 16:
+                raise ValueError("Ciphertext length must be a multiple of 16")
+            return unpad(self._process(data))
+        finally:
+            self.close()
+
+    def close(self):
+        """Return the leased key schedule to the cache; finalize() calls this."""
+        key_schedules.release(self._lease)
+        self._lease = None
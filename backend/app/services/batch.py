@@ -0,0 +1,56 @@
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+from app.services import aes_solver, des_solver
+from app.utils import metrics, pools
+
+# Items per request, and when a batch is worth splitting across processes
+MAX_BATCH_ITEMS = int(os.environ.get("MAX_BATCH_ITEMS", 10000))
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", os.cpu_count() or 1))
+BATCH_SHARD_MIN = int(os.environ.get("BATCH_SHARD_MIN", 500))
+
+GROUP_RUNNERS = {
+    "aes": aes_solver.batch_group,
+    "des": des_solver.batch_group,
+}
+
+
+def _run_shard(cipher, items):
+    """Run items sorted by key, one batch_group call (and key schedule) per key."""
+    run_group = GROUP_RUNNERS[cipher]
+    results = []
+    start = 0
+    for i in range(1, len(items) + 1):
+        if i == len(items) or items[i][1] != items[start][1]:
+            key = items[start][1]
+            results.extend(run_group(key, [(index, *rest) for index, _, *rest in items[start:i]]))
+            start = i
+    return results
+
+
+def run_batch(cipher, items):
+    """
+    items: (index, key, op, data, mode, iv, aad) tuples, op "encrypt" or "decrypt".
+    Returns (index, output, iv, error) tuples in index order. Batches of at
+    least 2 * BATCH_SHARD_MIN items are cut into contiguous runs of the
+    key-sorted list and spread over the "batch" process pool.
+    """
+    started = time.perf_counter()
+    items = sorted(items, key=lambda item: item[1])
+    shards = min(BATCH_WORKERS, len(items) // BATCH_SHARD_MIN)
+    pool = pools.get_process_pool("batch", BATCH_WORKERS) if shards >= 2 else None
+
+    if pool is None:
+        results = _run_shard(cipher, items)
+    else:
+        size = -(-len(items) // shards)
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        try:
+            results = [r for part in pool.map(_run_shard, [cipher] * len(chunks), chunks) for r in part]
+        except BrokenProcessPool:
+            pools.reset_process_pool("batch")
+            raise
+    results.sort(key=lambda r: r[0])
+    metrics.record_cipher(cipher, "batch", sum(len(item[3]) for item in items), started)
+    return results
@@ -1,33 +1,116 @@
+import hashlib
+import os
+
+from app.services.mono_solver import MonoalphabeticAnalyzer
+from app.services.vigenere_solver import shift_chi_squared
 from app.utils.caesar import caesar_decrypt
+from app.utils.lru_cache import ByteLRUCache
+
+# Version of this solver's output, part of its result-cache key: bump it when the
+# algorithm or the response format changes so results persisted by older code are not served
+RESULT_VERSION = 1
+
+# Shifts are ranked on the letters of the first SCORE_SAMPLE characters only
+SCORE_SAMPLE = 2000
+
+# Characters of plaintext shown per candidate in the slim view
+PREVIEW_CHARS = 200
+
+# Ciphertexts of slim solves, kept so any shift's full text can be fetched by
+# digest afterwards; plaintexts are never stored, they are one translate away
+CAESAR_CACHE_BYTES = int(os.environ.get("CAESAR_CACHE_BYTES", 64 * 1024 * 1024))
+CAESAR_CACHE_TTL = float(os.environ.get("CAESAR_CACHE_TTL", 600))
+ciphertexts = ByteLRUCache(CAESAR_CACHE_BYTES, CAESAR_CACHE_TTL)
 
-COMMON_WORDS = {
-    "THE", "AND", "IS", "TO", "OF", "IN", "THAT", "IT", "FOR", "ARE"
-}
+_UPPER = ord("A")
+_LOWER = ord("a")
 
-def score_text(text: str) -> int:
-    words = [
-        w for w in text.upper().split()
-        if w.isalpha()
-    ]
-    return sum(1 for w in words if w in COMMON_WORDS)
+def sample_letters(ciphertext: str) -> list:
+    """A-Z / a-z of the sample as codes 0..25; other characters are dropped."""
+    return [ord(c) - (_UPPER if c < "a" else _LOWER)
+            for c in ciphertext[:SCORE_SAMPLE] if c.isascii() and c.isalpha()]
 
-def solve_caesar(ciphertext: str):
-    all_candidates = []
-    best = None
-    best_score = -1
+def rank_shifts(ciphertext: str) -> list:
+    """
+    (k, score) for all 26 shifts, best first. The score is the mono solver's
+    n-gram score of the decrypted sample; chi-squared against English letter
+    frequencies breaks ties, e.g. when the sample has under 4 letters.
+    """
+    letters = sample_letters(ciphertext)
+    counts = [0] * 26
+    for c in letters:
+        counts[c] += 1
+    chi2 = shift_chi_squared(counts) if letters else [0.0] * 26
 
+    scores = []
     for k in range(26):
-        pt = caesar_decrypt(ciphertext, k)
-        s = score_text(pt)
-        all_candidates.append({"k": k, "pt": pt})
+        score = MonoalphabeticAnalyzer.score_codes([(c - k) % 26 for c in letters])
+        scores.append((-score, chi2[k], k))
+    return [(k, -neg_score) for neg_score, _, k in sorted(scores)]
+
+def text_digest(ciphertext: str) -> str:
+    return hashlib.sha256(ciphertext.encode("utf-8", "surrogatepass")).hexdigest()
+
+def solve_caesar(ciphertext: str, top=None, view="full", preview_chars=PREVIEW_CHARS, progress=None):
+    """
+    Every shift is ranked on a sample. In the full view only the best `top`
+    shifts (all 26 when None) get their full plaintext, the others carry
+    "pt": None. The slim view returns the best plaintext, a preview of every
+    shift, and a digest for fetching other shifts with candidate_text().
+    progress(**state), when given, is called between phases.
+    """
+    ranking = rank_shifts(ciphertext)
+    scores = dict(ranking)
+    best_k, best_score = ranking[0]
+    if progress:
+        progress(phase="ranked", key=best_k, score=round(best_score, 5))
+    result = {
+        "key": best_k,
+        "plaintext": caesar_decrypt(ciphertext, best_k),
+        "bestScore": round(best_score, 5),
+    }
+    if progress:
+        progress(phase="plaintext", key=best_k)
+
+    if view == "slim":
+        head = ciphertext[:preview_chars]
+        result["digest"] = remember(ciphertext)
+        result["length"] = len(ciphertext)
+        result["allCandidates"] = [{
+            "k": k,
+            "score": round(scores[k], 5),
+            "preview": caesar_decrypt(head, k),
+        } for k in range(26)]
+        return result
+
+    full = {k for k, _ in ranking[:26 if top is None else max(1, top)]}
+    result["allCandidates"] = [{
+        "k": k,
+        "score": round(scores[k], 5),
+        "pt": (result["plaintext"] if k == best_k else caesar_decrypt(ciphertext, k)) if k in full else None,
+    } for k in range(26)]
+    return result
 
-        if s > best_score:
-            best_score = s
-            best = (k, pt)
+def remember(ciphertext: str) -> str:
+    """Keep ciphertext for candidate_text() and return its digest."""
+    digest = text_digest(ciphertext)
+    ciphertexts.put(digest, ciphertext, len(ciphertext))
+    return digest
 
+def candidate_text(digest: str, k: int, offset=0, limit=None) -> dict:
+    """
+    Plaintext of shift k for a remembered ciphertext, optionally one page of
+    it. Raises KeyError when the digest is unknown or has expired.
+    """
+    ciphertext = ciphertexts.get(digest)
+    if ciphertext is None:
+        raise KeyError(digest)
+    end = len(ciphertext) if limit is None else min(len(ciphertext), offset + limit)
     return {
-        "key": best[0],
-        "plaintext": best[1],
-        "allCandidates": all_candidates,
-        "bestScore": best_score
+        "digest": digest,
+        "k": k,
+        "offset": offset,
+        "length": len(ciphertext),
+        "nextOffset": end if end < len(ciphertext) else None,
+        "plaintext": caesar_decrypt(ciphertext[offset:end], k),
     }
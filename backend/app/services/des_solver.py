@@ -1,4 +1,9 @@
 import os
+import time
+from contextlib import contextmanager
+
+from app.utils import metrics
+from app.utils.key_cache import key_schedules
 
 IP = [
     58,50,42,34,26,18,10,2, 60,52,44,36,28,20,12,4,
@@ -122,43 +127,337 @@ def des_block(block, keys, enc=True):
         L,R=R,xor(L,feistel(R,k))
     return bits_to_bytes(permute(R+L,IP_INV))
 
+# ===== Table-driven engine =====
+# Blocks and keys are handled as integers. Every bit permutation becomes one
+# table lookup per input byte, and each S-box is merged with P into a 32-bit
+# SP-box indexed by its 6-bit input.
+
+def byte_tables(table,in_bits):
+    """rows[j][v]: output bits contributed by value v in input byte j."""
+    n=len(table)
+    rows=[]
+    for j in range(in_bits//8):
+        row=[0]*256
+        for v in range(256):
+            for o,src in enumerate(table):
+                pos=src-1
+                if pos//8==j and (v>>(7-pos%8))&1:
+                    row[v]|=1<<(n-1-o)
+        rows.append(row)
+    return rows
+
+def permute_int(rows,x,in_bits):
+    out=0
+    shift=in_bits-8
+    for row in rows:
+        out|=row[(x>>shift)&0xFF]
+        shift-=8
+    return out
+
+def build_spboxes():
+    p_rows=byte_tables(P,32)
+    boxes=[]
+    for i in range(8):
+        box=[]
+        for v in range(64):
+            s=S_BOX[i][((v>>4)&2)|(v&1)][(v>>1)&15]
+            box.append(permute_int(p_rows,s<<(28-4*i),32))
+        boxes.append(box)
+    return boxes
+
+IP0,IP1,IP2,IP3,IP4,IP5,IP6,IP7=byte_tables(IP,64)
+FP0,FP1,FP2,FP3,FP4,FP5,FP6,FP7=byte_tables(IP_INV,64)
+E0,E1,E2,E3=byte_tables(E,32)
+SP0,SP1,SP2,SP3,SP4,SP5,SP6,SP7=build_spboxes()
+PC1_ROWS=byte_tables(PC1,64)
+PC2_ROWS=byte_tables(PC2,56)
+
+def subkeys_int(key):
+    """The 16 round keys as 48-bit integers."""
+    cd=permute_int(PC1_ROWS,int.from_bytes(key,"big"),64)
+    C,D=cd>>28,cd&0xFFFFFFF
+    keys=[]
+    for s in SHIFTS:
+        C=((C<<s)|(C>>(28-s)))&0xFFFFFFF
+        D=((D<<s)|(D>>(28-s)))&0xFFFFFFF
+        keys.append(permute_int(PC2_ROWS,(C<<28)|D,56))
+    return keys
+
+def des_block_fast(block,keys):
+    """One block with round keys from subkeys_int; pass them reversed to decrypt."""
+    return des_stages(block,(keys,))
+
+def des_stages(block,stages):
+    """
+    Chain of DES passes, one per round-key list (three for 3DES EDE). FP
+    followed by IP is the identity, so only the outer IP/FP are applied and
+    the halves are swapped between passes.
+    """
+    x=int.from_bytes(block,"big")
+    x=(IP0[x>>56]|IP1[(x>>48)&255]|IP2[(x>>40)&255]|IP3[(x>>32)&255]|
+       IP4[(x>>24)&255]|IP5[(x>>16)&255]|IP6[(x>>8)&255]|IP7[x&255])
+    L,R=x>>32,x&0xFFFFFFFF
+    for keys in stages:
+        for k in keys:
+            t=(E0[R>>24]|E1[(R>>16)&255]|E2[(R>>8)&255]|E3[R&255])^k
+            L,R=R,L^(SP0[t>>42]|SP1[(t>>36)&63]|SP2[(t>>30)&63]|SP3[(t>>24)&63]|
+                     SP4[(t>>18)&63]|SP5[(t>>12)&63]|SP6[(t>>6)&63]|SP7[t&63])
+        L,R=R,L
+    x=(L<<32)|R
+    x=(FP0[x>>56]|FP1[(x>>48)&255]|FP2[(x>>40)&255]|FP3[(x>>32)&255]|
+       FP4[(x>>24)&255]|FP5[(x>>16)&255]|FP6[(x>>8)&255]|FP7[x&255])
+    return x.to_bytes(8,"big")
+
+# ===== Engines =====
+# An engine is (build_schedule(key), make_blocks(schedule)); make_blocks returns
+# (encrypt_block, decrypt_block). "reference" is the bit-list implementation
+# above, kept for cross-checking.
+
+def reference_engine(keys):
+    return (lambda block: des_block(block,keys,True),
+            lambda block: des_block(block,keys,False))
+
+def spbox_schedule(key):
+    keys=subkeys_int(key)
+    return keys,keys[::-1]
+
+def spbox_engine(schedule):
+    keys,rev=schedule
+    return (lambda block: des_block_fast(block,keys),
+            lambda block: des_block_fast(block,rev))
+
+# ===== Triple DES (EDE) =====
+# C = E_K3(D_K2(E_K1(P))). A 16-byte key is EDE2 (K3 = K1), 24 bytes is EDE3.
+
+def tdes_keys(key):
+    if len(key) not in (16,24):
+        raise ValueError("3DES key must be 16 or 24 bytes")
+    return key[:8],key[8:16],key[16:24] if len(key)==24 else key[:8]
+
+def tdes_reference_schedule(key):
+    return [subkeys(k) for k in tdes_keys(key)]
+
+def tdes_reference_engine(keys):
+    k1,k2,k3=keys
+    return (lambda block: des_block(des_block(des_block(block,k1,True),k2,False),k3,True),
+            lambda block: des_block(des_block(des_block(block,k3,False),k2,True),k1,False))
+
+def tdes_spbox_schedule(key):
+    """Round keys for all three passes, in the order each direction uses them."""
+    k1,k2,k3=(subkeys_int(k) for k in tdes_keys(key))
+    return (k1,k2[::-1],k3),(k3[::-1],k2,k1[::-1])
+
+def tdes_spbox_engine(schedule):
+    enc,dec=schedule
+    return (lambda block: des_stages(block,enc),
+            lambda block: des_stages(block,dec))
+
+ENGINES={
+    "reference": (subkeys,reference_engine),
+    "spbox": (spbox_schedule,spbox_engine),
+}
+TDES_ENGINES={
+    "reference": (tdes_reference_schedule,tdes_reference_engine),
+    "spbox": (tdes_spbox_schedule,tdes_spbox_engine),
+}
+CIPHERS={"des": ENGINES,"tdes": TDES_ENGINES}
+DEFAULT_ENGINE="spbox"
+
+def _engine(engine,cipher="des"):
+    if engine not in CIPHERS[cipher]:
+        raise ValueError(f"Unknown DES engine: {engine}")
+    return CIPHERS[cipher][engine]
+
+def get_engine(key,engine=DEFAULT_ENGINE,cipher="des"):
+    """(encrypt_block, decrypt_block) with freshly computed subkeys; cipher is "des" or "tdes"."""
+    build,make=_engine(engine,cipher)
+    return make(build(key))
+
+@contextmanager
+def cached_engine(key,engine=DEFAULT_ENGINE,cipher="des"):
+    """Like get_engine, with the subkeys leased from the shared key schedule cache."""
+    build,make=_engine(engine,cipher)
+    with key_schedules.lease(f"{cipher}-{engine}",key,build) as schedule:
+        yield make(schedule)
+
 def pad(d):
     p=8-len(d)%8
     return d+bytes([p])*p
 
 def unpad(d): return d[:-d[-1]]
 
-def encrypt(plaintext,key,mode,iv=None):
-    keys=subkeys(key)
+def ecb(block_fn,data):
+    data=memoryview(data)
+    out=bytearray(len(data))
+    for i in range(0,len(data),8):
+        out[i:i+8]=block_fn(data[i:i+8])
+    return bytes(out)
+
+def check_iv(iv):
+    # Blocks are chained as 64-bit ints: a longer IV would overflow, a shorter one be zero-extended
+    if len(iv)!=8:
+        raise ValueError("IV must be 8 bytes")
+
+def cbc_encrypt(enc_block,iv,data):
+    check_iv(iv)
+    data=memoryview(data)
+    out=bytearray(len(data))
+    prev=int.from_bytes(iv,"big")
+    for i in range(0,len(data),8):
+        enc=enc_block((int.from_bytes(data[i:i+8],"big")^prev).to_bytes(8,"big"))
+        out[i:i+8]=enc
+        prev=int.from_bytes(enc,"big")
+    return bytes(out)
+
+def cbc_decrypt(dec_block,iv,data):
+    check_iv(iv)
+    data=memoryview(data)
+    out=bytearray(len(data))
+    prev=int.from_bytes(iv,"big")
+    for i in range(0,len(data),8):
+        dec=dec_block(data[i:i+8])
+        out[i:i+8]=(int.from_bytes(dec,"big")^prev).to_bytes(8,"big")
+        prev=int.from_bytes(data[i:i+8],"big")
+    return bytes(out)
+
+def check_key(key,cipher="des"):
+    # subkeys_int reads the key as one integer, so a wrong length would not fail by itself
+    if cipher=="tdes":
+        tdes_keys(key)
+    elif len(key)!=8:
+        raise ValueError("DES key must be 8 bytes")
+
+def encrypt(plaintext,key,mode,iv=None,engine=DEFAULT_ENGINE,cipher="des"):
+    check_key(key,cipher)
+    started=time.perf_counter()
+    with cached_engine(key,engine,cipher) as (enc_block,_):
+        result=_encrypt(enc_block,plaintext,mode,iv)
+    metrics.record_cipher(cipher,"encrypt",len(plaintext),started)
+    return result
+
+def _encrypt(enc_block,plaintext,mode,iv):
     data=pad(plaintext)
-    out=b""
     if mode=="ECB":
-        for i in range(0,len(data),8):
-            out+=des_block(data[i:i+8],keys,True)
-        return out,None
+        return ecb(enc_block,data),None
     if mode=="CBC":
         iv=iv or os.urandom(8)
-        prev=iv
-        for i in range(0,len(data),8):
-            blk=bytes(a^b for a,b in zip(data[i:i+8],prev))
-            enc=des_block(blk,keys,True)
-            out+=enc
-            prev=enc
-        return out,iv
+        return cbc_encrypt(enc_block,iv,data),iv
     raise ValueError("Unsupported mode")
 
-def decrypt(ciphertext,key,mode,iv=None):
-    keys=subkeys(key)
-    out=b""
+def decrypt(ciphertext,key,mode,iv=None,engine=DEFAULT_ENGINE,cipher="des"):
+    check_key(key,cipher)
+    started=time.perf_counter()
+    with cached_engine(key,engine,cipher) as (_,dec_block):
+        result=_decrypt(dec_block,ciphertext,mode,iv)
+    metrics.record_cipher(cipher,"decrypt",len(ciphertext),started)
+    return result
+
+def _decrypt(dec_block,ciphertext,mode,iv):
+    if not ciphertext or len(ciphertext)%8:
+        raise ValueError("Ciphertext length must be a non-zero multiple of 8")
     if mode=="ECB":
-        for i in range(0,len(ciphertext),8):
-            out+=des_block(ciphertext[i:i+8],keys,False)
-        return unpad(out)
+        return unpad(ecb(dec_block,ciphertext))
     if mode=="CBC":
         if iv is None: raise ValueError("IV required")
-        prev=iv
-        for i in range(0,len(ciphertext),8):
-            dec=des_block(ciphertext[i:i+8],keys,False)
-            out+=bytes(a^b for a,b in zip(dec,prev))
-            prev=ciphertext[i:i+8]
-        return unpad(out)
+        return unpad(cbc_decrypt(dec_block,iv,ciphertext))
+    raise ValueError("Unsupported mode")
+
+def tdes_encrypt(plaintext,key,mode,iv=None,engine=DEFAULT_ENGINE):
+    return encrypt(plaintext,key,mode,iv,engine,cipher="tdes")
+
+def tdes_decrypt(ciphertext,key,mode,iv=None,engine=DEFAULT_ENGINE):
+    return decrypt(ciphertext,key,mode,iv,engine,cipher="tdes")
+
+def batch_group(key,items,engine=DEFAULT_ENGINE):
+    """
+    Run many small (index, op, data, mode, iv, aad) items that share one key,
+    computing its subkeys once; aad is ignored. Returns (index, output, iv,
+    error) tuples.
+    """
+    if len(key)!=8:
+        return [(item[0],None,None,"DES key must be 8 bytes") for item in items]
+
+    results=[]
+    with cached_engine(key,engine) as (enc_block,dec_block):
+        for index,op,data,mode,iv,_ in items:
+            try:
+                if op=="encrypt":
+                    output,iv=_encrypt(enc_block,data,mode,iv)
+                else:
+                    output=_decrypt(dec_block,data,mode,iv)
+                results.append((index,output,iv,None))
+            except ValueError as e:
+                results.append((index,None,None,str(e)))
+    return results
+
+class StreamCipher:
+    """
+    Incremental ECB/CBC for DES or 3DES payloads that arrive in pieces, like
+    aes_solver.StreamCipher: update() returns the output that is ready and
+    keeps the CBC chaining block; finalize() pads or unpads.
+    """
+
+    MODES=("ECB","CBC")
+
+    def __init__(self,key,mode,iv=None,decrypting=False,engine=DEFAULT_ENGINE,cipher="des"):
+        check_key(key,cipher)
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported streaming mode: {mode}")
+        if mode=="ECB":
+            iv=None
+        elif iv is None:
+            if decrypting: raise ValueError("IV required")
+            iv=os.urandom(8)
+        if iv is not None and len(iv)!=8:
+            raise ValueError("IV must be 8 bytes")
+
+        self.mode=mode
+        self.cipher=cipher
+        self.iv=iv
+        self.decrypting=decrypting
+        build,make=_engine(engine,cipher)
+        self._lease,schedule=key_schedules.acquire(f"{cipher}-{engine}",key,build)
+        self._enc_block,self._dec_block=make(schedule)
+        self._pending=bytearray()
+        self._prev=iv
+
+    def _process(self,data):
+        if self.mode=="ECB":
+            return ecb(self._dec_block if self.decrypting else self._enc_block,data)
+        if self.decrypting:
+            out=cbc_decrypt(self._dec_block,self._prev,data)
+            self._prev=bytes(data[-8:])
+        else:
+            out=cbc_encrypt(self._enc_block,self._prev,data)
+            self._prev=out[-8:]
+        return out
+
+    def update(self,data):
+        self._pending+=data
+        ready=len(self._pending)-len(self._pending)%8
+        if self.decrypting and ready==len(self._pending):
+            # Hold back the last full block; it carries the padding
+            ready-=8
+        if ready<=0:
+            return b""
+        started=time.perf_counter()
+        out=self._process(memoryview(self._pending)[:ready])
+        del self._pending[:ready]
+        metrics.record_cipher(self.cipher,"decrypt" if self.decrypting else "encrypt",ready,started)
+        return out
+
+    def finalize(self):
+        try:
+            data,self._pending=bytes(self._pending),bytearray()
+            if not self.decrypting:
+                return self._process(pad(data))
+            if len(data)!=8:
+                raise ValueError("Ciphertext length must be a multiple of 8")
+            return unpad(self._process(data))
+        finally:
+            self.close()
+
+    def close(self):
+        """Return the leased key schedule to the cache; finalize() calls this."""
+        key_schedules.release(self._lease)
+        self._lease=None
@@ -0,0 +1,139 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from app.utils.profiling import profiled
+
+# Threads running CPU-bound service calls off the event loop. Heavy solvers
+# still fan out to their own process pools from inside these threads.
+COMPUTE_WORKERS = int(os.environ.get("COMPUTE_WORKERS", max(4, os.cpu_count() or 1)))
+# Calls admitted at once across all lanes (running plus waiting for a thread)
+COMPUTE_MAX_PENDING = int(os.environ.get("COMPUTE_MAX_PENDING", 4 * COMPUTE_WORKERS))
+# Calls admitted at once per lane unless COMPUTE_LIMITS says otherwise
+COMPUTE_LANE_LIMIT = int(os.environ.get("COMPUTE_LANE_LIMIT", 8))
+# Seconds clients are told to wait after a rejection
+COMPUTE_RETRY_AFTER = int(os.environ.get("COMPUTE_RETRY_AFTER", 2))
+
+DEFAULT_LIMITS = {
+    "mono.autoSolve": 2,
+    "vigenere.solve": 4,
+    "caesar.solve": 4,
+}
+
+
+def parse_limits(spec):
+    """'mono.autoSolve=2,vigenere.solve=4' -> {'mono.autoSolve': 2, 'vigenere.solve': 4}"""
+    limits = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, value = part.partition("=")
+        limits[name.strip()] = int(value)
+    return limits
+
+
+class Overloaded(Exception):
+    def __init__(self, lane, retry_after=COMPUTE_RETRY_AFTER):
+        super().__init__(f"{lane} is at capacity")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class Lane:
+    __slots__ = ("name", "limit", "active", "admitted", "rejected")
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+
+
+class ComputeDispatcher:
+    """
+    Runs blocking service calls on a bounded thread pool so the event loop
+    stays free for cheap requests. Each endpoint names a lane; a call is
+    admitted only while its lane and the dispatcher as a whole are under
+    their limits, and is rejected at once with Overloaded otherwise, so an
+    overloaded server answers 503 immediately instead of queueing forever.
+    """
+
+    def __init__(self, workers=COMPUTE_WORKERS, max_pending=COMPUTE_MAX_PENDING,
+                 lane_limit=COMPUTE_LANE_LIMIT, limits=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.lane_limit = lane_limit
+        self.limits = dict(DEFAULT_LIMITS)
+        self.limits.update(parse_limits(os.environ.get("COMPUTE_LIMITS", "")) if limits is None else limits)
+        self.active = 0
+        self._lanes = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="compute")
+        return self._executor
+
+    def admit(self, name):
+        """Take a slot in lane name or raise Overloaded; hand the lane back to leave()."""
+        with self._lock:
+            lane = self._lanes.get(name)
+            if lane is None:
+                lane = self._lanes[name] = Lane(name, self.limits.get(name, self.lane_limit))
+            if lane.active >= lane.limit or self.active >= self.max_pending:
+                lane.rejected += 1
+                raise Overloaded(name)
+            lane.active += 1
+            lane.admitted += 1
+            self.active += 1
+            return lane
+
+    def leave(self, lane):
+        with self._lock:
+            lane.active -= 1
+            self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, name):
+        """Hold one of the lane's slots around work that is already async (e.g. a process pool)."""
+        lane = self.admit(name)
+        try:
+            yield
+        finally:
+            self.leave(lane)
+
+    async def call(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs) on the compute threads without admission, for work already holding a slot."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(profiled(fn), *args, **kwargs))
+
+    async def run(self, name, fn, *args, **kwargs):
+        """fn(*args, **kwargs) on the compute threads, counted against lane name."""
+        async with self.slot(name):
+            return await self.call(fn, *args, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "maxPending": self.max_pending,
+                "active": self.active,
+                "lanes": {
+                    lane.name: {
+                        "limit": lane.limit,
+                        "active": lane.active,
+                        "admitted": lane.admitted,
+                        "rejected": lane.rejected,
+                    }
+                    for lane in self._lanes.values()
+                },
+            }
+
+
+dispatcher = ComputeDispatcher()
@@ -0,0 +1,212 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+import uuid
+
+# Number of jobs solved at the same time, and how many more may wait in the queue
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", 16))
+# Finished jobs (and their results) are kept this many seconds for late readers
+JOB_TTL = float(os.environ.get("JOB_TTL", 600))
+
+FINISHED = ("done", "failed", "cancelled")
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """
+    One queued solve. The worker thread publishes events into an append-only
+    list; readers on the event loop wait on an asyncio.Event that the worker
+    sets through call_soon_threadsafe.
+    """
+
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.events = []
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        # Guards status changes; separate from _lock so publish() is never called holding it
+        self._state_lock = threading.Lock()
+        self._waiters = set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def publish(self, event, data):
+        with self._lock:
+            self.events.append((event, data))
+            waiters = list(self._waiters)
+        for loop, ready in waiters:
+            loop.call_soon_threadsafe(ready.set)
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def progress(self, **data):
+        """Called by solvers with best-so-far state; raises JobCancelled once cancelled."""
+        self.check_cancelled()
+        self.publish("progress", data)
+
+    def start(self):
+        """queued -> running; False when the job was cancelled first and must be skipped."""
+        with self._state_lock:
+            if self.cancelled or self.status != "queued":
+                return False
+            self.status = "running"
+        self.publish("status", {"status": "running"})
+        return True
+
+    def cancel(self):
+        """Ask the job to stop. A queued job finishes here; a running one at its next progress() call."""
+        self._cancel.set()
+        with self._state_lock:
+            queued = self.status == "queued"
+        if queued:
+            self.finish("cancelled")
+
+    def finish(self, status, result=None, error=None):
+        """Move to a final status; only the first call counts, so readers see one final event."""
+        with self._state_lock:
+            if self.status in FINISHED:
+                return False
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished = time.time()
+        if status == "done":
+            self.publish("done", result)
+        elif status == "failed":
+            self.publish("error", {"detail": error})
+        else:
+            self.publish("cancelled", {})
+        return True
+
+    def snapshot(self):
+        return {
+            "jobId": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": next((data for event, data in reversed(self.events) if event == "progress"), None),
+            "result": self.result,
+            "error": self.error,
+        }
+
+    async def stream(self, keepalive=15.0):
+        """Yield (event, data) from the start; (None, None) marks an idle keepalive."""
+        loop = asyncio.get_running_loop()
+        index = 0
+        while True:
+            ready = asyncio.Event()
+            waiter = (loop, ready)
+            with self._lock:
+                pending = self.events[index:]
+                if not pending:
+                    self._waiters.add(waiter)
+            if pending:
+                for event, data in pending:
+                    yield event, data
+                    if event in ("done", "error", "cancelled"):
+                        return
+                index += len(pending)
+                continue
+
+            try:
+                await asyncio.wait_for(ready.wait(), keepalive)
+            except asyncio.TimeoutError:
+                yield None, None
+            finally:
+                with self._lock:
+                    self._waiters.discard(waiter)
+
+
+class JobManager:
+    """
+    Runs registered solvers on a few daemon worker threads fed by a bounded
+    queue. submit() raises QueueFull when max_pending jobs are already
+    waiting, so callers can push back on clients.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE, ttl=JOB_TTL):
+        self.workers = workers
+        self.ttl = ttl
+        self._runners = {}
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._threads = []
+
+    def register(self, kind, runner):
+        """runner(params, job) -> result; it should call job.progress(...) now and then."""
+        self._runners[kind] = runner
+
+    def submit(self, kind, params):
+        if kind not in self._runners:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job = Job(kind, params)
+        with self._lock:
+            self._prune()
+            self._start_workers()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFull()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"solver-job-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if not job.start():
+                continue
+            try:
+                result = self._runners[job.kind](job.params, job)
+            except JobCancelled:
+                job.finish("cancelled")
+            except Exception as e:
+                job.finish("failed", error=str(e))
+            else:
+                job.finish("done", result)
+
+    def _prune(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished is not None and now - job.finished > self.ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+job_manager = JobManager()
@@ -1,18 +1,44 @@
-import os
+import asyncio
 import math
+import os
 import random
+import threading
+import time
 from collections import Counter
+from concurrent.futures.process import BrokenProcessPool
+
+from app.utils import metrics, pools
+from app.utils.log import get_logger
+from app.utils.ngram_model import BINARY_FILE, NgramModel, encode
+
+log = get_logger(__name__)
+
+# Version of this solver's output, part of its result-cache key: bump it when the
+# algorithm or the response format changes so results persisted by older code are not served
+RESULT_VERSION = 1
+
+# (n-gram order, weight) used by compute_score
+SCORE_WEIGHTS = ((4, 1.0), (3, 0.5), (2, 0.2), (1, 0.1))
+
+# Size of the process pool used by search_parallel (0 disables it)
+SOLVER_WORKERS = int(os.environ.get("MONO_SOLVER_WORKERS", os.cpu_count() or 1))
+
+# Cold-start requests on several compute threads would otherwise each load the model
+_model_lock = threading.Lock()
+
+
+def get_process_pool():
+    """Shared pool for solver restarts; workers load the n-gram model once at startup."""
+    return pools.get_process_pool("mono", SOLVER_WORKERS,
+                                  initializer=MonoalphabeticAnalyzer.initialize_language_models)
+
+
+def reset_process_pool():
+    pools.reset_process_pool("mono")
+
 
 class MonoalphabeticAnalyzer:
-    _mono = {}
-    _bi = {}
-    _tri = {}
-    _quad = {}
-    
-    _mono_min = 0
-    _bi_min = 0
-    _tri_min = 0
-    _quad_min = 0
+    _model = None
     
     _language_model_loaded = False
     _english_frequency_order = "etaoinshrdlcumwfgypbvkjxqz"
@@ -21,7 +47,12 @@ class MonoalphabeticAnalyzer:
     def initialize_language_models(folder_path=None):
         if MonoalphabeticAnalyzer._language_model_loaded:
             return
+        with _model_lock:
+            if not MonoalphabeticAnalyzer._language_model_loaded:
+                MonoalphabeticAnalyzer._load_language_models(folder_path)
 
+    @staticmethod
+    def _load_language_models(folder_path):
         if folder_path is None:
             current_file_path = os.path.abspath(__file__)
             services_dir = os.path.dirname(current_file_path)
@@ -37,79 +68,43 @@ class MonoalphabeticAnalyzer:
             for path in possible_paths:
                 if os.path.exists(path):
                     folder_path = path
-                    print(f"Found ngrams folder at: {folder_path}")
+                    log.info("Found ngrams folder", path=folder_path)
                     break
             
             if folder_path is None:
-                print(f"WARNING: Could not find ngrams folder. Tried: {possible_paths}")
+                log.warning("Could not find ngrams folder", tried=possible_paths)
                 MonoalphabeticAnalyzer._setup_minimal_fallback()
                 return
 
-        files = {
-            'mono': "english_monograms.txt",
-            'bi': "english_bigrams.txt",
-            'tri': "english_trigrams.txt",
-            'quad': "english_quadgrams.txt"
-        }
-
-        for key, filename in files.items():
-            full_path = os.path.join(folder_path, filename)
-            if not os.path.exists(full_path):
-                print(f"WARNING: Could not find {full_path}")
-                continue
+        model = None
+        binary_path = os.path.join(folder_path, BINARY_FILE)
+        if os.path.exists(binary_path):
+            try:
+                model = NgramModel.from_binary(binary_path)
+            except (OSError, ValueError) as e:
+                log.warning("Could not load n-gram blob, using text files", path=binary_path, error=str(e))
 
-            # Load file
-            if key == 'mono':
-                MonoalphabeticAnalyzer._mono, MonoalphabeticAnalyzer._mono_min = MonoalphabeticAnalyzer._load_ngram_file(full_path)
-            elif key == 'bi':
-                MonoalphabeticAnalyzer._bi, MonoalphabeticAnalyzer._bi_min = MonoalphabeticAnalyzer._load_ngram_file(full_path)
-            elif key == 'tri':
-                MonoalphabeticAnalyzer._tri, MonoalphabeticAnalyzer._tri_min = MonoalphabeticAnalyzer._load_ngram_file(full_path)
-            elif key == 'quad':
-                MonoalphabeticAnalyzer._quad, MonoalphabeticAnalyzer._quad_min = MonoalphabeticAnalyzer._load_ngram_file(full_path)
+        if model is None:
+            model = NgramModel.from_text_files(folder_path)
+        MonoalphabeticAnalyzer._model = model
 
-        if MonoalphabeticAnalyzer._mono:
-            sorted_mono = sorted(MonoalphabeticAnalyzer._mono.items(), key=lambda item: item[1], reverse=True)
-            MonoalphabeticAnalyzer._english_frequency_order = "".join([item[0] for item in sorted_mono])
+        if 1 in model.loaded:
+            MonoalphabeticAnalyzer._english_frequency_order = model.frequency_order()
 
         MonoalphabeticAnalyzer._language_model_loaded = True
 
     @staticmethod
     def _setup_minimal_fallback():
-        print("Using minimal fallback frequency data")
+        log.warning("Using minimal fallback frequency data")
         MonoalphabeticAnalyzer._english_frequency_order = "etaoinshrdlcumwfgypbvkjxqz"
+        MonoalphabeticAnalyzer._model = NgramModel.uniform(-10)
         MonoalphabeticAnalyzer._language_model_loaded = True
-        MonoalphabeticAnalyzer._mono_min = -10
-        MonoalphabeticAnalyzer._bi_min = -10
-        MonoalphabeticAnalyzer._tri_min = -10
-        MonoalphabeticAnalyzer._quad_min = -10
 
     @staticmethod
-    def _load_ngram_file(path):
-        temp = []
-        total_count = 0
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    parts = line.strip().split()
-                    if len(parts) < 2: continue
-                    gram = parts[0].lower()
-                    try:
-                        count = float(parts[1])
-                        temp.append((gram, count))
-                        total_count += count
-                    except ValueError: continue
-        except Exception:
-            return {}, 0
-
-        ngram_dict = {}
-        min_score = float('inf')
-        for gram, count in temp:
-            log_prob = math.log10(count / total_count)
-            ngram_dict[gram] = log_prob
-            if log_prob < min_score: min_score = log_prob
-        
-        return ngram_dict, min_score - 1.0
+    def model_version():
+        """Fingerprint of the loaded n-gram model, for keying cached results."""
+        MonoalphabeticAnalyzer.initialize_language_models()
+        return MonoalphabeticAnalyzer._model.fingerprint()
 
     @staticmethod
     def filter_letters(text):
@@ -119,20 +114,17 @@ class MonoalphabeticAnalyzer:
     def compute_score(plaintext):
         s = MonoalphabeticAnalyzer.filter_letters(plaintext)
         if len(s) < 4: return -999999.0
-        
-        def score(dic, min_v, n):
-            sc = 0
-            cnt = 0
-            for i in range(len(s) - n + 1):
-                gram = s[i : i+n]
-                sc += dic.get(gram, min_v)
-                cnt += 1
-            return sc / cnt if cnt > 0 else 0
+        return MonoalphabeticAnalyzer.score_codes(encode(s))
 
-        return (score(MonoalphabeticAnalyzer._quad, MonoalphabeticAnalyzer._quad_min, 4) * 1.0 +
-                score(MonoalphabeticAnalyzer._tri, MonoalphabeticAnalyzer._tri_min, 3) * 0.5 +
-                score(MonoalphabeticAnalyzer._bi, MonoalphabeticAnalyzer._bi_min, 2) * 0.2 +
-                score(MonoalphabeticAnalyzer._mono, MonoalphabeticAnalyzer._mono_min, 1) * 0.1)
+    @staticmethod
+    def score_codes(codes):
+        """compute_score for text already filtered and encoded with ngram_model.encode."""
+        MonoalphabeticAnalyzer.initialize_language_models()
+        model = MonoalphabeticAnalyzer._model
+        if len(codes) < 4: return -999999.0
+
+        return sum(model.order_sum(codes, n) / (len(codes) - n + 1) * weight
+                   for n, weight in SCORE_WEIGHTS)
 
     @staticmethod
     def apply_mapping(ciphertext, key_list):
@@ -197,36 +189,104 @@ class MonoalphabeticAnalyzer:
         return mapping
 
     @staticmethod
-    def solve(ciphertext, restarts=30, iterations=4000):
+    def restart_seeds(restarts, seed=None):
+        """One seed per restart, derived from seed so a solve can be replayed."""
+        rng = random.Random(seed) if seed is not None else random
+        return [rng.getrandbits(32) for _ in range(restarts)]
+
+    @staticmethod
+    def solve_restart(ciphertext, iterations, seed, strategy="hillclimb", patience=None, progress=None):
+        """
+        One search from a shuffled frequency key using a strategy from
+        SEARCH_STRATEGIES. iterations caps the number of score evaluations;
+        patience stops early after that many evaluations without a new best.
+        progress(evaluations, score, key) is called on every new best.
+        Returns (score, key, evaluations).
+        """
+        if strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+
         MonoalphabeticAnalyzer.initialize_language_models()
-        best_key = None
-        best_score = float('-inf')
+        rng = random.Random(seed)
         filtered = MonoalphabeticAnalyzer.filter_letters(ciphertext)
+        initial = MonoalphabeticAnalyzer.build_initial_mapping_by_frequency(ciphertext)
 
-        for _ in range(restarts):
-            key = MonoalphabeticAnalyzer.build_initial_mapping_by_frequency(ciphertext)
+        def new_scorer():
+            key = initial[:]
             for _ in range(15):
-                a, b = random.randint(0, 25), random.randint(0, 25)
+                a, b = rng.randint(0, 25), rng.randint(0, 25)
                 key[a], key[b] = key[b], key[a]
-            
-            curr_score = MonoalphabeticAnalyzer.compute_score(MonoalphabeticAnalyzer.apply_mapping(filtered, key))
+            return IncrementalScorer(filtered, key)
 
-            for _ in range(iterations):
-                next_key = key[:]
-                a, b = random.randint(0, 25), random.randint(0, 25)
-                while a == b: b = random.randint(0, 25)
-                next_key[a], next_key[b] = next_key[b], next_key[a]
-                
-                next_score = MonoalphabeticAnalyzer.compute_score(MonoalphabeticAnalyzer.apply_mapping(filtered, next_key))
-                if next_score > curr_score:
-                    curr_score = next_score
-                    key = next_key
-            
-            if curr_score > best_score:
-                best_score = curr_score
+        return SEARCH_STRATEGIES[strategy](new_scorer, rng, iterations, patience, progress)
+
+    @staticmethod
+    def _merge(results):
+        best_key = None
+        best_score = float('-inf')
+        evaluations = 0
+        for score, key, used in results:
+            evaluations += used
+            if score > best_score:
+                best_score = score
                 best_key = key[:]
+        return {"key": best_key, "score": best_score, "iterations": evaluations}
+
+    @staticmethod
+    def search(ciphertext, restarts=30, iterations=4000, seed=None, strategy="hillclimb", patience=None,
+               progress=None):
+        """
+        Run all restarts; returns {"key", "score", "iterations"} (evaluations used).
+        progress(restart, evaluations, score, key) is called whenever a restart
+        improves, with evaluations counted across all restarts so far.
+        """
+        MonoalphabeticAnalyzer.initialize_language_models()
+        started = time.perf_counter()
+        results = []
+        spent = 0
+        for restart, restart_seed in enumerate(MonoalphabeticAnalyzer.restart_seeds(restarts, seed)):
+            on_improve = None
+            if progress is not None:
+                def on_improve(evaluations, score, key, restart=restart, spent=spent):
+                    progress(restart, spent + evaluations, score, key)
 
-        return best_key
+            result = MonoalphabeticAnalyzer.solve_restart(ciphertext, iterations, restart_seed,
+                                                          strategy, patience, on_improve)
+            spent += result[2]
+            results.append(result)
+        metrics.record_search(strategy, restarts, spent, started)
+        return MonoalphabeticAnalyzer._merge(results)
+
+    @staticmethod
+    async def search_parallel(ciphertext, restarts=30, iterations=4000, seed=None,
+                              strategy="hillclimb", patience=None, executor=None):
+        """
+        Same result as search() for the same seed, but each restart runs in the
+        solver process pool and the caller awaits without blocking the event loop.
+        """
+        executor = executor or get_process_pool()
+        if executor is None:
+            return await asyncio.to_thread(MonoalphabeticAnalyzer.search, ciphertext, restarts,
+                                           iterations, seed, strategy, patience)
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            results = await asyncio.gather(*[
+                loop.run_in_executor(executor, MonoalphabeticAnalyzer.solve_restart,
+                                     ciphertext, iterations, restart_seed, strategy, patience)
+                for restart_seed in MonoalphabeticAnalyzer.restart_seeds(restarts, seed)
+            ])
+        except BrokenProcessPool:
+            reset_process_pool()
+            raise
+        merged = MonoalphabeticAnalyzer._merge(results)
+        metrics.record_search(strategy, restarts, merged["iterations"], started)
+        return merged
+
+    @staticmethod
+    def solve(ciphertext, restarts=30, iterations=4000, seed=None, strategy="hillclimb", patience=None):
+        return MonoalphabeticAnalyzer.search(ciphertext, restarts, iterations, seed, strategy, patience)["key"]
 
     @staticmethod
     def get_letter_frequencies(ciphertext):
@@ -245,4 +305,193 @@ class MonoalphabeticAnalyzer:
             })
         
         stats.sort(key=lambda x: x["count"], reverse=True)
-        return stats
\ No newline at end of file
+        return stats
+
+
+def _random_swap(rng):
+    a, b = rng.randint(0, 25), rng.randint(0, 25)
+    while a == b: b = rng.randint(0, 25)
+    return a, b
+
+
+def _accept(delta, temperature, rng):
+    """
+    Metropolis rule. compute_score is a per-window average, so deltas are
+    passed in log10 units per 1000 letters to keep temperatures independent
+    of the text length.
+    """
+    return delta > 0 or rng.random() < math.exp(delta / temperature)
+
+
+def _hill_climb(new_scorer, rng, iterations, patience, progress):
+    scorer = new_scorer()
+    evaluations = stale = 0
+
+    while evaluations < iterations:
+        a, b = _random_swap(rng)
+        evaluations += 1
+        if scorer.swap_delta(a, b) > 0:
+            scorer.apply_swap(a, b)
+            stale = 0
+            if progress: progress(evaluations, scorer.score, scorer.key)
+        else:
+            stale += 1
+            if patience and stale >= patience: break
+
+    return scorer.score, scorer.key[:], evaluations
+
+
+def _anneal(new_scorer, rng, iterations, patience, progress, t_start=10.0, t_end=0.5):
+    """Simulated annealing with a geometric schedule from t_start to t_end over iterations."""
+    scorer = new_scorer()
+    best_score, best_key = scorer.score, scorer.key[:]
+    cooling = (t_end / t_start) ** (1.0 / max(iterations - 1, 1))
+    temperature = t_start
+    evaluations = stale = 0
+
+    while evaluations < iterations:
+        a, b = _random_swap(rng)
+        evaluations += 1
+        stale += 1
+        if _accept(scorer.swap_delta(a, b) * 1000, temperature, rng):
+            scorer.apply_swap(a, b)
+            if scorer.score > best_score:
+                best_score, best_key = scorer.score, scorer.key[:]
+                stale = 0
+                if progress: progress(evaluations, best_score, best_key)
+        if patience and stale >= patience: break
+        temperature *= cooling
+
+    return best_score, best_key, evaluations
+
+
+def _tempering(new_scorer, rng, iterations, patience, progress,
+               replicas=4, t_min=0.5, t_max=10.0, exchange_every=10):
+    """
+    Parallel tempering: replicas at fixed temperatures (coldest first) each take a
+    Metropolis step per round; every exchange_every rounds neighbouring replicas
+    swap states with the replica-exchange acceptance rule.
+    """
+    ratio = (t_max / t_min) ** (1.0 / max(replicas - 1, 1))
+    temperatures = [t_min * ratio ** i for i in range(replicas)]
+    chains = [new_scorer() for _ in temperatures]
+    best = max(chains, key=lambda c: c.score)
+    best_score, best_key = best.score, best.key[:]
+    evaluations = stale = rounds = 0
+
+    while evaluations < iterations:
+        for scorer, temperature in zip(chains, temperatures):
+            a, b = _random_swap(rng)
+            evaluations += 1
+            stale += 1
+            if _accept(scorer.swap_delta(a, b) * 1000, temperature, rng):
+                scorer.apply_swap(a, b)
+                if scorer.score > best_score:
+                    best_score, best_key = scorer.score, scorer.key[:]
+                    stale = 0
+                    if progress: progress(evaluations, best_score, best_key)
+            if evaluations >= iterations: break
+
+        rounds += 1
+        if rounds % exchange_every == 0:
+            for i in range(replicas - 1):
+                cold, hot = chains[i], chains[i + 1]
+                x = (hot.score - cold.score) * 1000 * (1 / temperatures[i] - 1 / temperatures[i + 1])
+                if x >= 0 or rng.random() < math.exp(x):
+                    chains[i], chains[i + 1] = hot, cold
+        if patience and stale >= patience: break
+
+    return best_score, best_key, evaluations
+
+
+SEARCH_STRATEGIES = {
+    "hillclimb": _hill_climb,
+    "anneal": _anneal,
+    "tempering": _tempering,
+}
+
+
+class IncrementalScorer:
+    """
+    Keeps the compute_score value of a fixed text under a changing key.
+    Identical cipher n-grams are grouped with their counts and kept as
+    integer table codes. Swapping key letters a and b moves each code by
+    (key[b] - key[a]) * (place value of a in the gram) and the reverse for
+    b, so a swap only rescores the distinct grams containing a or b.
+    """
+
+    def __init__(self, filtered, key):
+        MonoalphabeticAnalyzer.initialize_language_models()
+        model = MonoalphabeticAnalyzer._model
+        codes = encode(MonoalphabeticAnalyzer.filter_letters(filtered))
+        self.key = list(key)
+        self.length = len(codes)
+        self._plain = [ord(k) - 97 for k in self.key]
+        self._pending = None
+        self._orders = []
+
+        for n, weight in SCORE_WEIGHTS:
+            table, floor = model.tables[n], model.floors[n]
+            windows = max(self.length - n + 1, 0)
+
+            counts = Counter(tuple(codes[i:i + n]) for i in range(windows))
+            gram_codes, mults, fixed = [], [], 0
+            places = [{} for _ in range(26)]
+            for gram, count in counts.items():
+                # Letters outside a-z (e.g. 'á') never map, so those windows always score the floor
+                if min(gram) < 0:
+                    fixed += count
+                    continue
+                g = len(gram_codes)
+                code = 0
+                for i, c in enumerate(gram):
+                    place = 26 ** (n - 1 - i)
+                    places[c][g] = places[c].get(g, 0) + place
+                    code += self._plain[c] * place
+                gram_codes.append(code)
+                mults.append(count)
+
+            self._orders.append({
+                'table': table,
+                'factor': weight / windows if windows else 0.0,
+                'codes': gram_codes,
+                'mults': mults,
+                'places': places,
+                'total': fixed * floor + sum(table[c] * m for c, m in zip(gram_codes, mults)),
+            })
+
+    @property
+    def score(self):
+        if self.length < 4: return -999999.0
+        return sum(o['total'] * o['factor'] for o in self._orders)
+
+    def swap_delta(self, a, b):
+        """Score change if key[a] and key[b] were swapped (the key is left unchanged)."""
+        diff = self._plain[b] - self._plain[a]
+        changes = []
+        delta = 0.0
+        for o in self._orders:
+            codes, table, mults = o['codes'], o['table'], o['mults']
+            updated = {g: codes[g] + diff * place for g, place in o['places'][a].items()}
+            for g, place in o['places'][b].items():
+                updated[g] = updated.get(g, codes[g]) - diff * place
+            d = sum([(table[c] - table[codes[g]]) * mults[g] for g, c in updated.items()])
+            changes.append((updated, d))
+            delta += d * o['factor']
+
+        self._pending = (a, b, changes)
+        return delta
+
+    def apply_swap(self, a, b):
+        if self._pending is None or self._pending[:2] != (a, b):
+            self.swap_delta(a, b)
+        changes = self._pending[2]
+        self._pending = None
+
+        self.key[a], self.key[b] = self.key[b], self.key[a]
+        self._plain[a], self._plain[b] = self._plain[b], self._plain[a]
+        for o, (updated, d) in zip(self._orders, changes):
+            codes = o['codes']
+            for g, c in updated.items():
+                codes[g] = c
+            o['total'] += d
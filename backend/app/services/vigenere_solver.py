@@ -1,5 +1,22 @@
+from array import array
 from collections import Counter
-import math
+from concurrent.futures.process import BrokenProcessPool
+import operator
+import os
+import re
+import time
+
+from app.services.mono_solver import MonoalphabeticAnalyzer
+from app.utils import metrics, pools
+
+try:
+    import numpy as np
+except ImportError:  # optional: pure-Python fallback below
+    np = None
+
+# Version of this solver's output, part of its result-cache key: bump it when the
+# algorithm or the response format changes so results persisted by older code are not served
+RESULT_VERSION = 1
 
 ENGLISH_FREQ = [
     0.08167, 0.01492, 0.02782, 0.04253, 0.12702, 0.02228, 0.02015,
@@ -9,9 +26,16 @@ ENGLISH_FREQ = [
 ]
 
 ENGLISH_IC = 0.0667
+RANDOM_IC = 1 / 26
+
+_ASCII_NON_LETTERS = bytes(i for i in range(128) if not chr(i).isalpha())
 
 def clean_text(text:  str) -> str:
-    return "".join(c.upper() for c in text if c.isalpha())
+    # Same result as "".join(c.upper() for c in text if c.isalpha()), without
+    # a Python step per character
+    if text.isascii():
+        return text.encode().translate(None, _ASCII_NON_LETTERS).decode().upper()
+    return text.translate({ord(c): c.upper() if c.isalpha() else None for c in set(text)})
 
 def calculate_ic(text: str) -> float:
     if not text or len(text) <= 1:
@@ -25,24 +49,141 @@ def calculate_ic(text: str) -> float:
     
     return numerator / denominator if denominator > 0 else 0.0
 
+# ===== Integer-encoded analysis core =====
+# The cleaned text is encoded once; per-column letter histograms are built
+# with NumPy when available (one bincount per key length), otherwise with
+# C-level bytes slicing and counting. IC and chi-squared are then computed from
+# the histograms in the same order of float operations as calculate_ic and
+# chi_squared, so results are identical to the per-character loops.
+
+_ASCII_CODES = bytes.maketrans(bytes(range(65, 91)), bytes(range(26)))
+
+def encode_letters(clean: str):
+    """
+    Integer codes for clean_text output, plus the number of distinct codes and
+    each code's chi-squared bucket. A-Z map to 0..25. Any other letter kept by
+    clean_text gets its own code from 26 up, so IC still counts it as a
+    separate symbol, and is bucketed at (ord - 65) % 26 like solve_caesar_column.
+    """
+    if clean.isascii():
+        return clean.encode().translate(_ASCII_CODES), 26, list(range(26))
+
+    symbols = {chr(65 + i): i for i in range(26)}
+    buckets = list(range(26))
+    codes = array('I')
+    for c in clean:
+        code = symbols.get(c)
+        if code is None:
+            code = symbols[c] = len(buckets)
+            buckets.append((ord(c) - 65) % 26)
+        codes.append(code)
+    return codes, len(buckets), buckets
+
+def column_histograms(codes, size: int, key_len: int) -> list:
+    """Counts of each code in each of the key_len columns, as key_len lists of size ints."""
+    if np is not None:
+        return _np_column_histograms(codes, size, key_len).tolist()
+    if size == 26:
+        return [[column.count(i) for i in range(26)]
+                for column in (codes[offset::key_len] for offset in range(key_len))]
+    hists = []
+    for offset in range(key_len):
+        counts = Counter(codes[offset::key_len])
+        hists.append([counts.get(i, 0) for i in range(size)])
+    return hists
+
+def _np_column_histograms(codes, size, key_len):
+    data = np.frombuffer(codes, dtype=np.uint8 if size == 26 else np.uint32)
+    rows = -(-len(data) // key_len)
+    # Pad to a full grid with an extra sentinel code, then count every
+    # column at once by giving each its own block of size + 1 bins
+    grid = np.full(rows * key_len, size, dtype=np.int64)
+    grid[:len(data)] = data
+    bins = grid.reshape(rows, key_len) + (size + 1) * np.arange(key_len)
+    counts = np.bincount(bins.ravel(), minlength=(size + 1) * key_len)
+    return counts.reshape(key_len, size + 1)[:, :size]
+
+def histogram_ic(hist) -> float:
+    n = sum(hist)
+    if n <= 1:
+        return 0.0
+    return sum(count * (count - 1) for count in hist) / (n * (n - 1))
+
+def average_ic(codes, size: int, key_len: int) -> float:
+    if np is not None:
+        hists = _np_column_histograms(codes, size, key_len)
+        n = hists.sum(axis=1)
+        num = (hists * (hists - 1)).sum(axis=1)
+        den = n * (n - 1)
+        ics = (num / np.where(den > 0, den, 1)).tolist()
+    else:
+        ics = [histogram_ic(hist) for hist in column_histograms(codes, size, key_len)]
+
+    ic_sum = 0.0
+    for ic in ics:
+        ic_sum += ic
+    return ic_sum / key_len
+
+def fold_histogram(hist, buckets) -> list:
+    """Merge a histogram over codes into the 26 chi-squared buckets."""
+    if len(hist) == 26:
+        return list(hist)
+    folded = [0] * 26
+    for code, count in enumerate(hist):
+        folded[buckets[code]] += count
+    return folded
+
+def shift_chi_squared(folded: list) -> list:
+    """
+    chi_squared of the column decrypted with each of the 26 shifts, from its
+    letter histogram: shifting the text only rotates the histogram.
+    """
+    n = sum(folded)
+    expected = [freq * n for freq in ENGLISH_FREQ]
+    values = []
+    for shift in range(26):
+        chi2 = 0.0
+        for i in range(26):
+            if expected[i] > 0:
+                chi2 += ((folded[(i + shift) % 26] - expected[i]) ** 2) / expected[i]
+        values.append(chi2)
+    return values
+
+def best_shifts(folded_hists: list) -> list:
+    """Lowest-chi-squared shift of every column (first one on ties); 0 for empty columns."""
+    if np is not None and folded_hists:
+        hists = np.array(folded_hists, dtype=np.int64)
+        n = hists.sum(axis=1)
+        expected = np.array(ENGLISH_FREQ)[None, :] * n[:, None]
+        rotate = (np.arange(26)[None, :] + np.arange(26)[:, None]) % 26
+        observed = hists[:, rotate]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            terms = (observed - expected[:, None, :]) ** 2 / expected[:, None, :]
+        # cumsum adds left to right like the Python loop; sum() would pair terms up
+        chi2 = terms.cumsum(axis=2)[:, :, -1]
+        return np.where(n > 0, chi2.argmin(axis=1), 0).tolist()
+
+    shifts = []
+    for folded in folded_hists:
+        if not sum(folded):
+            shifts.append(0)
+            continue
+        values = shift_chi_squared(folded)
+        shifts.append(values.index(min(values)))
+    return shifts
+
 def find_key_length(ciphertext: str, max_len=20) -> int:
     clean = clean_text(ciphertext)
     
     if len(clean) < 100:
         return 1
     
+    codes, size, _ = encode_letters(clean)
     best_len = 1
     best_avg_ic = 0.0
     
     for key_len in range(1, min(max_len + 1, len(clean) // 20)):
-        ic_sum = 0.0
-        
-        for offset in range(key_len):
-            column = clean[offset:: key_len]
-            if len(column) > 1:
-                ic_sum += calculate_ic(column)
-        
-        avg_ic = ic_sum / key_len
+        avg_ic = average_ic(codes, size, key_len)
         
         if abs(avg_ic - ENGLISH_IC) < abs(best_avg_ic - ENGLISH_IC):
             best_avg_ic = avg_ic
@@ -66,40 +207,292 @@ def solve_caesar_column(column: str) -> str:
     if not column:
         return 'A'
     
-    n = len(column)
-    best_shift = 0
-    min_chi2 = float('inf')
-    
-    for shift in range(26):
-        observed = [0] * 26
-        
-        for char in column:
-            decrypted_idx = (ord(char) - ord('A') - shift) % 26
-            observed[decrypted_idx] += 1
-        
-        chi2 = chi_squared(observed, n)
-        
-        if chi2 < min_chi2:
-            min_chi2 = chi2
-            best_shift = shift
-    
-    return chr(ord('A') + best_shift)
+    codes, size, buckets = encode_letters(column)
+    hist = column_histograms(codes, size, 1)[0]
+    return chr(ord('A') + best_shifts([fold_histogram(hist, buckets)])[0])
 
 def find_key(ciphertext: str, key_len: int) -> str:
     clean = clean_text(ciphertext)
-    key_chars = []
-    
-    for offset in range(key_len):
-        column = clean[offset:: key_len]
-        key_char = solve_caesar_column(column)
-        key_chars.append(key_char)
-    
-    return "".join(key_chars)
+    codes, size, buckets = encode_letters(clean)
+    hists = column_histograms(codes, size, key_len)
+    shifts = best_shifts([fold_histogram(hist, buckets) for hist in hists])
+    return "".join(chr(ord('A') + shift) for shift in shifts)
+
+# ===== Key-length detection =====
+# Every length up to max_len is scored on four signals, each scaled to 0..1:
+#   ic        average column IC close to English
+#   autocorr  letters coincide with the ones L, 2L, ... places further on
+#   kasiski   spacings of repeated trigrams are multiples of L
+#   friedman  L is near the Friedman estimate from the whole-text IC
+# Kasiski and autocorrelation look at a prefix of the text; it is plenty.
+
+DETECTION_WEIGHTS = (("ic", 0.4), ("autocorr", 0.3), ("kasiski", 0.2), ("friedman", 0.1))
+MIN_COLUMN_LETTERS = 6
+KASISKI_SAMPLE = 100_000
+AUTOCORR_SAMPLE = 200_000
+
+def kasiski_spacings(codes) -> list:
+    """Distance from every repeated trigram to its previous occurrence, via a hash index."""
+    last = {}
+    spacings = []
+    for i, trigram in enumerate(zip(codes, codes[1:], codes[2:])):
+        prev = last.get(trigram)
+        if prev is not None:
+            spacings.append(i - prev)
+        last[trigram] = i
+    return spacings
+
+def kasiski_divisible(spacings, limit: int) -> list:
+    """counts[k] = number of spacings divisible by k, for k up to limit, from one spacing histogram."""
+    hist = [0] * (max(spacings, default=0) + 1)
+    for d in spacings:
+        hist[d] += 1
+    return [0] + [sum(hist[k::k]) for k in range(1, limit + 1)]
+
+def coincidence_rate(codes, shift: int) -> float:
+    """Share of positions whose letter equals the one shift places later."""
+    n = len(codes) - shift
+    if n <= 0:
+        return 0.0
+    if isinstance(codes, bytes):
+        # Equal bytes XOR to zero bytes: one big-int XOR instead of a Python loop
+        diff = int.from_bytes(codes[:n], "big") ^ int.from_bytes(codes[shift:], "big")
+        return diff.to_bytes(n, "big").count(0) / n
+    return sum(map(operator.eq, codes[:n], codes[shift:])) / n
+
+def friedman_estimate(codes, size: int):
+    """Key length implied by the whole-text IC, or None when it looks random."""
+    ic = histogram_ic(column_histograms(codes, size, 1)[0])
+    if ic - RANDOM_IC < 1e-4:
+        return None
+    return (ENGLISH_IC - RANDOM_IC) / (ic - RANDOM_IC)
+
+def _closeness(value, target, spread):
+    return max(0.0, 1.0 - abs(value - target) / spread)
+
+def rank_key_lengths(ciphertext: str, max_len=20) -> list:
+    """
+    Candidate key lengths, best first, as dicts with the combined score and
+    each signal's raw value. A length whose divisor scores about as well is
+    ranked just below that divisor, since a key repeated twice fits too.
+    """
+    clean = clean_text(ciphertext)
+    codes, size, _ = encode_letters(clean)
+    limit = max(1, min(max_len, len(clean) // MIN_COLUMN_LETTERS))
+    metrics.VIGENERE_KEY_LENGTHS.inc(limit)
+
+    spacings = kasiski_spacings(codes[:KASISKI_SAMPLE])
+    divisible = kasiski_divisible(spacings, limit)
+    sample = codes[:AUTOCORR_SAMPLE]
+    rates = [0.0] + [coincidence_rate(sample, shift) for shift in range(1, limit + 1)]
+    friedman = friedman_estimate(codes, size)
+
+    ranking = []
+    for key_len in range(1, limit + 1):
+        ic = average_ic(codes, size, key_len)
+        autocorr = sum(rates[key_len::key_len]) / len(rates[key_len::key_len])
+        kasiski = divisible[key_len] / len(spacings) if spacings else 0.0
+
+        signals = {
+            "ic": _closeness(ic, ENGLISH_IC, ENGLISH_IC - RANDOM_IC),
+            "autocorr": min(1.0, max(0.0, (autocorr - RANDOM_IC) / (ENGLISH_IC - RANDOM_IC))),
+            "kasiski": max(0.0, (kasiski - 1 / key_len) / (1 - 1 / key_len)) if key_len > 1 else 0.0,
+            "friedman": _closeness(key_len, friedman, 1 + friedman) if friedman else 0.0,
+        }
+        ranking.append({
+            "keyLen": key_len,
+            "score": sum(signals[name] * weight for name, weight in DETECTION_WEIGHTS),
+            "ic": ic,
+            "autocorr": autocorr,
+            "kasiski": kasiski,
+        })
+
+    for entry in ranking:
+        key_len = entry["keyLen"]
+        for divisor in range(1, key_len):
+            base = ranking[divisor - 1]
+            if key_len % divisor == 0 and base["score"] >= 0.9 * entry["score"]:
+                entry["score"] = min(entry["score"], base["score"]) * 0.95
+
+    for entry in ranking:
+        for name in ("score", "ic", "autocorr", "kasiski"):
+            entry[name] = round(entry[name], 4)
+    friedman_len = round(friedman, 2) if friedman else None
+    return [dict(entry, friedman=friedman_len)
+            for entry in sorted(ranking, key=lambda e: (-e["score"], e["keyLen"]))]
+
+# ===== N-gram refinement =====
+# Chi-squared picks each key letter from its column alone, which goes wrong
+# when columns are short. Refinement hill-climbs key letters on the quadgram
+# score of the decrypted text, starting from the chi-squared key.
+
+REFINE_SAMPLE = 4000
+REFINE_BUDGET = float(os.environ.get("VIGENERE_REFINE_BUDGET", 2.0))
+
+class KeyRefiner:
+    """
+    Quadgram log-probability of a letter sequence decrypted under a changing
+    key. Key letter j only decides the plaintext at positions j, j+L, ...,
+    so trying a new letter rescores just the quadgram windows covering those
+    positions: about 4n/L lookups instead of n. Windows touching a letter
+    outside A-Z never change and are left out.
+    """
+
+    def __init__(self, codes, key):
+        MonoalphabeticAnalyzer.initialize_language_models()
+        self.table = MonoalphabeticAnalyzer._model.tables[4]
+        self.codes = list(codes)
+        self.key = [ord(k) - 65 for k in key.upper()]
+        key_len, n = len(self.key), len(self.codes)
+        self.plain = [(c - self.key[i % key_len]) % 26 if c < 26 else -1
+                      for i, c in enumerate(self.codes)]
+
+        windows = [set() for _ in range(key_len)]
+        valid = []
+        for s in range(n - 3):
+            if min(self.plain[s:s + 4]) >= 0:
+                valid.append(s)
+                for p in range(s, s + 4):
+                    windows[p % key_len].add(s)
+        self._windows = [sorted(w) for w in windows]
+        self._positions = [[p for p in range(j, n, key_len) if self.codes[p] < 26]
+                           for j in range(key_len)]
+        self.score = self._window_total(valid)
+
+    def _window_total(self, windows):
+        plain, table = self.plain, self.table
+        return sum([table[plain[s] * 17576 + plain[s + 1] * 676 + plain[s + 2] * 26 + plain[s + 3]]
+                    for s in windows])
+
+    def _set_letter(self, j, k):
+        plain, codes = self.plain, self.codes
+        for p in self._positions[j]:
+            plain[p] = (codes[p] - k) % 26
+
+    def improve_letter(self, j):
+        """Move key letter j to its best value with the others fixed; returns the score gain."""
+        windows = self._windows[j]
+        current = self.key[j]
+        base = best_total = self._window_total(windows)
+        best = current
+        for k in range(26):
+            if k == current:
+                continue
+            self._set_letter(j, k)
+            total = self._window_total(windows)
+            if total > best_total:
+                best, best_total = k, total
+        self._set_letter(j, best)
+        self.key[j] = best
+        self.score += best_total - base
+        return best_total - base
+
+    @property
+    def key_text(self):
+        return "".join(chr(65 + k) for k in self.key)
+
+def refine_key(codes, key: str, deadline: float) -> str:
+    """
+    Sweep the key letters, moving each to its best value, until a sweep
+    changes nothing or time.monotonic() passes deadline.
+    """
+    refiner = KeyRefiner(codes[:REFINE_SAMPLE], key)
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        for j in range(len(refiner.key)):
+            if refiner.improve_letter(j) > 1e-9:
+                improved = True
+            if time.monotonic() >= deadline:
+                break
+    return refiner.key_text
+
+# ===== Candidate solving =====
+# The top key lengths are each solved and decrypted; candidates are ordered by
+# the mono solver's n-gram score of a plaintext sample. Large texts are solved
+# on a process pool.
+
+FITNESS_SAMPLE = 3000
+VIGENERE_WORKERS = int(os.environ.get("VIGENERE_WORKERS", os.cpu_count() or 1))
+VIGENERE_PARALLEL_MIN = int(os.environ.get("VIGENERE_PARALLEL_MIN", 200_000))
+
+def key_fitness(codes, key: str) -> float:
+    """N-gram score of the first FITNESS_SAMPLE letters decrypted with key."""
+    shifts = [ord(k) - 65 for k in key.upper()]
+    plain = [(c - shifts[i % len(shifts)]) % 26 if c < 26 else -1
+             for i, c in enumerate(codes[:FITNESS_SAMPLE])]
+    return MonoalphabeticAnalyzer.score_codes(plain)
+
+def solve_key_length(ciphertext: str, key_len: int, refine_budget=0.0) -> dict:
+    key = find_key(ciphertext, key_len)
+    codes, _, _ = encode_letters(clean_text(ciphertext))
+    if refine_budget > 0:
+        key = refine_key(codes, key, time.monotonic() + refine_budget)
+    key = normalize_key(key)
+    return {
+        "key": key.lower(),
+        "keyLen": len(key),
+        "fitness": round(key_fitness(codes, key), 5),
+        "plaintext": decrypt_vigenere(ciphertext, key),
+    }
+
+def solve_candidates(ciphertext: str, ranking: list, refine_budget=0.0) -> list:
+    """
+    Solve every ranked key length; one candidate per distinct key, best
+    fitness first. refine_budget (seconds) is split evenly between them.
+    """
+    key_lens = [entry["keyLen"] for entry in ranking]
+    budgets = [refine_budget / max(1, len(key_lens))] * len(key_lens)
+    metrics.VIGENERE_CANDIDATES.inc(len(key_lens))
+    pool = None
+    if len(ciphertext) >= VIGENERE_PARALLEL_MIN and len(key_lens) > 1 and VIGENERE_WORKERS > 1:
+        pool = pools.get_process_pool("vigenere", VIGENERE_WORKERS)
+
+    if pool is None:
+        solved = [solve_key_length(ciphertext, key_len, budget) for key_len, budget in zip(key_lens, budgets)]
+    else:
+        try:
+            solved = list(pool.map(solve_key_length, [ciphertext] * len(key_lens), key_lens, budgets))
+        except BrokenProcessPool:
+            pools.reset_process_pool("vigenere")
+            raise
+
+    candidates = {}
+    for entry, candidate in zip(ranking, solved):
+        if candidate["key"] not in candidates:
+            candidates[candidate["key"]] = dict(candidate, score=entry["score"])
+    return sorted(candidates.values(), key=lambda c: -c["fitness"])
+
+_LETTER_RUNS = re.compile(r"([A-Za-z]+)")
+# _SHIFT_BACK[k] subtracts k from A-Z and a-z, keeping case
+_SHIFT_BACK = [bytes.maketrans(
+    bytes(range(65, 91)) + bytes(range(97, 123)),
+    bytes(65 + (i - k) % 26 for i in range(26)) + bytes(97 + (i - k) % 26 for i in range(26)))
+    for k in range(26)]
+
+def _decrypt_ascii(ciphertext: str, key: str) -> str:
+    # Letters are pulled out in runs, each key position's column is shifted
+    # with one bytes.translate, and the runs are put back between the rest
+    parts = _LETTER_RUNS.split(ciphertext)
+    letters = bytearray("".join(parts[1::2]).encode())
+    for offset, k in enumerate(key):
+        letters[offset::len(key)] = letters[offset::len(key)].translate(_SHIFT_BACK[ord(k) - 65])
+    plain = letters.decode()
+
+    pos = 0
+    for i in range(1, len(parts), 2):
+        n = len(parts[i])
+        parts[i] = plain[pos:pos + n]
+        pos += n
+    return "".join(parts)
 
 def decrypt_vigenere(ciphertext: str, key: str) -> str:
     if not key: 
         return ciphertext
     
+    if ciphertext.isascii() and key.isascii() and key.isalpha():
+        return _decrypt_ascii(ciphertext, key.upper())
+    
     result = []
     key_upper = key.upper()
     key_index = 0
@@ -150,22 +543,29 @@ def get_all_rotations(key:  str) -> list:
     n = len(key)
     return [key[i: ] + key[:i] for i in range(n)]
 
-def solve_vigenere(ciphertext:  str, max_key_len=20):
-    key_len = find_key_length(ciphertext, max_key_len)
-    raw_key = find_key(ciphertext, key_len)
-    key = normalize_key(raw_key)
+def solve_vigenere(ciphertext:  str, max_key_len=20, top=5, refine=False, refine_budget=REFINE_BUDGET,
+                   progress=None):
+    # progress(**state) is called between phases; solve jobs use it to report and to stop when cancelled
+    ranking = rank_key_lengths(ciphertext, max_key_len)
+    if progress:
+        progress(phase="keyLengths", keyLengths=ranking[:top])
+    candidates = solve_candidates(ciphertext, ranking[:top], refine_budget if refine else 0.0)
+    best = candidates[0]
+    if progress:
+        progress(phase="candidates", key=best["key"].lower())
+    key = best["key"].upper()
     
     all_rotations = get_all_rotations(key)
     canonical = get_canonical_key(key)
     
-    plaintext = decrypt_vigenere(ciphertext, key)
-    
     return {
         "keyLen": len(key),
         "key": key. lower(),
         "displayKey": key. lower(),
         "canonicalKey": canonical,
         "allRotations": all_rotations,
-        "plaintext":  plaintext,
-        "candidates": []
+        "plaintext":  best["plaintext"],
+        "keyLengths": ranking[:top],
+        "refined": bool(refine),
+        "candidates": candidates
     }
\ No newline at end of file
@@ -1,10 +1,11 @@
+# _DECRYPT_TABLES[k] shifts A-Z and a-z back by k, keeping case. Texts are
+# translated as UTF-8 bytes in one C-level pass: ASCII bytes never occur
+# inside a multi-byte sequence, so other characters pass through untouched.
+_DECRYPT_TABLES = [bytes.maketrans(
+    bytes(range(65, 91)) + bytes(range(97, 123)),
+    bytes((i - k) % 26 + 65 for i in range(26)) + bytes((i - k) % 26 + 97 for i in range(26)))
+    for k in range(26)]
+
 def caesar_decrypt(text: str, k: int) -> str:
-    res = []
-    for ch in text:
-        if "A" <= ch <= "Z":
-            res.append(chr((ord(ch) - 65 - k) % 26 + 65))
-        elif "a" <= ch <= "z":
-            res.append(chr((ord(ch) - 97 - k) % 26 + 97))
-        else:
-            res.append(ch)
-    return "".join(res)
+    data = text.encode("utf-8", "surrogatepass")
+    return data.translate(_DECRYPT_TABLES[k % 26]).decode("utf-8", "surrogatepass")
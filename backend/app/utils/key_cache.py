@@ -0,0 +1,163 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Expanded key schedules kept per process, and for how many seconds after they were built
+KEY_CACHE_SIZE = int(os.environ.get("KEY_CACHE_SIZE", 256))
+KEY_CACHE_TTL = float(os.environ.get("KEY_CACHE_TTL", 300))
+KEY_CACHE_ZEROISE = os.environ.get("KEY_CACHE_ZEROISE", "1") != "0"
+
+
+def zeroise(obj):
+    """
+    Overwrite a schedule in place: bytearrays are zero-filled and lists have
+    every item replaced by 0, recursing into nested lists and tuples. Python
+    ints are immutable, so this drops the last references rather than
+    scrubbing memory.
+    """
+    if isinstance(obj, bytearray):
+        obj[:] = bytes(len(obj))
+    elif isinstance(obj, list):
+        for i, item in enumerate(obj):
+            if isinstance(item, (list, tuple, bytearray)):
+                zeroise(item)
+            obj[i] = 0
+    elif isinstance(obj, tuple):
+        for item in obj:
+            zeroise(item)
+
+
+class _Entry:
+    __slots__ = ("schedule", "created", "users", "retired")
+
+    def __init__(self, schedule, created):
+        self.schedule = schedule
+        self.created = created
+        self.users = 0
+        self.retired = False
+
+
+class KeyScheduleCache:
+    """
+    Thread-safe LRU of expanded key schedules with a TTL counted from when
+    each schedule was built. Entries are looked up by an HMAC of the key under
+    a per-process secret, so raw keys are never stored or compared.
+
+    Schedules are leased: an entry evicted while a lease is open is zeroised
+    only when the last lease is released, so a running encryption never sees
+    its round keys disappear.
+    """
+
+    def __init__(self, maxsize=KEY_CACHE_SIZE, ttl=KEY_CACHE_TTL, zeroise_evicted=KEY_CACHE_ZEROISE):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.zeroise_evicted = zeroise_evicted
+        self._secret = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._swept = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def digest(self, namespace, key):
+        return namespace, hmac.new(self._secret, bytes(key), hashlib.sha256).digest()
+
+    def acquire(self, namespace, key, build):
+        """Return (token, schedule); hand the token back to release() when done."""
+        if self.maxsize <= 0:
+            return None, build(key)
+
+        cache_key = self.digest(namespace, key)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._swept > 1.0:
+                self._sweep(now)
+            entry = self._entries.get(cache_key)
+            if entry is not None and now - entry.created > self.ttl:
+                self._evict(cache_key, expired=True)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                entry.users += 1
+                return entry, entry.schedule
+            self.misses += 1
+
+        schedule = build(key)
+        with self._lock:
+            # Another thread may have built the same schedule meanwhile
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                entry = self._entries[cache_key] = _Entry(schedule, now)
+                while len(self._entries) > self.maxsize:
+                    self._evict(next(iter(self._entries)))
+            else:
+                self._entries.move_to_end(cache_key)
+                if self.zeroise_evicted:
+                    zeroise(schedule)
+            entry.users += 1
+            return entry, entry.schedule
+
+    def release(self, token):
+        if token is None:
+            return
+        with self._lock:
+            token.users -= 1
+            if token.retired and token.users == 0:
+                self._zeroise(token)
+
+    @contextmanager
+    def lease(self, namespace, key, build):
+        token, schedule = self.acquire(namespace, key, build)
+        try:
+            yield schedule
+        finally:
+            self.release(token)
+
+    def clear(self):
+        with self._lock:
+            for cache_key in list(self._entries):
+                self._evict(cache_key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _sweep(self, now):
+        # Caller holds the lock; drops expired schedules nobody asked for again
+        self._swept = now
+        for cache_key in [k for k, entry in self._entries.items() if now - entry.created > self.ttl]:
+            self._evict(cache_key, expired=True)
+
+    def _evict(self, cache_key, expired=False):
+        # Caller holds the lock
+        entry = self._entries.pop(cache_key)
+        if expired:
+            self.expirations += 1
+        else:
+            self.evictions += 1
+        entry.retired = True
+        if entry.users == 0:
+            self._zeroise(entry)
+
+    def _zeroise(self, entry):
+        if self.zeroise_evicted:
+            zeroise(entry.schedule)
+        entry.schedule = None
+
+
+key_schedules = KeyScheduleCache()
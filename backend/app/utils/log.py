@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+import time
+
+# LOG_LEVEL: DEBUG, INFO, WARNING, ERROR; LOG_FORMAT: "json" (one object per line) or "text"
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+
+_ROOT = "app"
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        fields = getattr(record, "fields", {})
+        line = f"{time.strftime('%H:%M:%S', time.localtime(record.created))} {record.levelname:<7} {record.name}: {record.getMessage()}"
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def _configure():
+    root = logging.getLogger(_ROOT)
+    if root.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    root.propagate = False
+
+
+def set_level(level):
+    """Change the level of every app logger at runtime, e.g. set_level("DEBUG")."""
+    _configure()
+    logging.getLogger(_ROOT).setLevel(level.upper() if isinstance(level, str) else level)
+
+
+class StructuredLogger:
+    """
+    Thin wrapper over a logging.Logger taking structured fields as keyword
+    arguments: log.info("solve done", length=n). Disabled levels return
+    before any formatting, so debug lines cost almost nothing in production.
+    """
+
+    def __init__(self, logger):
+        self._logger = logger
+
+    def _log(self, level, msg, fields, exc_info=False):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, msg, exc_info=exc_info, extra={"fields": fields}, stacklevel=3)
+
+    def debug(self, msg, **fields):
+        self._log(logging.DEBUG, msg, fields)
+
+    def info(self, msg, **fields):
+        self._log(logging.INFO, msg, fields)
+
+    def warning(self, msg, **fields):
+        self._log(logging.WARNING, msg, fields)
+
+    def error(self, msg, **fields):
+        self._log(logging.ERROR, msg, fields)
+
+    def exception(self, msg, **fields):
+        self._log(logging.ERROR, msg, fields, exc_info=True)
+
+
+def get_logger(name):
+    """Logger under the "app" hierarchy; pass __name__ from app modules."""
+    _configure()
+    return StructuredLogger(logging.getLogger(name if name.startswith(_ROOT) else f"{_ROOT}.{name}"))
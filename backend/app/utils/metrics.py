@@ -0,0 +1,267 @@
+import math
+import re
+import threading
+import time
+
+# Latency buckets in seconds, from a cached hit to a long mono solve
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    One metric family with fixed label names. Values are kept per tuple of
+    label values; updates take a lock, so a hook costs about a microsecond.
+    """
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.label_names)
+
+    def samples(self):
+        """(suffix, label text, value) lines for the text format."""
+        with self._lock:
+            items = list(self._values.items())
+        return [("", _labels(self.label_names, key), value) for key, value in items]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(s[0]), s[1], s[2])) for key, s in self._values.items()]
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(("_bucket", _labels(self.label_names, key, [f'le="{_number(bound)}"']), cumulative))
+            lines.append(("_sum", _labels(self.label_names, key), total))
+            lines.append(("_count", _labels(self.label_names, key), count))
+        return lines
+
+
+class Registry:
+    """
+    Metrics rendered in the Prometheus text exposition format. Collectors are
+    callables run at render time that return extra metrics, for state that
+    already lives elsewhere (cache and dispatcher counters).
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def add_collector(self, collect):
+        self._collectors.append(collect)
+
+    def render(self):
+        metrics = list(self._metrics)
+        for collect in self._collectors:
+            metrics.extend(collect())
+        out = []
+        for metric in metrics:
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                out.append(f"{metric.name}{suffix}{labels} {_number(value)}")
+        return "\n".join(out) + "\n"
+
+
+registry = Registry()
+
+# ===== HTTP =====
+HTTP_REQUESTS = registry.counter("http_requests_total", "Requests by route template and status.",
+                                 ("method", "route", "status"))
+HTTP_LATENCY = registry.histogram("http_request_duration_seconds",
+                                  "Time from request start to the last response byte.", ("method", "route"))
+HTTP_REQUEST_BYTES = registry.counter("http_request_bytes_total", "Request body bytes received.", ("method", "route"))
+HTTP_RESPONSE_BYTES = registry.counter("http_response_bytes_total", "Response body bytes sent.", ("method", "route"))
+HTTP_IN_FLIGHT = registry.gauge("http_requests_in_flight", "Requests being handled right now.", ("method",))
+
+# ===== Solvers =====
+MONO_SEARCHES = registry.counter("mono_searches_total", "Mono solver searches.", ("strategy",))
+MONO_RESTARTS = registry.counter("mono_restarts_total", "Mono solver restarts run.", ("strategy",))
+MONO_ITERATIONS = registry.counter("mono_iterations_total", "Mono solver score evaluations.", ("strategy",))
+MONO_SEARCH_SECONDS = registry.histogram("mono_search_duration_seconds", "Wall time of one mono search.",
+                                         ("strategy",))
+MONO_ITERATIONS_RATE = registry.gauge("mono_iterations_per_second",
+                                      "Score evaluations per second in the latest mono search.", ("strategy",))
+
+VIGENERE_KEY_LENGTHS = registry.counter("vigenere_key_lengths_evaluated_total",
+                                        "Key lengths scored by the Vigenère detector.")
+VIGENERE_CANDIDATES = registry.counter("vigenere_candidates_solved_total",
+                                       "Key-length candidates solved and decrypted.")
+
+CIPHER_BLOCKS = registry.counter("cipher_blocks_total", "Cipher blocks processed.", ("cipher", "op"))
+CIPHER_SECONDS = registry.counter("cipher_seconds_total",
+                                  "Time spent processing those blocks; blocks/s = rate(blocks) / rate(seconds).",
+                                  ("cipher", "op"))
+CIPHER_BLOCK_RATE = registry.gauge("cipher_blocks_per_second", "Block throughput of the latest call.",
+                                   ("cipher", "op"))
+
+BLOCK_SIZES = {"aes": 16, "des": 8, "tdes": 8}
+
+
+def record_search(strategy, restarts, iterations, started):
+    elapsed = time.perf_counter() - started
+    MONO_SEARCHES.inc(strategy=strategy)
+    MONO_RESTARTS.inc(restarts, strategy=strategy)
+    MONO_ITERATIONS.inc(iterations, strategy=strategy)
+    MONO_SEARCH_SECONDS.observe(elapsed, strategy=strategy)
+    if elapsed > 0:
+        MONO_ITERATIONS_RATE.set(iterations / elapsed, strategy=strategy)
+
+
+def record_cipher(cipher, op, nbytes, started):
+    """Count the blocks of an nbytes-long cipher call that started at perf_counter() value started."""
+    elapsed = time.perf_counter() - started
+    blocks = -(-nbytes // BLOCK_SIZES[cipher])
+    CIPHER_BLOCKS.inc(blocks, cipher=cipher, op=op)
+    CIPHER_SECONDS.inc(elapsed, cipher=cipher, op=op)
+    if elapsed > 0 and blocks:
+        CIPHER_BLOCK_RATE.set(blocks / elapsed, cipher=cipher, op=op)
+
+
+# stats() fields that only ever grow; exported as counters, everything else as gauges
+COUNTER_FIELDS = ("hits", "misses", "evictions", "expirations", "admitted", "rejected", "errors")
+
+
+def stats_metrics(prefix, help, stats, labels=None):
+    """Metrics built from a flat stats() dict of numbers, for registry collectors."""
+    labels = labels or {}
+    metrics = []
+    for key, value in stats.items():
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            continue
+        field = re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower()  # maxBytes -> max_bytes
+        if field in COUNTER_FIELDS:
+            metric = Counter(f"{prefix}_{field}_total", f"{help}: {field}.", tuple(labels))
+            metric.inc(value, **labels)
+        else:
+            metric = Gauge(f"{prefix}_{field}", f"{help}: {field}.", tuple(labels))
+            metric.set(value, **labels)
+        metrics.append(metric)
+    return metrics
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency, request/response body bytes
+    and in-flight requests. Routes are labelled by their path template
+    (/mono/jobs/{job_id}), so label sets stay bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        received, sent, status = [0], [0], [500]
+
+        async def counting_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                received[0] += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                sent[0] += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc(method=method)
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            HTTP_IN_FLIGHT.dec(method=method)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status[0]))
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=method, route=route)
+            HTTP_REQUEST_BYTES.inc(received[0], method=method, route=route)
+            HTTP_RESPONSE_BYTES.inc(sent[0], method=method, route=route)
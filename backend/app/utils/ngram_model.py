@@ -0,0 +1,185 @@
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+# No app imports so the blob can be built with `python app/utils/ngram_model.py`;
+# under the app this logger sits below the "app" one app.utils.log configures
+log = logging.getLogger(__name__)
+
+NGRAM_FILES = {
+    1: "english_monograms.txt",
+    2: "english_bigrams.txt",
+    3: "english_trigrams.txt",
+    4: "english_quadgrams.txt",
+}
+
+BINARY_FILE = "english_ngrams.bin"
+BINARY_MAGIC = b"NGRM"
+BINARY_VERSION = 1
+
+# magic, version, byte order (0 little / 1 big), loaded orders bitmask, floors[1..4]
+# padded to 64 bytes so the tables start aligned
+_HEADER = struct.Struct("<4sIII4d")
+_HEADER_SIZE = 64
+
+
+def encode(text):
+    """Lowercase letters -> 0..25, any other character -> -1."""
+    return [ord(c) - 97 if 'a' <= c <= 'z' else -1 for c in text]
+
+
+def gram_code(gram):
+    code = 0
+    for c in gram:
+        code = code * 26 + (ord(c) - 97)
+    return code
+
+
+def _read_counts(path):
+    temp = []
+    total_count = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.strip().split()
+            if len(parts) < 2: continue
+            gram = parts[0].lower()
+            try:
+                count = float(parts[1])
+                temp.append((gram, count))
+                total_count += count
+            except ValueError: continue
+    return temp, total_count
+
+
+class NgramModel:
+    """
+    Log10 probabilities of 1- to 4-grams stored as flat tables of 26**n
+    floats, indexed by the base-26 code of the gram ("ab" -> 0*26 + 1).
+    Grams missing from the corpus hold the order's floor value.
+    """
+
+    def __init__(self, tables, floors, loaded=()):
+        self.tables = tables
+        self.floors = floors
+        self.loaded = tuple(loaded)
+
+    @classmethod
+    def uniform(cls, floor):
+        tables = {n: array('d', [floor]) * (26 ** n) for n in NGRAM_FILES}
+        return cls(tables, {n: floor for n in NGRAM_FILES})
+
+    @classmethod
+    def from_text_files(cls, folder_path):
+        tables, floors, loaded = {}, {}, []
+        for n, filename in NGRAM_FILES.items():
+            full_path = os.path.join(folder_path, filename)
+            try:
+                grams, total_count = _read_counts(full_path)
+            except OSError:
+                log.warning("Could not read n-gram file", extra={"fields": {"path": full_path}})
+                grams, total_count = [], 0
+
+            log_probs = [(gram, math.log10(count / total_count)) for gram, count in grams
+                         if len(gram) == n and gram.isascii() and gram.isalpha()]
+            floor = min((lp for _, lp in log_probs), default=1.0) - 1.0
+
+            table = array('d', [floor]) * (26 ** n)
+            for gram, log_prob in log_probs:
+                table[gram_code(gram)] = log_prob
+            tables[n] = table
+            floors[n] = floor
+            if log_probs:
+                loaded.append(n)
+        return cls(tables, floors, loaded)
+
+    @classmethod
+    def from_binary(cls, path):
+        """
+        Map a blob written by build_binary read-only. The tables are views into
+        the mapping, so every process loading the same file shares its pages.
+        """
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, big_endian, mask, *floors = _HEADER.unpack_from(buffer)
+            if magic != BINARY_MAGIC or version != BINARY_VERSION:
+                raise ValueError(f"{path}: unsupported n-gram blob (version {version})")
+            if big_endian != (sys.byteorder == "big"):
+                raise ValueError(f"{path}: n-gram blob was built with another byte order")
+
+            view = memoryview(buffer)
+            tables, offset = {}, _HEADER_SIZE
+            for n in NGRAM_FILES:
+                size = 8 * 26 ** n
+                if offset + size > len(buffer):
+                    raise ValueError(f"{path}: truncated n-gram blob")
+                tables[n] = view[offset:offset + size].cast('d')
+                offset += size
+        except Exception:
+            buffer.close()
+            raise
+
+        model = cls(tables, dict(zip(NGRAM_FILES, floors)),
+                    [n for n in NGRAM_FILES if mask & (1 << n)])
+        model._buffer = buffer
+        return model
+
+    def fingerprint(self):
+        """Short digest of the floors and tables; changes whenever the model's scores do."""
+        if getattr(self, "_fingerprint", None) is None:
+            h = hashlib.sha256()
+            for n in sorted(self.tables):
+                h.update(struct.pack("<id", n, self.floors[n]))
+                h.update(self.tables[n])
+            self._fingerprint = h.hexdigest()[:16]
+        return self._fingerprint
+
+    def frequency_order(self):
+        mono = self.tables[1]
+        return "".join(chr(97 + i) for i in sorted(range(26), key=lambda i: mono[i], reverse=True))
+
+    def order_sum(self, codes, n):
+        """Sum of log probabilities over every n-letter window of encoded text."""
+        table, floor = self.tables[n], self.floors[n]
+        mod = 26 ** (n - 1)
+        total = 0.0
+        code = 0
+        run = 0
+        for i, c in enumerate(codes):
+            if c < 0:
+                run = 0
+            else:
+                code = (code % mod) * 26 + c
+                run += 1
+            if i >= n - 1:
+                total += table[code] if run >= n else floor
+        return total
+
+
+def build_binary(folder_path, out_path=None):
+    """Compile the text n-gram files in folder_path into one binary blob."""
+    model = NgramModel.from_text_files(folder_path)
+    out_path = out_path or os.path.join(folder_path, BINARY_FILE)
+    mask = sum(1 << n for n in model.loaded)
+    header = _HEADER.pack(BINARY_MAGIC, BINARY_VERSION, int(sys.byteorder == "big"), mask,
+                          *(model.floors[n] for n in NGRAM_FILES))
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header.ljust(_HEADER_SIZE, b"\0"))
+        for n in NGRAM_FILES:
+            model.tables[n].tofile(f)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+if __name__ == "__main__":
+    # Run from backend/:  python app/utils/ngram_model.py [ngrams_folder] [out_file]
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "..", "ngrams")
+    print(f"Wrote {build_binary(folder, sys.argv[2] if len(sys.argv) > 2 else None)}")
@@ -0,0 +1,27 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def get_process_pool(name, workers, initializer=None):
+    """
+    Process pool shared by every caller asking for the same name, created on
+    first use. Returns None when workers is 0 so callers can run inline.
+    """
+    if workers <= 0:
+        return None
+    with _lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = ProcessPoolExecutor(max_workers=workers, initializer=initializer)
+        return pool
+
+
+def reset_process_pool(name):
+    """Drop a (broken) pool; the next get_process_pool() call starts a new one."""
+    with _lock:
+        pool = _pools.pop(name, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
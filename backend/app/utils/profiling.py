@@ -0,0 +1,248 @@
+import cProfile
+import hmac
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from urllib.parse import parse_qs
+
+from app.utils.log import get_logger
+
+# Profiling is off unless PROFILE_TOKEN is set; the token also guards /api/profiles
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+# Fraction of requests profiled without asking (0.01 = 1 in 100)
+PROFILE_RATE = float(os.environ.get("PROFILE_RATE", 0))
+# Profiles kept; the oldest is dropped first
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", 20))
+
+PROFILE_HEADER = b"x-profile"
+TOKEN_HEADER = b"x-profile-token"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+log = get_logger(__name__)
+
+_current = ContextVar("profile_capture", default=None)
+# One profiler at a time: cProfile hooks are per interpreter on Python 3.12+,
+# and it keeps the cost of profiling to one compute thread
+_profiler_lock = threading.Lock()
+
+
+class Capture:
+    """
+    cProfile data of the service calls made while handling one request.
+    Each call is profiled on the thread that runs it and merged in here.
+    """
+
+    def __init__(self, id, method, path, reason):
+        self.id = id
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started = time.time()
+        self.stats = None
+        self.calls = 0
+        self.skipped = 0
+        self.cpu_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def wrap(self, fn):
+        def profiled(*args, **kwargs):
+            if not _profiler_lock.acquire(blocking=False):
+                self.skipped += 1
+                return fn(*args, **kwargs)
+            try:
+                profiler = cProfile.Profile()
+                cpu = time.thread_time()
+                try:
+                    return profiler.runcall(fn, *args, **kwargs)
+                finally:
+                    self._add(profiler, time.thread_time() - cpu)
+            finally:
+                _profiler_lock.release()
+        return profiled
+
+    def _add(self, profiler, cpu_seconds):
+        with self._lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler)
+            else:
+                self.stats.add(profiler)
+            self.calls += 1
+            self.cpu_seconds += cpu_seconds
+
+
+class Profile:
+    __slots__ = ("id", "method", "path", "reason", "status", "started", "seconds", "cpu_seconds",
+                 "calls", "skipped", "data")
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "reason": self.reason,
+            "status": self.status,
+            "started": round(self.started, 3),
+            "seconds": round(self.seconds, 4),
+            "cpuSeconds": round(self.cpu_seconds, 4),
+            "calls": self.calls,
+            "skipped": self.skipped,
+            "bytes": len(self.data),
+        }
+
+    def text(self, sort="cumulative", limit=60):
+        """pstats report of the profile, sorted by sort and cut to limit rows."""
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        stats.stats = marshal.loads(self.data)
+        stats.get_top_level_stats()
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+
+class ProfileStore:
+    """The last `keep` profiles, newest first in list()."""
+
+    def __init__(self, keep=PROFILE_KEEP):
+        self._profiles = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def next_id(self):
+        return f"{int(time.time())}-{next(self._ids)}"
+
+    def add(self, capture, status, seconds):
+        profile = Profile()
+        profile.id = capture.id
+        profile.method = capture.method
+        profile.path = capture.path
+        profile.reason = capture.reason
+        profile.status = status
+        profile.started = capture.started
+        profile.seconds = seconds
+        profile.cpu_seconds = capture.cpu_seconds
+        profile.calls = capture.calls
+        profile.skipped = capture.skipped
+        with capture._lock:
+            profile.data = marshal.dumps(capture.stats.stats)
+        with self._lock:
+            self._profiles.append(profile)
+        return profile
+
+    def get(self, id):
+        with self._lock:
+            return next((p for p in self._profiles if p.id == id), None)
+
+    def list(self):
+        with self._lock:
+            return [p.summary() for p in reversed(self._profiles)]
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+profiles = ProfileStore()
+
+
+def enabled():
+    return bool(PROFILE_TOKEN)
+
+
+def active():
+    """True while handling a request that is being profiled."""
+    return _current.get() is not None
+
+
+def profiled(fn):
+    """fn wrapped to profile into the current request's capture, or fn itself when none is active."""
+    capture = _current.get()
+    return fn if capture is None else capture.wrap(fn)
+
+
+def request_token(x_profile_token, authorization):
+    """The token from an X-Profile-Token header, or else from Authorization: Bearer."""
+    if x_profile_token is None and authorization and authorization.lower().startswith("bearer "):
+        return authorization[7:]
+    return x_profile_token
+
+
+def token_matches(token):
+    return token is not None and hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+
+def _requested(scope):
+    """
+    True for X-Profile: 1 or ?profile=1 sent with the profile token; without
+    it anyone could make the server profile (and serialise) their requests.
+    """
+    flag = token = authorization = None
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            flag = value.decode("latin-1")
+        elif name == TOKEN_HEADER:
+            token = value.decode("latin-1")
+        elif name == b"authorization":
+            authorization = value.decode("latin-1")
+    if flag is None:
+        query = scope.get("query_string")
+        if not query or b"profile" not in query:
+            return False
+        flag = parse_qs(query.decode("latin-1")).get("profile", ["0"])[-1]
+    return flag not in ("", "0", "false") and token_matches(request_token(token, authorization))
+
+
+class ProfileMiddleware:
+    """
+    ASGI middleware starting a Capture for requests sent with an X-Profile: 1
+    header or ?profile=1 plus the profile token (X-Profile-Token or Bearer),
+    and for a PROFILE_RATE share of the rest. Service
+    calls that go through the compute dispatcher are profiled; requests that
+    made none (cheap routes) leave nothing behind. The profile id
+    is returned in X-Profile-Id when the calls finished before the response
+    started. With profiling off this is one attribute check per request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not PROFILE_TOKEN or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if _requested(scope):
+            reason = "requested"
+        elif PROFILE_RATE and random.random() < PROFILE_RATE:
+            reason = "sampled"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        capture = Capture(profiles.next_id(), scope["method"], scope["path"], reason)
+        status = [500]
+
+        async def tagging_send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if capture.calls:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (PROFILE_ID_HEADER, capture.id.encode())]
+            await send(message)
+
+        token = _current.set(capture)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, tagging_send)
+        finally:
+            _current.reset(token)
+            if capture.calls:
+                profile = profiles.add(capture, status[0], time.perf_counter() - started)
+                log.info("Profile captured", id=profile.id, path=profile.path, reason=profile.reason,
+                         seconds=round(profile.seconds, 3), calls=profile.calls)
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from app.utils.lru_cache import ByteLRUCache
+
+# In-process tier size, and the optional SQLite file shared by every worker
+RESULT_CACHE_BYTES = int(os.environ.get("RESULT_CACHE_BYTES", 128 * 1024 * 1024))
+RESULT_CACHE_DB = os.environ.get("RESULT_CACHE_DB", "")
+RESULT_CACHE_DB_MAX_ROWS = int(os.environ.get("RESULT_CACHE_DB_MAX_ROWS", 10000))
+
+# Rows above the cap are trimmed (oldest first) once every this many writes
+_TRIM_EVERY = 100
+
+
+def result_key(solver, version, params, text):
+    """
+    Content address of a solve: sha256 over the solver name, the model or
+    code version its output depends on, the parameters as canonical JSON
+    and the input text.
+    """
+    h = hashlib.sha256()
+    for part in (solver, version, json.dumps(params, sort_keys=True, separators=(",", ":"))):
+        h.update(part.encode())
+        h.update(b"\0")
+    h.update(text.encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+
+def result_size(value):
+    """
+    Approximate serialised length of a JSON-like result, from string lengths
+    plus a few bytes per container item, without building the JSON.
+    """
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value) + 2
+    if isinstance(value, dict):
+        return 2 + sum(result_size(k) + result_size(v) + 2 for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 2 + sum(result_size(v) + 1 for v in value)
+    return 8
+
+
+class ResultCache:
+    """
+    Two-tier cache of JSON-serialisable solver results. The in-process tier
+    is a ByteLRUCache sized by result_size() of each result and hands
+    back the stored object itself, so callers must not mutate what get()
+    returns. With db_path set, results are also written to SQLite, where they
+    survive restarts and are shared by all uvicorn workers; a disk hit is
+    promoted into memory. Disk errors count as misses, never as failures.
+    """
+
+    def __init__(self, max_bytes=RESULT_CACHE_BYTES, db_path=RESULT_CACHE_DB, max_rows=RESULT_CACHE_DB_MAX_ROWS):
+        self.memory = ByteLRUCache(max_bytes)
+        self.db_path = db_path or None
+        self.max_rows = max_rows
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_errors = 0
+
+    def get(self, key):
+        result = self.memory.get(key)
+        if result is not None or self.db_path is None:
+            return result
+
+        row = self._execute("SELECT value FROM results WHERE key = ?", (key,), fetch=True)
+        if not row:
+            self.disk_misses += 1
+            return None
+        self.disk_hits += 1
+        result = json.loads(row[0])
+        self.memory.put(key, result, len(row[0]))
+        return result
+
+    def put(self, key, result):
+        self.memory.put(key, result, result_size(result))
+        if self.db_path is None:
+            return
+        data = json.dumps(result, separators=(",", ":")).encode()
+        self._execute("INSERT OR REPLACE INTO results (key, value, created) VALUES (?, ?, ?)",
+                      (key, data, time.time()))
+        self._writes += 1
+        if self._writes % _TRIM_EVERY == 0:
+            self._execute("DELETE FROM results WHERE key NOT IN "
+                          "(SELECT key FROM results ORDER BY created DESC LIMIT ?)", (self.max_rows,))
+
+    def get_or_compute(self, key, compute, use_cache=True):
+        """Cached result for key, or compute() stored under it. use_cache=False recomputes and overwrites."""
+        if use_cache:
+            result = self.get(key)
+            if result is not None:
+                return result
+        result = compute()
+        self.put(key, result)
+        return result
+
+    def clear(self):
+        self.memory.clear()
+        if self.db_path is not None:
+            self._execute("DELETE FROM results")
+
+    def stats(self):
+        memory = self.memory.stats()
+        stats = {"memory": memory, "disk": None}
+        if self.db_path is not None:
+            row = self._execute("SELECT COUNT(*) FROM results", fetch=True)
+            stats["disk"] = {
+                "path": self.db_path,
+                "rows": row[0] if row else None,
+                "maxRows": self.max_rows,
+                "hits": self.disk_hits,
+                "misses": self.disk_misses,
+                "errors": self.disk_errors,
+            }
+        hits = memory["hits"] + self.disk_hits
+        lookups = memory["hits"] + memory["misses"]
+        stats["hitRate"] = round(hits / lookups, 4) if lookups else None
+        return stats
+
+    def _connect(self):
+        # Caller holds _db_lock
+        if self._db is None:
+            db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS results "
+                       "(key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    def _execute(self, sql, args=(), fetch=False):
+        with self._db_lock:
+            try:
+                db = self._connect()
+                cursor = db.execute(sql, args)
+                if fetch:
+                    return cursor.fetchone()
+                db.commit()
+            except sqlite3.Error:
+                self.disk_errors += 1
+                return None
+
+
+result_cache = ResultCache()
@@ -0,0 +1,54 @@
+"""
+AES block throughput of the reference and T-table engines, after checking
+both against the FIPS-197 Appendix C known-answer vectors.
+
+Run from backend/:  python -m benchmarks.aes_engines [kib]
+"""
+import os
+import sys
+import time
+
+from app.services.aes_solver import ENGINES, get_engine
+
+FIPS197_PLAINTEXT = bytes.fromhex("00112233445566778899aabbccddeeff")
+FIPS197_VECTORS = {
+    16: "69c4e0d86a7b0430d8cdb78070b4c55a",
+    24: "dda97ca4864cdfe06eaf70a0ec0d7191",
+    32: "8ea2b7ca516745bfeafc49904b496089",
+}
+
+
+def check_vectors():
+    for key_len, expected in FIPS197_VECTORS.items():
+        key = bytes(range(key_len))
+        for name in ENGINES:
+            encrypt_block, decrypt_block = get_engine(key, name)
+            ct = encrypt_block(FIPS197_PLAINTEXT)
+            if ct.hex() != expected or decrypt_block(ct) != FIPS197_PLAINTEXT:
+                raise SystemExit(f"FIPS-197 AES-{key_len * 8} vector failed for engine {name}")
+    print("FIPS-197 vectors: ok")
+
+
+def throughput(block_fn, blocks):
+    t0 = time.perf_counter()
+    for block in blocks:
+        block_fn(block)
+    return len(blocks) * 16 / (time.perf_counter() - t0) / 1e6
+
+
+def main(kib=64):
+    check_vectors()
+    data = os.urandom(kib * 1024)
+    blocks = [data[i:i + 16] for i in range(0, len(data), 16)]
+
+    print(f"{'engine':>10} {'key':>8} {'encrypt MB/s':>13} {'decrypt MB/s':>13}")
+    for key_len in FIPS197_VECTORS:
+        key = os.urandom(key_len)
+        for name in ENGINES:
+            encrypt_block, decrypt_block = get_engine(key, name)
+            print(f"{name:>10} {key_len * 8:>5}bit {throughput(encrypt_block, blocks):13.3f} "
+                  f"{throughput(decrypt_block, blocks):13.3f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 64)
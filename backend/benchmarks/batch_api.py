@@ -0,0 +1,54 @@
+"""
+Records per second through /api/{aes,des}/encrypt one request per record
+versus a single /batch request, with records spread over a few keys.
+
+Requests go through the ASGI app in-process (fastapi.testclient), so there
+is no network cost; over real HTTP the per-record path is slower still.
+
+Run from backend/:  python -m benchmarks.batch_api [records] [keys]
+"""
+import os
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+CIPHERS = {
+    "aes": (16, 16),
+    "des": (8, 8),
+}
+
+
+def records(n, keys, key_len, iv_len):
+    key_hex = [os.urandom(key_len).hex() for _ in range(keys)]
+    return [{
+        "plaintext": f"record {i} " + "x" * (i % 40),
+        "keyHex": key_hex[i % keys],
+        "mode": "CBC",
+        "ivHex": os.urandom(iv_len).hex(),
+    } for i in range(n)]
+
+
+def main(n=2000, keys=8):
+    client = TestClient(app)
+    print(f"{'cipher':>6} {'single rec/s':>13} {'batch rec/s':>12} {'gain':>7}")
+    for cipher, (key_len, iv_len) in CIPHERS.items():
+        items = records(n, keys, key_len, iv_len)
+
+        t0 = time.perf_counter()
+        single = [client.post(f"/api/{cipher}/encrypt", json=item).json()["ciphertextHex"] for item in items]
+        single_rate = n / (time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        response = client.post(f"/api/{cipher}/batch", json={"items": items}).json()
+        batch_rate = n / (time.perf_counter() - t0)
+
+        if response["errors"] or [r["ciphertextHex"] for r in response["results"]] != single:
+            raise SystemExit(f"{cipher}: batch results differ from single requests")
+        print(f"{cipher:>6} {single_rate:13.0f} {batch_rate:12.0f} {batch_rate / single_rate:6.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
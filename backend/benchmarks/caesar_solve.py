@@ -0,0 +1,54 @@
+"""
+Time of solve_caesar on a large upload-sized ciphertext: the old per-character
+loop over all 26 shifts versus translate tables with full plaintext for all
+26 shifts, and for only the best few.
+
+The ciphertext is the lab sample repeated up to the requested size.
+
+Run from backend/:  python -m benchmarks.caesar_solve [size_kib]
+"""
+import os
+import sys
+import time
+
+from app.services.caesar_solver import solve_caesar
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+
+def loop_decrypt(text, k):
+    # The per-character implementation translate tables replaced
+    res = []
+    for ch in text:
+        if "A" <= ch <= "Z":
+            res.append(chr((ord(ch) - 65 - k) % 26 + 65))
+        elif "a" <= ch <= "z":
+            res.append(chr((ord(ch) - 97 - k) % 26 + 97))
+        else:
+            res.append(ch)
+    return "".join(res)
+
+
+def main(size_kib=2048):
+    with open(os.path.join(ROOT, "ciphertext_caesar.txt"), encoding="utf-8") as f:
+        text = f.read()
+    size = size_kib * 1024
+    ciphertext = (text * (size // len(text) + 1))[:size]
+
+    t0 = time.perf_counter()
+    loop = [loop_decrypt(ciphertext, k) for k in range(26)]
+    print(f"{'loop, 26 full':>20} {time.perf_counter() - t0:8.3f} s")
+
+    for top in (None, 3, 1):
+        t0 = time.perf_counter()
+        result = solve_caesar(ciphertext, top)
+        elapsed = time.perf_counter() - t0
+        for c in result["allCandidates"]:
+            if c["pt"] is not None and c["pt"] != loop[c["k"]]:
+                raise SystemExit(f"shift {c['k']} differs from the loop decryption")
+        label = f"translate, {'26 full' if top is None else f'top {top}'}"
+        print(f"{label:>20} {elapsed:8.3f} s  (key {result['key']})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2048)
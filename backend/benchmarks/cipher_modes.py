@@ -0,0 +1,65 @@
+"""
+Scaling of the AES and DES ECB/CBC mode layers with payload size.
+
+For each cipher, mode and size the payload is encrypted and decrypted once;
+the table reports MB/s and the time per KiB relative to the smallest size.
+A flat ratio column means linear scaling; the old bytes-concatenation loops
+grew with the payload instead.
+
+Run from backend/:  python -m benchmarks.cipher_modes [max_size]
+    max_size accepts a K/M suffix (default 50M). DES is a bit-level
+    implementation, so its larger sizes take a long time.
+"""
+import os
+import sys
+import time
+
+from app.services import aes_solver, des_solver
+
+SIZES = [1 << 10, 10 << 10, 100 << 10, 1 << 20, 10 << 20, 50 << 20]
+
+CIPHERS = {
+    "AES": (aes_solver, 16, 16),
+    "DES": (des_solver, 8, 8),
+}
+
+
+def parse_size(text):
+    units = {"K": 1 << 10, "M": 1 << 20}
+    if text[-1].upper() in units:
+        return int(float(text[:-1]) * units[text[-1].upper()])
+    return int(text)
+
+
+def fmt_size(n):
+    return f"{n >> 20}M" if n >= 1 << 20 else f"{n >> 10}K"
+
+
+def measure(module, key, iv, mode, data):
+    t0 = time.perf_counter()
+    ct, _ = module.encrypt(data, key, mode, iv)
+    t1 = time.perf_counter()
+    pt = module.decrypt(ct, key, mode, iv)
+    t2 = time.perf_counter()
+    if pt != data:
+        raise SystemExit(f"round trip failed for {module.__name__} {mode} {len(data)} bytes")
+    return t1 - t0, t2 - t1
+
+
+def main(max_size=50 << 20):
+    sizes = [n for n in SIZES if n <= max_size]
+    print(f"{'cipher':>6} {'mode':>4} {'size':>5} {'enc MB/s':>9} {'dec MB/s':>9} {'enc/KiB ratio':>14} {'dec/KiB ratio':>14}")
+    for name, (module, key_len, iv_len) in CIPHERS.items():
+        key, iv = os.urandom(key_len), os.urandom(iv_len)
+        for mode in ("ECB", "CBC"):
+            base = None
+            for size in sizes:
+                enc, dec = measure(module, key, iv, mode, os.urandom(size))
+                per_kib = (enc / size, dec / size)
+                base = base or per_kib
+                print(f"{name:>6} {mode:>4} {fmt_size(size):>5} {size / enc / 1e6:9.3f} {size / dec / 1e6:9.3f} "
+                      f"{per_kib[0] / base[0]:14.2f} {per_kib[1] / base[1]:14.2f}")
+
+
+if __name__ == "__main__":
+    main(parse_size(sys.argv[1]) if len(sys.argv) > 1 else 50 << 20)
@@ -0,0 +1,57 @@
+"""
+Latency of the trivial "/" endpoint while heavy mono solves run on the same
+event loop, and how many of the solves were turned away with 503.
+
+Requests go through httpx's ASGI transport, so the solves and the pings
+share one event loop exactly as they would on one uvicorn worker.
+
+Run from backend/:  python -m benchmarks.event_loop_latency [solves] [iterations]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+from app.main import app
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+
+async def ping(client, stop, latencies):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await client.get("/")
+        latencies.append(time.perf_counter() - t0)
+        await asyncio.sleep(0.01)
+
+
+async def run(solves, iterations):
+    with open(os.path.join(ROOT, "ciphertext_mono.txt"), encoding="utf-8") as f:
+        ciphertext = f.read()
+    body = {"ciphertext": ciphertext, "restarts": 4, "iterations": iterations,
+            "parallel": False, "cache": False}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+        await client.get("/")
+        latencies, stop = [], asyncio.Event()
+        pinger = asyncio.create_task(ping(client, stop, latencies))
+        t0 = time.perf_counter()
+        responses = await asyncio.gather(*(client.post("/mono/autoSolve", json=body) for _ in range(solves)))
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        await pinger
+
+    codes = [r.status_code for r in responses]
+    latencies.sort()
+    print(f"{solves} solves in {elapsed:.2f} s: {codes.count(200)} ok, {codes.count(503)} rejected (503)")
+    print(f"'/' during solves: n={len(latencies)} median={statistics.median(latencies) * 1000:.1f} ms "
+          f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms max={latencies[-1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    asyncio.run(run(*(args + [4, 3000][len(args):])))
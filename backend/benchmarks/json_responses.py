@@ -0,0 +1,57 @@
+"""
+Serialisation time and size of large responses: Starlette's JSONResponse
+versus FastJSONResponse (orjson when installed), and the bytes each AES
+outputEnc and each compression puts on the wire.
+
+Payloads: a full Caesar result (26 plaintexts) for a size-KiB ciphertext,
+and AES ciphertext of the same size in every output encoding.
+
+Run from backend/:  python -m benchmarks.json_responses [size_kib]
+"""
+import gzip
+import os
+import sys
+import time
+
+from starlette.responses import JSONResponse
+
+from app.routers.aes import encrypted_output
+from app.services.caesar_solver import solve_caesar
+from app.utils import responses
+from app.utils.responses import FastJSONResponse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+
+def timed(fn, runs=3):
+    best = float("inf")
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main(size_kib=2048):
+    size = size_kib * 1024
+    with open(os.path.join(ROOT, "ciphertext_caesar.txt"), encoding="utf-8") as f:
+        text = f.read()
+    caesar = solve_caesar((text * (size // len(text) + 1))[:size])
+    data = os.urandom(size)
+
+    print(f"{size_kib} KiB input; orjson {'installed' if responses.orjson else 'not installed'}, "
+          f"brotli {'installed' if responses.brotli else 'not installed'}")
+    print(f"{'payload':<16} {'renderer':<12} {'ms':>8} {'bytes':>11} {'gzip bytes':>11} {'gzip ms':>8}")
+    payloads = [("caesar full", caesar)] + [
+        (f"aes {enc}", encrypted_output(data, data[:16], enc)) for enc in ("all", "hex", "base64")]
+    for name, payload in payloads:
+        for label, cls in (("JSONResponse", JSONResponse), ("FastJSON", FastJSONResponse)):
+            seconds, body = timed(lambda: cls(payload).body)
+            zipped_seconds, zipped = timed(lambda: gzip.compress(body, responses.GZIP_LEVEL, mtime=0), runs=1)
+            print(f"{name:<16} {label:<12} {seconds * 1000:8.1f} {len(body):11d} {len(zipped):11d} "
+                  f"{zipped_seconds * 1000:8.1f}")
+    print(f"{'aes binary':<16} {'Response':<12} {'':>8} {len(encrypted_output(data, None, 'binary').body):11d}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2048)
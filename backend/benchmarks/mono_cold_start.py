@@ -0,0 +1,52 @@
+"""
+Cold-start latency of the first /mono/initMapping call, loading the n-gram
+model from the compiled binary blob vs. parsing the text files.
+
+Run from backend/:  python -m benchmarks.mono_cold_start
+(build the blob first, also from backend/: python app/utils/ngram_model.py)
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE = os.path.join(BACKEND_DIR, "..", "ciphertext_mono.txt")
+
+CHILD = r"""
+import json, sys, time
+import app.services.mono_solver as mono_solver
+if sys.argv[1] == "text":
+    mono_solver.BINARY_FILE = "__missing__.bin"
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+ciphertext = open(sys.argv[2], encoding="utf-8").read()
+t0 = time.perf_counter()
+resp = client.post("/mono/initMapping", json={"ciphertext": ciphertext})
+elapsed = time.perf_counter() - t0
+resp.raise_for_status()
+print(json.dumps({"seconds": elapsed}))
+"""
+
+
+def measure(fmt, runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", CHILD, fmt, SAMPLE], cwd=BACKEND_DIR,
+                             capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1])["seconds"])
+    return samples
+
+
+def main(runs=5):
+    for fmt in ("text", "binary"):
+        samples = measure(fmt, runs)
+        print(f"{fmt:>6}: median {statistics.median(samples) * 1000:8.1f} ms  "
+              f"(min {min(samples) * 1000:.1f}, max {max(samples) * 1000:.1f}, n={runs})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
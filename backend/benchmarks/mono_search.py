@@ -0,0 +1,75 @@
+"""
+Evaluations-to-solution of the mono search strategies on the lab samples.
+
+For every strategy, restarts run one after another (each stopping on a score
+plateau) until one reaches the reference key's score. The count reported is
+the total number of score evaluations spent, including failed restarts.
+
+Run from backend/:  python -m benchmarks.mono_search [trials]
+"""
+import os
+import statistics
+import sys
+import time
+
+from app.services.mono_solver import SEARCH_STRATEGIES, MonoalphabeticAnalyzer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+SAMPLES = ["ciphertext_mono.txt", "ciphertext_monosubs.txt"]
+
+ITERATIONS = 20000
+PATIENCE = 1500
+MAX_EVALUATIONS = 300000
+
+
+class _Solved(Exception):
+    pass
+
+
+def reference_score(ciphertext):
+    """Best score any strategy reaches with a generous budget."""
+    return max(
+        MonoalphabeticAnalyzer.search(ciphertext, restarts=3, iterations=20000, seed=0,
+                                      strategy=strategy, patience=3000)["score"]
+        for strategy in SEARCH_STRATEGIES
+    )
+
+
+def evaluations_to_solution(ciphertext, strategy, target, seed):
+    spent = 0
+    for restart_seed in MonoalphabeticAnalyzer.restart_seeds(1000, seed):
+        def progress(evaluations, score, key):
+            if score >= target - 1e-9:
+                raise _Solved(evaluations)
+
+        try:
+            _, _, used = MonoalphabeticAnalyzer.solve_restart(
+                ciphertext, ITERATIONS, restart_seed, strategy, PATIENCE, progress)
+        except _Solved as solved:
+            return spent + solved.args[0]
+        spent += used
+        if spent >= MAX_EVALUATIONS:
+            return None
+    return None
+
+
+def main(trials=10):
+    MonoalphabeticAnalyzer.initialize_language_models()
+    for name in SAMPLES:
+        with open(os.path.join(ROOT, name), encoding="utf-8") as f:
+            ciphertext = f.read()
+        target = reference_score(ciphertext)
+        print(f"{name}  (reference score {target:.5f})")
+
+        for strategy in SEARCH_STRATEGIES:
+            t0 = time.perf_counter()
+            runs = [evaluations_to_solution(ciphertext, strategy, target, seed) for seed in range(trials)]
+            elapsed = time.perf_counter() - t0
+            solved = [r for r in runs if r is not None]
+            median = f"{statistics.median(solved):9.0f}" if solved else "        -"
+            print(f"  {strategy:>10}: median {median} evaluations  "
+                  f"solved {len(solved)}/{trials}  {elapsed / trials:6.2f} s/trial")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,323 @@
+"""
+Benchmark suite for the cipher services, with a stored baseline to gate
+changes on.
+
+Micro cases time the service functions directly: AES encrypt/decrypt per
+key size and mode, DES/3DES per key size and mode, compute_score,
+calculate_ic, caesar_decrypt and n-gram model loading. Macro cases time
+end-to-end requests through the ASGI app (fastapi.testclient) on the lab
+sample ciphertexts and on synthetic inputs of each --sizes size. Solver
+result caches are bypassed (cache=false) so every run does the work.
+
+Each case runs up to --repeat times within a time budget; a first call
+that takes under a second is treated as warm-up and dropped. The fastest
+run is what gets compared, being the least disturbed by other load on the
+machine; the median is recorded alongside it. Results are written as JSON
+to benchmarks/results/; with --baseline, any case whose fastest run is more
+than --threshold slower than in the baseline is reported and the exit
+status is 1.
+
+Run from backend/:
+    python -m benchmarks.suite --save-baseline            # record a baseline
+    python -m benchmarks.suite --baseline                 # compare against it
+    python -m benchmarks.suite --group micro -k aes --sizes 1K,64K
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT = os.path.join(BACKEND_DIR, "..")
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+BASELINE = os.path.join(RESULTS_DIR, "baseline.json")
+
+DEFAULT_SIZES = "1K,64K,1M,10M"
+# Data size for the micro cipher cases
+MICRO_BYTES = 32 * 1024
+# Stop repeating a case once its timed runs add up to this many seconds
+CASE_BUDGET = 10.0
+WARMUP_LIMIT = 1.0
+
+AES_KEY_SIZES = (16, 24, 32)
+AES_MODES = ("ECB", "CBC", "CTR", "GCM")
+DES_KEYS = {"des": 8, "tdes128": 16, "tdes192": 24}
+DES_MODES = ("ECB", "CBC")
+
+
+class Case:
+    """A timed callable. With setup, fn is called with setup()'s result, built untimed just before the runs."""
+
+    def __init__(self, name, group, fn, nbytes=None, setup=None):
+        self.name = name
+        self.group = group
+        self.fn = fn
+        self.nbytes = nbytes
+        self.setup = setup
+
+
+def parse_size(text):
+    units = {"K": 1024, "M": 1024 * 1024}
+    text = text.strip().upper()
+    return int(text[:-1]) * units[text[-1]] if text[-1] in units else int(text)
+
+
+def size_label(n):
+    for unit, factor in (("M", 1024 * 1024), ("K", 1024)):
+        if n >= factor and n % factor == 0:
+            return f"{n // factor}{unit}"
+    return str(n)
+
+
+def sample(name):
+    with open(os.path.join(ROOT, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def stretch(text, size):
+    return (text * (size // len(text) + 1))[:size]
+
+
+def check(response):
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.request.url.path}: HTTP {response.status_code} {response.text[:200]}")
+    return response.json()
+
+
+# ===== Micro =====
+
+def micro_cases():
+    from app.services import aes_solver, des_solver
+    from app.services.mono_solver import MonoalphabeticAnalyzer
+    from app.services.vigenere_solver import calculate_ic
+    from app.utils import ngram_model
+    from app.utils.caesar import caesar_decrypt
+
+    rng = random.Random(0)
+    data = rng.randbytes(MICRO_BYTES)
+    cases = []
+
+    for key_len in AES_KEY_SIZES:
+        key = rng.randbytes(key_len)
+        for mode in AES_MODES:
+            iv = rng.randbytes(12 if mode == "GCM" else 16)
+            ct, _ = aes_solver.encrypt(data, key, mode, iv)
+            name = f"aes.{mode.lower()}.{key_len * 8}"
+            cases.append(Case(f"{name}.encrypt", "micro",
+                              lambda k=key, m=mode, i=iv: aes_solver.encrypt(data, k, m, i), len(data)))
+            cases.append(Case(f"{name}.decrypt", "micro",
+                              lambda c=ct, k=key, m=mode, i=iv: aes_solver.decrypt(c, k, m, i), len(data)))
+
+    for cipher_name, key_len in DES_KEYS.items():
+        key = rng.randbytes(key_len)
+        cipher = "des" if cipher_name == "des" else "tdes"
+        for mode in DES_MODES:
+            iv = rng.randbytes(8)
+            ct, _ = des_solver.encrypt(data, key, mode, iv, cipher=cipher)
+            name = f"{cipher_name}.{mode.lower()}"
+            cases.append(Case(f"{name}.encrypt", "micro",
+                              lambda k=key, m=mode, i=iv, c=cipher: des_solver.encrypt(data, k, m, i, cipher=c),
+                              len(data)))
+            cases.append(Case(f"{name}.decrypt", "micro",
+                              lambda t=ct, k=key, m=mode, i=iv, c=cipher: des_solver.decrypt(t, k, m, i, cipher=c),
+                              len(data)))
+
+    MonoalphabeticAnalyzer.initialize_language_models()
+    mono_text = sample("ciphertext_mono.txt")
+    cases.append(Case("mono.compute_score", "micro",
+                      lambda: MonoalphabeticAnalyzer.compute_score(mono_text), len(mono_text)))
+
+    text = stretch(sample("ciphertext_vigenere.txt"), 1024 * 1024)
+    cases.append(Case("vigenere.calculate_ic.1M", "micro", lambda: calculate_ic(text), len(text)))
+    cases.append(Case("caesar.decrypt.1M", "micro", lambda: caesar_decrypt(text, 7), len(text)))
+
+    folder = os.path.join(BACKEND_DIR, "app", "ngrams")
+    blob_dir = tempfile.mkdtemp(prefix="ngram-bench-")
+    atexit.register(shutil.rmtree, blob_dir, ignore_errors=True)
+    blob = os.path.join(blob_dir, ngram_model.BINARY_FILE)
+    ngram_model.build_binary(folder, blob)
+    cases.append(Case("ngram.load.text", "micro", lambda: ngram_model.NgramModel.from_text_files(folder)))
+    cases.append(Case("ngram.load.binary", "micro", lambda: ngram_model.NgramModel.from_binary(blob)))
+    return cases
+
+
+# ===== Macro =====
+
+def macro_cases(sizes):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    client = TestClient(app)
+    rng = random.Random(0)
+    caesar_text = sample("ciphertext_caesar.txt")
+    vigenere_text = sample("ciphertext_vigenere.txt")
+    mono_text = sample("ciphertext_mono.txt")
+    cases = [
+        Case("api.caesar.bruteforce.sample", "macro",
+             lambda: check(client.post("/api/caesar/bruteforce", json={"ciphertext": caesar_text, "cache": False})),
+             len(caesar_text)),
+        Case("api.vigenere.solve.sample", "macro",
+             lambda: check(client.post("/api/vigenere/solve", json={"ciphertext": vigenere_text, "cache": False})),
+             len(vigenere_text)),
+        Case("api.mono.initMapping.sample", "macro",
+             lambda: check(client.post("/mono/initMapping", json={"ciphertext": mono_text})), len(mono_text)),
+        Case("api.mono.autoSolve.sample", "macro",
+             lambda: check(client.post("/mono/autoSolve", json={
+                 "ciphertext": mono_text, "restarts": 4, "iterations": 2000, "seed": 1, "cache": False}))),
+    ]
+
+    for size in sizes:
+        label = size_label(size)
+        caesar = stretch(caesar_text, size)
+        vigenere = stretch(vigenere_text, size)
+        cases.append(Case(f"api.caesar.bruteforce.{label}", "macro",
+                          lambda t=caesar: check(client.post("/api/caesar/bruteforce", json={
+                              "ciphertext": t, "view": "slim", "cache": False})), size))
+        cases.append(Case(f"api.vigenere.solve.{label}", "macro",
+                          lambda t=vigenere: check(client.post("/api/vigenere/solve", json={
+                              "ciphertext": t, "cache": False})), size))
+
+        for cipher, key_len, iv_len in (("aes", 16, 16), ("des", 8, 8)):
+            key, iv = rng.randbytes(key_len).hex(), rng.randbytes(iv_len).hex()
+            params = {"keyHex": key, "mode": "CBC", "ivHex": iv}
+            encrypt = (lambda c=cipher, t=caesar, p=params: check(client.post(
+                f"/api/{c}/encrypt", json={"plaintext": t, **p})))
+            cases.append(Case(f"api.{cipher}.encrypt.{label}", "macro", encrypt, size))
+            cases.append(Case(f"api.{cipher}.decrypt.{label}", "macro",
+                              lambda ct, c=cipher, p=params: check(client.post(
+                                  f"/api/{c}/decrypt", json={"ciphertextHex": ct, **p})),
+                              size, setup=lambda e=encrypt: e()["ciphertextHex"]))
+    return cases
+
+
+# ===== Running and comparing =====
+
+def measure(case, repeat, budget=CASE_BUDGET):
+    if case.setup is None:
+        fn = case.fn
+    else:
+        state = case.setup()
+        fn = lambda: case.fn(state)
+
+    t0 = time.perf_counter()
+    fn()
+    first = time.perf_counter() - t0
+    times = [] if first < WARMUP_LIMIT else [first]
+    while len(times) < repeat and sum(times) < budget:
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    best = min(times)
+    result = {"group": case.group, "seconds": best, "median": statistics.median(times), "runs": len(times)}
+    if case.nbytes:
+        result["bytes"] = case.nbytes
+        result["MBps"] = case.nbytes / best / 1e6
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": numpy_version,
+    }
+
+
+def compare(results, baseline, threshold):
+    """(name, baseline seconds, seconds, change) per case in both runs, and the names over threshold."""
+    rows, regressions = [], []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        change = result["seconds"] / base["seconds"] - 1
+        rows.append((name, base["seconds"], result["seconds"], change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cipher service benchmarks")
+    parser.add_argument("--group", choices=("micro", "macro", "all"), default="all")
+    parser.add_argument("-k", "--filter", default="", help="only cases whose name contains this")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="synthetic input sizes for macro cases")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case, within the time budget")
+    parser.add_argument("--out", help="results file (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--baseline", nargs="?", const=BASELINE, help="compare against this results file")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="fractional slowdown of the best run counted as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help="also write the results as the baseline")
+    args = parser.parse_args(argv)
+    if args.baseline and not os.path.exists(args.baseline):
+        parser.error(f"no baseline at {args.baseline}; run --save-baseline first")
+
+    cases = []
+    if args.group in ("micro", "all"):
+        cases += micro_cases()
+    if args.group in ("macro", "all"):
+        cases += macro_cases([parse_size(s) for s in args.sizes.split(",") if s.strip()])
+    cases = [c for c in cases if args.filter in c.name]
+
+    results = {}
+    print(f"{'case':<34} {'best ms':>11} {'median ms':>10} {'runs':>5} {'MB/s':>9}")
+    for case in cases:
+        result = results[case.name] = measure(case, args.repeat)
+        rate = f"{result['MBps']:9.2f}" if "MBps" in result else ""
+        print(f"{case.name:<34} {result['seconds'] * 1000:11.2f} {result['median'] * 1000:10.2f} "
+              f"{result['runs']:>5} {rate}")
+
+    report = {"environment": environment(), "results": results}
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out = args.out or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    paths = [out] + ([BASELINE] if args.save_baseline else [])
+    for path in paths:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print("Wrote " + ", ".join(paths))
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows, regressions = compare(results, baseline["results"], args.threshold)
+    print(f"\nAgainst {args.baseline} (revision {baseline['environment'].get('revision')}), "
+          f"threshold +{args.threshold:.0%}")
+    print(f"{'case':<34} {'base ms':>11} {'now ms':>10} {'change':>8}")
+    for name, base, now, change in rows:
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:<34} {base * 1000:11.2f} {now * 1000:10.2f} {change:+8.1%}{flag}")
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
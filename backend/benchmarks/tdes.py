@@ -0,0 +1,67 @@
+"""
+3DES (EDE2/EDE3) CBC throughput against single DES, after checking 3DES
+output against Node's des-ede-cbc / des-ede3-cbc when node is on PATH.
+
+The SP-box 3DES path applies IP/FP once per block instead of three times,
+so its cost should stay a little under 3x single DES.
+
+Run from backend/:  python -m benchmarks.tdes [kib]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from app.services.des_solver import ENGINES, encrypt, tdes_encrypt
+
+NODE_SCRIPT = """
+const c = require("crypto");
+const [alg, key, iv, pt] = process.argv.slice(1);
+const x = c.createCipheriv(alg, Buffer.from(key, "hex"), Buffer.from(iv, "hex"));
+process.stdout.write(Buffer.concat([x.update(Buffer.from(pt, "hex")), x.final()]).toString("hex"));
+"""
+
+VARIANTS = {
+    "DES": (8, lambda data, key, iv, engine: encrypt(data, key, "CBC", iv, engine)),
+    "3DES-EDE2": (16, lambda data, key, iv, engine: tdes_encrypt(data, key, "CBC", iv, engine)),
+    "3DES-EDE3": (24, lambda data, key, iv, engine: tdes_encrypt(data, key, "CBC", iv, engine)),
+}
+
+
+def check_node(samples=10):
+    node = shutil.which("node")
+    if node is None:
+        print("Node crypto comparison: skipped (node not found)")
+        return
+    for key_len, alg in ((16, "des-ede-cbc"), (24, "des-ede3-cbc")):
+        for i in range(samples):
+            key, iv, pt = os.urandom(key_len), os.urandom(8), os.urandom(i * 9)
+            expected = subprocess.run([node, "-e", NODE_SCRIPT, alg, key.hex(), iv.hex(), pt.hex()],
+                                      capture_output=True, text=True, check=True).stdout
+            for name in ENGINES:
+                if tdes_encrypt(pt, key, "CBC", iv, name)[0].hex() != expected:
+                    raise SystemExit(f"{alg} mismatch for engine {name}")
+    print(f"Node crypto comparison (EDE2/EDE3, {samples} samples each): ok")
+
+
+def main(kib=64):
+    check_node()
+    data = os.urandom(kib * 1024)
+    iv = os.urandom(8)
+    print(f"{'variant':>10} {'engine':>10} {'MB/s':>8} {'vs DES':>7}")
+    for engine in ENGINES:
+        # The bit-list reference is ~20x slower; keep its run short
+        size = len(data) if engine == "spbox" else len(data) // 16
+        base = None
+        for name, (key_len, run) in VARIANTS.items():
+            key = os.urandom(key_len)
+            t0 = time.perf_counter()
+            run(data[:size], key, iv, engine)
+            rate = size / (time.perf_counter() - t0) / 1e6
+            base = base or rate
+            print(f"{name:>10} {engine:>10} {rate:8.3f} {base / rate:6.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 64)
@@ -0,0 +1,45 @@
+"""
+Time of find_key_length + find_key on a large Vigenère ciphertext for a few
+max_key_len values, on the NumPy path (when installed) and the pure-Python
+fallback.
+
+The ciphertext is the lab sample repeated up to the requested size.
+
+Run from backend/:  python -m benchmarks.vigenere_analysis [size_kib] [max_key_len ...]
+"""
+import os
+import sys
+import time
+
+from app.services import vigenere_solver
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+
+def load(size):
+    with open(os.path.join(ROOT, "ciphertext_vigenere.txt"), encoding="utf-8") as f:
+        text = f.read()
+    return (text * (size // len(text) + 1))[:size]
+
+
+def main(size_kib=1024, max_lens=(20, 100, 300)):
+    ciphertext = load(size_kib * 1024)
+    numpy = vigenere_solver.np
+    paths = {"numpy": numpy, "pure": None} if numpy is not None else {"pure": None}
+    print(f"{size_kib} KiB ciphertext" + ("" if numpy is not None else " (NumPy not installed)"))
+    print(f"{'path':>6} {'max_len':>8} {'key_len':>8} {'seconds':>8}")
+    try:
+        for name, module in paths.items():
+            vigenere_solver.np = module
+            for max_len in max_lens:
+                t0 = time.perf_counter()
+                key_len = vigenere_solver.find_key_length(ciphertext, max_len)
+                vigenere_solver.find_key(ciphertext, key_len)
+                print(f"{name:>6} {max_len:>8} {key_len:>8} {time.perf_counter() - t0:8.2f}")
+    finally:
+        vigenere_solver.np = numpy
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(args[0] if args else 1024, tuple(args[1:]) or (20, 100, 300))
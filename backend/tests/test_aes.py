@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from app.services import aes_solver
+from app.services.aes_solver import ENGINES, decrypt, encrypt, get_engine
+
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:  # optional: only the comparisons against it are skipped
+    Cipher = None
+
+needs_cryptography = pytest.mark.skipif(Cipher is None, reason="cryptography is not installed")
+
+# FIPS-197 Appendix C: key 000102..., plaintext 00112233...
+FIPS197_PLAINTEXT = bytes.fromhex("00112233445566778899aabbccddeeff")
+FIPS197_VECTORS = {
+    16: "69c4e0d86a7b0430d8cdb78070b4c55a",
+    24: "dda97ca4864cdfe06eaf70a0ec0d7191",
+    32: "8ea2b7ca516745bfeafc49904b496089",
+}
+
+# Payload sizes around the block boundary, plus one spanning many blocks
+SIZES = (0, 1, 15, 16, 17, 100, 4096 + 3)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("key_len", FIPS197_VECTORS)
+def test_fips197_vectors(engine, key_len):
+    encrypt_block, decrypt_block = get_engine(bytes(range(key_len)), engine)
+    ct = encrypt_block(FIPS197_PLAINTEXT)
+    assert ct.hex() == FIPS197_VECTORS[key_len]
+    assert decrypt_block(ct) == FIPS197_PLAINTEXT
+
+
+@pytest.mark.parametrize("key_len", FIPS197_VECTORS)
+def test_ttable_matches_reference(key_len):
+    rng = random.Random(key_len)
+    for _ in range(20):
+        key, block = rng.randbytes(key_len), rng.randbytes(16)
+        ref_encrypt, ref_decrypt = get_engine(key, "reference")
+        fast_encrypt, fast_decrypt = get_engine(key, "ttable")
+        assert fast_encrypt(block) == ref_encrypt(block)
+        assert fast_decrypt(block) == ref_decrypt(block)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("mode", ["ECB", "CBC", "CTR", "GCM"])
+def test_round_trip(engine, mode):
+    rng = random.Random(mode)
+    for size in SIZES:
+        key, data = rng.randbytes(32), rng.randbytes(size)
+        ct, iv = encrypt(data, key, mode, engine=engine, aad=b"header")
+        assert decrypt(ct, key, mode, iv, engine=engine, aad=b"header") == data
+
+
+def reference_ctr(key, iv, data):
+    encryptor = Cipher(algorithms.AES(key), modes.CTR(iv)).encryptor()
+    return encryptor.update(data) + encryptor.finalize()
+
+
+@needs_cryptography
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("key_len", FIPS197_VECTORS)
+def test_ctr_matches_cryptography(engine, key_len):
+    rng = random.Random(key_len)
+    # The counter block is one 128-bit integer: carries cross the 64-bit halves and it wraps at the top
+    ivs = [rng.randbytes(16), bytes(8) + b"\xff" * 8, b"\xff" * 16]
+    for iv in ivs:
+        for size in SIZES:
+            key, data = rng.randbytes(key_len), rng.randbytes(size)
+            ct, _ = encrypt(data, key, "CTR", iv, engine)
+            assert ct == reference_ctr(key, iv, data)
+            assert decrypt(ct, key, "CTR", iv, engine) == data
+
+
+@needs_cryptography
+def test_ctr_parallel_chunks_match_cryptography(monkeypatch):
+    monkeypatch.setattr(aes_solver, "PARALLEL_THRESHOLD", 0)
+    monkeypatch.setattr(aes_solver, "CHUNK_SIZE", 1024)
+    rng = random.Random(7)
+    key, iv, data = rng.randbytes(16), bytes(8) + b"\xff" * 8, rng.randbytes(10 * 1024 + 5)
+    ct, _ = encrypt(data, key, "CTR", iv)
+    assert ct == reference_ctr(key, iv, data)
+
+
+@needs_cryptography
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("key_len", FIPS197_VECTORS)
+@pytest.mark.parametrize("iv_len", [12, 16])
+def test_gcm_matches_cryptography(engine, key_len, iv_len):
+    rng = random.Random(key_len * iv_len)
+    for size in SIZES:
+        key, iv, data = rng.randbytes(key_len), rng.randbytes(iv_len), rng.randbytes(size)
+        for aad in (b"", rng.randbytes(20)):
+            ct, _ = encrypt(data, key, "GCM", iv, engine, aad)
+            assert ct == AESGCM(key).encrypt(iv, data, aad or None)
+            assert decrypt(ct, key, "GCM", iv, engine, aad) == data
+
+
+def test_gcm_rejects_tampered_tag():
+    key, iv = bytes(16), bytes(12)
+    ct, _ = encrypt(b"attack at dawn", key, "GCM", iv)
+    tampered = ct[:-1] + bytes([ct[-1] ^ 1])
+    with pytest.raises(ValueError, match="tag mismatch"):
+        decrypt(tampered, key, "GCM", iv)
@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from app.services.des_solver import ENGINES, decrypt, encrypt, get_engine, tdes_decrypt, tdes_encrypt
+
+try:
+    from cryptography.hazmat.decrepit.ciphers.algorithms import TripleDES
+    from cryptography.hazmat.primitives import padding
+    from cryptography.hazmat.primitives.ciphers import Cipher, modes
+except ImportError:  # optional: only the comparisons against it are skipped
+    Cipher = None
+
+needs_cryptography = pytest.mark.skipif(Cipher is None, reason="cryptography is not installed")
+
+# (key, plaintext, ciphertext): the classic worked example plus entries from
+# the NBS SP 500-20 variable-plaintext / variable-key tables
+DES_VECTORS = [
+    ("133457799BBCDFF1", "0123456789ABCDEF", "85E813540F0AB405"),
+    ("0E329232EA6D0D73", "8787878787878787", "0000000000000000"),
+    ("0101010101010101", "8000000000000000", "95F8A5E5DD31D900"),
+    ("0101010101010101", "0000000000000001", "166B40B44ABA4BD6"),
+    ("8001010101010101", "0000000000000000", "95A8D72813DAA94D"),
+    ("0101010101010101", "95F8A5E5DD31D900", "8000000000000000"),
+]
+
+SIZES = (0, 1, 7, 8, 9, 100)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("key,plaintext,ciphertext", DES_VECTORS)
+def test_des_vectors(engine, key, plaintext, ciphertext):
+    encrypt_block, decrypt_block = get_engine(bytes.fromhex(key), engine)
+    out = encrypt_block(bytes.fromhex(plaintext))
+    assert out.hex().upper() == ciphertext
+    assert decrypt_block(out) == bytes.fromhex(plaintext)
+
+
+@pytest.mark.parametrize("cipher,key_len", [("des", 8), ("tdes", 16), ("tdes", 24)])
+def test_spbox_matches_reference(cipher, key_len):
+    rng = random.Random(key_len)
+    for _ in range(10):
+        key, block = rng.randbytes(key_len), rng.randbytes(8)
+        ref_encrypt, ref_decrypt = get_engine(key, "reference", cipher)
+        fast_encrypt, fast_decrypt = get_engine(key, "spbox", cipher)
+        assert fast_encrypt(block) == ref_encrypt(block)
+        assert fast_decrypt(block) == ref_decrypt(block)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("mode", ["ECB", "CBC"])
+def test_round_trip(engine, mode):
+    rng = random.Random(mode)
+    for size in SIZES:
+        key, data = rng.randbytes(8), rng.randbytes(size)
+        ct, iv = encrypt(data, key, mode, engine=engine)
+        assert decrypt(ct, key, mode, iv, engine) == data
+
+
+def reference_tdes(key, mode, iv, data):
+    padder = padding.PKCS7(64).padder()
+    padded = padder.update(data) + padder.finalize()
+    if len(key) == 16:
+        key += key[:8]  # EDE2 is EDE3 with K3 = K1; cryptography deprecates 16-byte keys
+    encryptor = Cipher(TripleDES(key), modes.CBC(iv) if mode == "CBC" else modes.ECB()).encryptor()
+    return encryptor.update(padded) + encryptor.finalize()
+
+
+@needs_cryptography
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("key_len", [16, 24])  # EDE2, EDE3
+@pytest.mark.parametrize("mode", ["ECB", "CBC"])
+def test_tdes_matches_cryptography(engine, key_len, mode):
+    rng = random.Random(key_len)
+    for size in SIZES:
+        key, iv, data = rng.randbytes(key_len), rng.randbytes(8), rng.randbytes(size)
+        ct, _ = tdes_encrypt(data, key, mode, iv if mode == "CBC" else None, engine)
+        assert ct == reference_tdes(key, mode, iv, data)
+        assert tdes_decrypt(ct, key, mode, iv if mode == "CBC" else None, engine) == data
+
+
+@pytest.mark.parametrize("call,message", [
+    (lambda: encrypt(b"data", bytes(7), "ECB"), "DES key must be 8 bytes"),
+    (lambda: tdes_encrypt(b"data", bytes(8), "ECB"), "3DES key must be 16 or 24 bytes"),
+    (lambda: encrypt(b"data", bytes(8), "CBC", bytes(16)), "IV must be 8 bytes"),
+    (lambda: decrypt(bytes(9), bytes(8), "ECB"), "non-zero multiple of 8"),
+    (lambda: decrypt(b"", bytes(8), "ECB"), "non-zero multiple of 8"),
+])
+def test_rejects_bad_input(call, message):
+    with pytest.raises(ValueError, match=message):
+        call()
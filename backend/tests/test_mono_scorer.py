@@ -0,0 +1,36 @@
+import os
+import random
+
+import pytest
+
+from app.services.mono_solver import IncrementalScorer, MonoalphabeticAnalyzer
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "ciphertext_mono.txt")
+
+
+def full_score(filtered, key):
+    return MonoalphabeticAnalyzer.compute_score(MonoalphabeticAnalyzer.apply_mapping(filtered, key))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_score_matches_full_rescore(seed):
+    with open(SAMPLE, encoding="utf-8") as f:
+        filtered = MonoalphabeticAnalyzer.filter_letters(f.read())
+    rng = random.Random(seed)
+    key = [chr(ord("a") + i) for i in range(26)]
+    rng.shuffle(key)
+
+    scorer = IncrementalScorer(filtered, key)
+    assert scorer.score == pytest.approx(full_score(filtered, key))
+    for _ in range(200):
+        a, b = rng.sample(range(26), 2)
+        before = scorer.score
+        delta = scorer.swap_delta(a, b)
+        # Rejected moves leave the key alone; only some swaps are applied
+        if rng.random() < 0.5:
+            continue
+        scorer.apply_swap(a, b)
+        key[a], key[b] = key[b], key[a]
+        assert scorer.key == key
+        assert scorer.score == pytest.approx(before + delta)
+        assert scorer.score == pytest.approx(full_score(filtered, key))
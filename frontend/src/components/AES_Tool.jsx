@@ -18,13 +18,13 @@ export default function AES_Tool() {
   const fileEncryptRef = useRef(null);
   const fileDecryptRef = useRef(null);
 
-  const needsIV = mode === "CBC";
+  const needsIV = mode !== "ECB";
   const keyValid = [32, 48, 64].includes(keyHex.length);
 
   const handleEncrypt = async () => {
     if (!keyValid) return alert("Key must be 32/48/64 hex chars");
     if (!plaintext.trim()) return alert("Enter plaintext");
-    if (needsIV && !ivHex) return alert("IV required for CBC");
+    if (needsIV && !ivHex) return alert(`IV required for ${mode}`);
 
     setLoading(true);
     try {
@@ -33,6 +33,7 @@ export default function AES_Tool() {
         keyHex,
         mode,
         ivHex: needsIV ? ivHex : null,
+        outputEnc: "hex",
       });
       setCiphertext(res.data.ciphertextHex || "");
       if (res.data.ivHex) setIvHex(res.data.ivHex);
@@ -46,7 +47,7 @@ export default function AES_Tool() {
   const handleDecrypt = async () => {
     if (!keyValid) return alert("⚠️ Key must be 32/48/64 hex chars");
     if (!ciphertext.trim()) return alert("⚠️ Enter ciphertext");
-    if (needsIV && !ivHex) return alert("⚠️ IV required for CBC");
+    if (needsIV && !ivHex) return alert(`⚠️ IV required for ${mode}`);
 
     setLoading(true);
     try {
@@ -62,6 +63,7 @@ export default function AES_Tool() {
         keyHex: keyHex.trim(),
         mode,
         ivHex: needsIV ? ivHex.trim() : null,
+        outputEnc: "utf8",
       });
 
       console.log("Decrypt response:", res.data);
@@ -80,7 +82,7 @@ export default function AES_Tool() {
   const handleFileDecrypt = async (file) => {
     if (!file) return;
     if (!keyValid) return alert("Key must be 32/48/64 hex chars");
-    if (needsIV && !ivHex) return alert("IV required for CBC");
+    if (needsIV && !ivHex) return alert(`IV required for ${mode}`);
 
     setLoading(true);
     try {
@@ -90,6 +92,7 @@ export default function AES_Tool() {
       fd.append("mode", mode);
       if (needsIV && ivHex) fd.append("ivHex", ivHex);
       fd.append("inputEnc", "hex");
+      fd.append("outputEnc", "utf8");
 
       const res = await axios.post(
         "http://localhost:4000/api/aes/upload-decrypt",
@@ -147,6 +150,8 @@ export default function AES_Tool() {
           >
             <option value="CBC">CBC</option>
             <option value="ECB">ECB</option>
+            <option value="CTR">CTR</option>
+            <option value="GCM">GCM</option>
           </select>
         </div>
       </div>
@@ -188,14 +193,14 @@ export default function AES_Tool() {
           <div className="row">
             <input
               className="input"
-              placeholder="32 hex chars (16 bytes)"
+              placeholder={mode === "GCM" ? "24 hex chars (12 bytes)" : "32 hex chars (16 bytes)"}
               value={ivHex}
               onChange={(e) => setIvHex(e.target.value)}
               style={{ fontFamily: "monospace", flex: 1 }}
             />
             <button
               className="btn ghost small"
-              onClick={() => setIvHex(randomHex(16))}
+              onClick={() => setIvHex(randomHex(mode === "GCM" ? 12 : 16))}
             >
               Generate
             </button>
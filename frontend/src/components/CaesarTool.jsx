@@ -39,6 +39,8 @@ export default function CaesarTool() {
   const uploadFileToServer = async (file) => {
     const fd = new FormData();
     fd.append("file", file);
+    // File lớn: chỉ nhận preview của các shift, bản đầy đủ lấy khi cần
+    fd.append("view", "slim");
     const resp = await axios.post(
       "http://localhost:4000/api/caesar/upload",
       fd,
@@ -50,6 +52,24 @@ export default function CaesarTool() {
     return resp.data;
   };
 
+  const loadFullCandidate = async (k) => {
+    try {
+      const resp = await axios.get(
+        `http://localhost:4000/api/caesar/candidates/${result.digest}/${k}`,
+        { timeout: 60000 }
+      );
+      setResult((r) => ({
+        ...r,
+        allCandidates: r.allCandidates.map((c) =>
+          c.k === k ? { ...c, pt: resp.data.plaintext } : c
+        ),
+      }));
+    } catch (e) {
+      console.error(e);
+      setError(e.response?.data?.detail || e.message || "Backend error");
+    }
+  };
+
   const readFileLocally = (file) =>
     new Promise((resolve, reject) => {
       const r = new FileReader();
@@ -153,7 +173,7 @@ export default function CaesarTool() {
   const downloadResult = () => {
     if (!result) return alert("No result to download");
     const all = (result.allCandidates || [])
-      .map((c) => `k=${c.k}\n${c.pt}`)
+      .map((c) => `k=${c.k}\n${c.pt ?? c.preview ?? ""}`)
       .join("\n\n---\n\n");
     const content = `Key: ${result.key}\n\nPlaintext:\n${result.plaintext}\n\nAll candidates:\n\n${all}`;
     const blob = new Blob([content], { type: "text/plain;charset=utf-8" });
@@ -261,8 +281,16 @@ export default function CaesarTool() {
                   >
                     <div className="cand-head">
                       <div className="cand-key">k = {c.k}</div>
+                      {c.pt == null && result.digest && (
+                        <button
+                          className="btn ghost small"
+                          onClick={() => loadFullCandidate(c.k)}
+                        >
+                          Load full
+                        </button>
+                      )}
                     </div>
-                    <pre className="cand-pt">{c.pt}</pre>
+                    <pre className="cand-pt">{c.pt ?? c.preview}</pre>
                   </div>
                 ))}
               </div>
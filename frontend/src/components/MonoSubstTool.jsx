@@ -147,6 +147,7 @@ export default function MonoSubstTool() {
   const [msg, setMsg] = useState("");
   const [busy, setBusy] = useState(false);
   const [score, setScore] = useState(0);
+  const [progress, setProgress] = useState("");
   const fileInputRef = useRef(null);
 
   const applyMappingDebounced = useCallback(
@@ -234,16 +235,41 @@ export default function MonoSubstTool() {
     if (!ciphertext) return setMsg("Enter ciphertext first");
     setBusy(true);
     setMsg("");
+    setProgress("");
     try {
-      const resp = await axios.post(`${api}/autoSolve`, { ciphertext });
-      const newMapArr = dictToArr(resp.data.mapping);
-      setMapping(newMapArr);
-      setPlaintext(resp.data.plaintext);
-      setScore(resp.data.score);
+      // Solve chạy dưới dạng job, tiến độ nhận qua Server-Sent Events
+      const job = await axios.post(`${api}/jobs`, { ciphertext });
+      const result = await new Promise((resolve, reject) => {
+        const events = new EventSource(`${api}/jobs/${job.data.jobId}/events`);
+        events.addEventListener("progress", (e) => {
+          const p = JSON.parse(e.data);
+          setMapping(dictToArr(p.mapping));
+          setScore(p.score);
+          setProgress(
+            `Restart ${p.restart + 1} · ${p.iteration} iterations · score ${p.score.toFixed(4)}`
+          );
+        });
+        events.addEventListener("done", (e) => {
+          events.close();
+          resolve(JSON.parse(e.data));
+        });
+        events.addEventListener("error", (e) => {
+          events.close();
+          reject(new Error(e.data ? JSON.parse(e.data).detail : "stream closed"));
+        });
+        events.addEventListener("cancelled", () => {
+          events.close();
+          reject(new Error("cancelled"));
+        });
+      });
+      setMapping(dictToArr(result.mapping));
+      setPlaintext(result.plaintext);
+      setScore(result.score);
     } catch (e) {
       console.error(e);
       setMsg("Solve failed. Check backend.");
     } finally {
+      setProgress("");
       setBusy(false);
     }
   };
@@ -376,6 +402,7 @@ ${plaintext}
         </div>
       </div>
 
+      {progress && <div className="msg">{progress}</div>}
       {msg && <div className="msg error">{msg}</div>}
     </div>
   );
@@ -1,6 +1,15 @@
-// tools/test_des_compare.js (chạy bằng node)
+// tools/test_des_compare.js (chạy bằng node, backend phải đang chạy ở cổng 4000)
+// Node 17+ cần cờ --openssl-legacy-provider để dùng des-cbc
 import crypto from "crypto";
-import { desEncryptHex } from "./backend/src/utils/des_modes.js"; // file wrapper anh đang dùng
+
+async function desEncryptHex(plaintext, keyHex, mode, ivHex) {
+  const res = await fetch("http://localhost:4000/api/des/encrypt", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ plaintext, keyHex, mode, ivHex }),
+  });
+  return res.json();
+}
 
 function crypto_des_cbc_hex(plain, keyHex, ivHex) {
   const key = Buffer.from(keyHex, "hex");
@@ -16,5 +25,5 @@ const ivHex = "1111111111111111"; // hex (-> 0x11..)
 const pt = "Hello Des Test";
 
 console.log("Node crypto (des-cbc):", crypto_des_cbc_hex(pt, key, ivHex));
-const our = desEncryptHex(pt, key, "CBC", ivHex);
+const our = await desEncryptHex(pt, key, "CBC", ivHex);
 console.log("our wrapper:", our.ciphertextHex);